@@ -0,0 +1,119 @@
+import numpy as np
+from dados import tirar
+
+TAMANO_BUFFER: int = 4096
+
+
+class Azar:
+    def __init__(
+        self,
+        semilla: int | np.random.SeedSequence | None = None,
+        tamano_buffer: int = TAMANO_BUFFER,
+    ):
+        """Fuente de números al azar de toda la simulación, respaldada por un
+        np.random.Generator. Los dados y los uniformes se sacan de buffers que
+        se llenan de a tamano_buffer valores por llamada a numpy, en lugar de
+        una llamada de Python por número.
+
+        Args:
+            semilla (int | np.random.SeedSequence | None, optional): Semilla o
+                SeedSequence. None toma entropía del sistema. Defaults to None.
+            tamano_buffer (int, optional): Valores por recarga de cada buffer.
+                Defaults to TAMANO_BUFFER.
+        """
+        if not isinstance(semilla, np.random.SeedSequence):
+            semilla = np.random.SeedSequence(semilla)
+        self.semilla: np.random.SeedSequence = semilla
+        self.generador: np.random.Generator = np.random.default_rng(semilla)
+        self.tamano_buffer: int = tamano_buffer
+        # Los buffers empiezan vacíos y se llenan al primer uso.
+        self._dados: list[int] = []
+        self._proximo_dado: int = 0
+        self._uniformes: list[float] = []
+        self._proximo_uniforme: int = 0
+
+    def spawn(self, cantidad: int) -> list["Azar"]:
+        """Crea cantidad generadores independientes derivados de la semilla
+        (con SeedSequence.spawn), por ejemplo uno por réplica o proceso.
+        """
+        return [Azar(hija, self.tamano_buffer) for hija in self.semilla.spawn(cantidad)]
+
+    def estado(self) -> dict:
+        """Estado completo (generador y buffers) para poder retomar la
+        secuencia exacta con restaurar. Los buffers no se modifican en el
+        lugar (se reemplazan al recargar), así que no hace falta copiarlos.
+        """
+        return {
+            # Los campos de la SeedSequence, para que spawn siga igual.
+            "semilla": {
+                "entropy": self.semilla.entropy,
+                "spawn_key": self.semilla.spawn_key,
+                "pool_size": self.semilla.pool_size,
+                "n_children_spawned": self.semilla.n_children_spawned,
+            },
+            "tamano_buffer": self.tamano_buffer,
+            "generador": self.generador.bit_generator.state,
+            "dados": self._dados,
+            "proximo_dado": self._proximo_dado,
+            "uniformes": self._uniformes,
+            "proximo_uniforme": self._proximo_uniforme,
+        }
+
+    @classmethod
+    def desde_estado(cls, estado: dict) -> "Azar":
+        """Crea un Azar en el estado devuelto por estado(), sin pedir
+        entropía al sistema.
+        """
+        semilla = np.random.SeedSequence(**estado["semilla"])
+        azar = cls(semilla, estado["tamano_buffer"])
+        azar.restaurar(estado)
+        return azar
+
+    def restaurar(self, estado: dict) -> None:
+        """Vuelve al estado devuelto por estado()."""
+        self.generador.bit_generator.state = estado["generador"]
+        self._dados = estado["dados"]
+        self._proximo_dado = estado["proximo_dado"]
+        self._uniformes = estado["uniformes"]
+        self._proximo_uniforme = estado["proximo_uniforme"]
+
+    def dados(self, cantidad: int) -> list[int]:
+        """Devuelve una lista de cantidad dados (enteros del 1 al 6)."""
+        if cantidad > self.tamano_buffer:
+            # No entran en un buffer: de a buffers completos.
+            dados: list[int] = []
+            while cantidad > 0:
+                dados += self.dados(min(cantidad, self.tamano_buffer))
+                cantidad -= self.tamano_buffer
+            return dados
+        inicio: int = self._proximo_dado
+        if inicio + cantidad > len(self._dados):
+            self._dados = self.generador.integers(1, 7, size=self.tamano_buffer).tolist()
+            inicio = 0
+        self._proximo_dado = inicio + cantidad
+        return self._dados[inicio:inicio + cantidad]
+
+    def dados_empaquetados(self, cantidad: int) -> int:
+        """Tirada de cantidad dados como dados empaquetados (ver dados.py),
+        con un solo uniforme.
+        """
+        return tirar(cantidad, self.uniforme())
+
+    def uniforme(self) -> float:
+        """Devuelve un número uniforme en [0, 1)."""
+        if self._proximo_uniforme == len(self._uniformes):
+            self._uniformes = self.generador.random(self.tamano_buffer).tolist()
+            self._proximo_uniforme = 0
+        self._proximo_uniforme += 1
+        return self._uniformes[self._proximo_uniforme - 1]
+
+
+_azar_por_defecto: Azar | None = None
+
+
+def azar_por_defecto() -> Azar:
+    """Generador compartido que se usa cuando no se inyecta uno (sin semilla)."""
+    global _azar_por_defecto
+    if _azar_por_defecto is None:
+        _azar_por_defecto = Azar()
+    return _azar_por_defecto
@@ -0,0 +1,378 @@
+import argparse
+import itertools
+import json
+import math
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from azar import Azar
+from estados import CODIFICADORES
+from experimentos import jugar_juegos
+from jugador import ElBatoQueSoloCalculaPromedios, AgenteQLearning, Jugador
+
+# Jugadores que se pueden barrer; sus hiperparámetros se pasan por nombre.
+JUGADORES = {
+    "ElBatoQueSoloCalculaPromedios": ElBatoQueSoloCalculaPromedios,
+    "AgenteQLearning": AgenteQLearning,
+}
+
+
+def espacio_grilla(valores: dict[str, list]) -> list[dict]:
+    ''' Todas las combinaciones de los valores de cada parámetro. '''
+    nombres = list(valores)
+    return [dict(zip(nombres, combinacion)) for combinacion in itertools.product(*valores.values())]
+
+
+def espacio_aleatorio(
+    rangos: dict[str, tuple[float, float, bool, bool]],
+    cantidad: int,
+    semilla: int | np.random.SeedSequence = 0,
+) -> list[dict]:
+    ''' cantidad configuraciones al azar. Cada rango es (bajo, alto,
+        logaritmico, entero): con logaritmico el valor se elige uniforme en
+        escala logarítmica, útil para tasas como alpha o 1 - epsilon_decay;
+        con entero se elige un entero entre bajo y alto inclusive (en escala
+        logarítmica, redondeando). Puede haber configuraciones repetidas.
+    '''
+    rng = np.random.default_rng(semilla)
+    configuraciones: list[dict] = []
+    for _ in range(cantidad):
+        configuracion: dict = {}
+        for nombre, (bajo, alto, logaritmico, entero) in rangos.items():
+            if logaritmico:
+                valor = float(math.exp(rng.uniform(math.log(bajo), math.log(alto))))
+                if entero:
+                    valor = min(max(round(valor), math.ceil(bajo)), math.floor(alto))
+            elif entero:
+                valor = int(rng.integers(math.ceil(bajo), math.floor(alto) + 1))
+            else:
+                valor = float(rng.uniform(bajo, alto))
+            configuracion[nombre] = valor
+        configuraciones.append(configuracion)
+    return configuraciones
+
+
+class ResultadosBarrido:
+    def __init__(self, filename: str):
+        """Resultados de un barrido en una base sqlite3, una fila por
+        configuración y peldaño. Los parámetros se guardan como JSON, así que
+        se pueden consultar con json_extract, por ejemplo:
+
+            SELECT json_extract(parametros, '$.alpha'), metrica FROM ensayos
+            WHERE peldano = 2 ORDER BY metrica;
+
+        Si la base ya tiene un ensayo igual (mismo jugador, parámetros,
+        semilla, réplicas, juegos y fracción final) no se vuelve a correr, así
+        que un barrido interrumpido se retoma corriendo el mismo comando.
+
+        Args:
+            filename (str): Nombre/Path de la base.
+        """
+        self.conexion = sqlite3.connect(filename)
+        self.conexion.execute(
+            """CREATE TABLE IF NOT EXISTS ensayos (
+                id INTEGER PRIMARY KEY,
+                jugador TEXT NOT NULL,
+                parametros TEXT NOT NULL,
+                semilla INTEGER NOT NULL,
+                replicas INTEGER NOT NULL,
+                peldano INTEGER NOT NULL,
+                juegos INTEGER NOT NULL,
+                fraccion_final REAL NOT NULL,
+                metrica REAL NOT NULL,
+                desvio REAL NOT NULL,
+                segundos REAL NOT NULL,
+                fecha TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (jugador, parametros, semilla, replicas, juegos, fraccion_final)
+            )"""
+        )
+        self.conexion.commit()
+
+    def buscar(
+        self,
+        jugador: str,
+        parametros: str,
+        semilla: int,
+        replicas: int,
+        juegos: int,
+        fraccion_final: float,
+    ) -> float | None:
+        fila = self.conexion.execute(
+            "SELECT metrica FROM ensayos WHERE jugador = ? AND parametros = ? "
+            "AND semilla = ? AND replicas = ? AND juegos = ? AND fraccion_final = ?",
+            (jugador, parametros, semilla, replicas, juegos, fraccion_final),
+        ).fetchone()
+        return fila[0] if fila is not None else None
+
+    def guardar(
+        self,
+        jugador: str,
+        parametros: str,
+        semilla: int,
+        replicas: int,
+        peldano: int,
+        juegos: int,
+        fraccion_final: float,
+        metrica: float,
+        desvio: float,
+        segundos: float,
+    ) -> None:
+        # Se confirma cada ensayo, para no perder nada si se corta el barrido.
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO ensayos (jugador, parametros, semilla, replicas, "
+            "peldano, juegos, fraccion_final, metrica, desvio, segundos) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                jugador,
+                parametros,
+                semilla,
+                replicas,
+                peldano,
+                juegos,
+                fraccion_final,
+                metrica,
+                desvio,
+                segundos,
+            ),
+        )
+        self.conexion.commit()
+
+    def cerrar(self) -> None:
+        self.conexion.close()
+
+
+# Una réplica entrenada: el jugador, su azar y su curva hasta ahora.
+Replica = tuple[Jugador, Azar, list[int]]
+
+
+def _correr_replica(
+    jugador: str,
+    parametros: dict,
+    cantidad_juegos: int,
+    semilla: np.random.SeedSequence,
+    previa: Replica | None = None,
+) -> tuple[Replica, float]:
+    """Entrena una réplica de una configuración hasta cantidad_juegos juegos,
+    siguiendo desde previa (la del peldaño anterior) si se da. Como la réplica
+    depende sólo de su semilla, da lo mismo que entrenar desde cero. Devuelve
+    la réplica y cuánto tardó.
+    """
+    inicio = time.perf_counter()
+    if previa is None:
+        azar = Azar(semilla)
+        # El codificador va por nombre, para que la configuración sea JSON.
+        if "codificador" in parametros:
+            parametros = {**parametros, "codificador": CODIFICADORES[parametros["codificador"]]}
+        previa = (JUGADORES[jugador](azar=azar, **parametros), azar, [])
+    (entrenado, azar, curva) = previa
+    curva = curva + jugar_juegos(entrenado, azar, cantidad_juegos - len(curva))
+    return ((entrenado, azar, curva), time.perf_counter() - inicio)
+
+
+def barrer(
+    jugador: str,
+    configuraciones: list[dict],
+    resultados_filename: str = "barrido.sqlite",
+    juegos_iniciales: int = 500,
+    eta: int = 3,
+    peldanos: int = 3,
+    replicas: int = 4,
+    fraccion_final: float = 0.2,
+    semilla: int = 0,
+    procesos: int | None = None,
+) -> list[tuple[dict, float]]:
+    """Barre hiperparámetros de un jugador con successive halving: en el
+    peldaño k cada configuración que sigue en carrera entrena `replicas`
+    réplicas de juegos_iniciales * eta**k juegos, y sólo el mejor 1/eta de
+    las configuraciones pasa al peldaño siguiente. Cada peldaño sigue
+    entrenando las réplicas del anterior; si el peldaño anterior ya estaba en
+    la base (un barrido retomado), las réplicas se entrenan desde cero, con el
+    mismo resultado.
+
+    La métrica de una configuración es el promedio de turnos por juego en la
+    última fraccion_final de la curva de aprendizaje, promediado entre
+    réplicas (menos es mejor). Todas las configuraciones usan las mismas
+    semillas de réplica, lo que hace más justa la comparación.
+
+    Args:
+        jugador (str): Nombre en JUGADORES.
+        configuraciones (list[dict]): Parámetros de cada configuración (ver
+            espacio_grilla y espacio_aleatorio). Las repetidas se corren una vez.
+        resultados_filename (str, optional): Base de resultados (ver
+            ResultadosBarrido). Defaults to "barrido.sqlite".
+        juegos_iniciales (int, optional): Juegos del primer peldaño. Defaults to 500.
+        eta (int, optional): Factor de reducción entre peldaños. Defaults to 3.
+        peldanos (int, optional): Cantidad de peldaños. Defaults to 3.
+        replicas (int, optional): Réplicas por configuración. Defaults to 4.
+        fraccion_final (float, optional): Fracción final de la curva que se
+            promedia. Defaults to 0.2.
+        semilla (int, optional): Semilla de las réplicas. Defaults to 0.
+        procesos (int | None, optional): Procesos; None usa todos los
+            núcleos. Defaults to None.
+
+    Returns:
+        list[tuple[dict, float]]: Las configuraciones del último peldaño con
+        su métrica, de mejor a peor.
+    """
+    if peldanos < 1:
+        raise ValueError(f"peldanos tiene que ser al menos 1 (es {peldanos})")
+    semillas = np.random.SeedSequence(semilla).spawn(replicas)
+    resultados = ResultadosBarrido(resultados_filename)
+    en_carrera: list[dict] = list(
+        {json.dumps(parametros, sort_keys=True): parametros for parametros in configuraciones}.values()
+    )
+    # Réplicas entrenadas en el peldaño anterior, por configuración.
+    replicas_previas: dict[str, list[Replica]] = {}
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos != 1 else None
+    mapear = pool.map if pool is not None else map
+    try:
+        for peldano in range(peldanos):
+            juegos = juegos_iniciales * eta**peldano
+            metricas: dict[str, float] = {}
+            pendientes: list[dict] = []
+            for parametros in en_carrera:
+                clave = json.dumps(parametros, sort_keys=True)
+                metrica = resultados.buscar(
+                    jugador, clave, semilla, replicas, juegos, fraccion_final
+                )
+                if metrica is not None:
+                    metricas[clave] = metrica
+                else:
+                    pendientes.append(parametros)
+
+            tareas = [
+                (parametros, s, previa)
+                for parametros in pendientes
+                for (s, previa) in zip(
+                    semillas,
+                    replicas_previas.get(json.dumps(parametros, sort_keys=True), [None] * replicas),
+                )
+            ]
+            replicas_previas = {}
+            corridas = mapear(
+                _correr_replica,
+                [jugador] * len(tareas),
+                [parametros for (parametros, _, _) in tareas],
+                [juegos] * len(tareas),
+                [s for (_, s, _) in tareas],
+                [previa for (_, _, previa) in tareas],
+            )
+            # Las réplicas de cada configuración llegan juntas y en orden.
+            for parametros in pendientes:
+                replicas_y_tiempos = [next(corridas) for _ in semillas]
+                ultimos = max(1, int(juegos * fraccion_final))
+                por_replica = [np.mean(curva[-ultimos:]) for ((_, _, curva), _) in replicas_y_tiempos]
+                clave = json.dumps(parametros, sort_keys=True)
+                replicas_previas[clave] = [replica for (replica, _) in replicas_y_tiempos]
+                metricas[clave] = float(np.mean(por_replica))
+                resultados.guardar(
+                    jugador,
+                    clave,
+                    semilla,
+                    replicas,
+                    peldano,
+                    juegos,
+                    fraccion_final,
+                    metricas[clave],
+                    float(np.std(por_replica)),
+                    sum(segundos for (_, segundos) in replicas_y_tiempos),
+                )
+                print(f"peldaño {peldano} ({juegos} juegos): {clave} -> {metricas[clave]:.3f}")
+
+            en_carrera.sort(key=lambda parametros: metricas[json.dumps(parametros, sort_keys=True)])
+            ranking = [(p, metricas[json.dumps(p, sort_keys=True)]) for p in en_carrera]
+            if peldano < peldanos - 1:
+                en_carrera = en_carrera[: max(1, len(en_carrera) // eta)]
+                # Sólo se siguen entrenando las que pasan de peldaño.
+                siguen = {json.dumps(p, sort_keys=True) for p in en_carrera}
+                replicas_previas = {c: r for c, r in replicas_previas.items() if c in siguen}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        resultados.cerrar()
+    return ranking
+
+
+def _parsear_valor(texto: str) -> int | float | bool:
+    ''' Entero si el texto es un entero (hay parámetros que tienen que serlo,
+        como tamaños o cantidades), True/False, o si no float.
+    '''
+    if texto in ("True", "False"):
+        return texto == "True"
+    try:
+        return int(texto)
+    except ValueError:
+        return float(texto)
+
+
+def _parsear_parametro(texto: str) -> tuple[str, list | tuple[float, float, bool, bool]]:
+    ''' "nombre=v1,v2,..." es una lista de valores para la grilla;
+        "nombre=bajo:alto" o "nombre=log:bajo:alto" es un rango de floats
+        para la búsqueda al azar, y con ":int" al final, de enteros.
+        Ejemplo: _parsear_parametro("n=log:100:10000:int")
+        --> ("n", (100.0, 10000.0, True, True))
+    '''
+    (nombre, valores) = texto.split("=", 1)
+    if ":" in valores:
+        partes = valores.split(":")
+        logaritmico = partes[0] == "log"
+        entero = partes[-1] == "int"
+        partes = partes[int(logaritmico) : len(partes) - int(entero)]
+        if len(partes) != 2:
+            raise ValueError(f"rango inválido para {nombre}: {valores}")
+        (bajo, alto) = map(float, partes)
+        return (nombre, (bajo, alto, logaritmico, entero))
+    return (nombre, [_parsear_valor(valor) for valor in valores.split(",")])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Barrer hiperparámetros de un jugador de 'Diez Mil' con successive halving.")
+
+    parser.add_argument('-j', '--jugador', type=str, default='AgenteQLearning', choices=list(JUGADORES), help='Jugador a barrer (default: AgenteQLearning)')
+    parser.add_argument('parametros', type=str, nargs='+', help='Parámetros: nombre=v1,v2 (grilla) o nombre=bajo:alto / nombre=log:bajo:alto (al azar; con :int al final, enteros). Ej: alpha=0.01,0.05 gamma=0.9,0.99 epsilon=log:0.01:0.2')
+    parser.add_argument('--codificador', type=str, nargs='+', default=None, choices=list(CODIFICADORES), help='Codificadores de estado a probar, como un parámetro más (default: el del jugador)')
+    parser.add_argument('-n', '--muestras', type=int, default=20, help='Configuraciones al azar si hay rangos (default: 20)')
+    parser.add_argument('-o', '--output', type=str, default='barrido.sqlite', help='Base sqlite con los resultados (default: barrido.sqlite)')
+    parser.add_argument('--juegos', type=int, default=500, help='Juegos del primer peldaño (default: 500)')
+    parser.add_argument('--eta', type=int, default=3, help='Factor de reducción entre peldaños (default: 3)')
+    parser.add_argument('--peldanos', type=int, default=3, help='Cantidad de peldaños (default: 3)')
+    parser.add_argument('-f', '--fraccion-final', type=float, default=0.2, help='Fracción final de la curva que se promedia (default: 0.2)')
+    parser.add_argument('-r', '--replicas', type=int, default=4, help='Réplicas por configuración (default: 4)')
+    parser.add_argument('-s', '--semilla', type=int, default=0, help='Semilla (default: 0)')
+    parser.add_argument('-p', '--procesos', type=int, default=None, help='Procesos (default: todos los núcleos)')
+
+    args = parser.parse_args()
+
+    espacio = dict(map(_parsear_parametro, args.parametros))
+    if args.codificador is not None:
+        espacio["codificador"] = args.codificador
+    rangos = {nombre: v for nombre, v in espacio.items() if isinstance(v, tuple)}
+    if rangos:
+        # Los parámetros con lista de valores eligen uno al azar de la lista,
+        # con otra semilla derivada que la de los rangos.
+        (semilla_rangos, semilla_listas) = np.random.SeedSequence(args.semilla).spawn(2)
+        configuraciones = espacio_aleatorio(rangos, args.muestras, semilla_rangos)
+        rng = np.random.default_rng(semilla_listas)
+        for configuracion in configuraciones:
+            for nombre, v in espacio.items():
+                if isinstance(v, list):
+                    configuracion[nombre] = v[int(rng.integers(len(v)))]
+    else:
+        configuraciones = espacio_grilla(espacio)
+
+    ranking = barrer(
+        args.jugador,
+        configuraciones,
+        args.output,
+        args.juegos,
+        args.eta,
+        args.peldanos,
+        args.replicas,
+        args.fraccion_final,
+        semilla=args.semilla,
+        procesos=args.procesos,
+    )
+    print("\nMejores configuraciones:")
+    for parametros, metrica in ranking:
+        print(f"{metrica:8.3f}  {json.dumps(parametros, sort_keys=True)}")
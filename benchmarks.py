@@ -0,0 +1,199 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import redirect_stderr
+from functools import partial
+from azar import Azar
+from diezmil import JuegoDiezMil
+from experimentos import entrenar_replica
+from utils import puntaje_y_no_usados
+from dados import empaquetar
+from dados import puntaje_y_no_usados as puntaje_empaquetado
+from jugador import (
+    JugadorAleatorio,
+    JugadorSiempreSePlanta,
+    ElBatoQueSoloCalculaPromedios,
+    AgenteQLearning,
+)
+import template
+from vectorizado import ReplicasMonteCarlo, ReplicasQLearning, entrenar_vectorizado
+
+VERSION_RESULTADOS: int = 1
+SEMILLA: int = 0
+# benchmarks_baseline.json, en el repo, es una corrida de referencia con la
+# escala por defecto (-r 7), junto con la versión de Python y la máquina
+# donde se midió. Las tasas sólo se pueden comparar en la misma máquina y
+# con la misma escala: para buscar regresiones en otra, correr primero
+# `python benchmarks.py --actualizar-baseline` sobre el código de referencia.
+
+# Jugadores de jugador.py, creados con un Azar dado.
+JUGADORES = {
+    "JugadorAleatorio": partial(JugadorAleatorio, "random"),
+    "JugadorSiempreSePlanta": partial(JugadorSiempreSePlanta, "plantón"),
+    "ElBatoQueSoloCalculaPromedios": partial(ElBatoQueSoloCalculaPromedios, 0.01),
+    "AgenteQLearning": partial(AgenteQLearning, 0.05, 0.99, 0.05, 0.9999),
+}
+
+
+def _mejor_tiempo(funcion, repeticiones: int) -> float:
+    ''' Corre funcion repeticiones veces y devuelve el menor tiempo (en
+        segundos), que es el menos afectado por ruido del sistema.
+    '''
+    tiempos: list[float] = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def medir_puntaje(llamadas: int, repeticiones: int) -> dict[str, float]:
+    """Llamadas por segundo a puntaje_y_no_usados, con listas y con dados
+    empaquetados (el que usa JuegoDiezMil), para cada cantidad de dados.
+    """
+    resultados: dict[str, float] = {}
+    for cant_dados in range(1, 7):
+        azar = Azar(SEMILLA)
+        tiradas = [azar.dados(cant_dados) for _ in range(llamadas)]
+        empaquetadas = [empaquetar(dados) for dados in tiradas]
+
+        def puntuar():
+            for dados in tiradas:
+                puntaje_y_no_usados(dados)
+
+        def puntuar_empaquetados():
+            for dados in empaquetadas:
+                puntaje_empaquetado(dados)
+
+        resultados[f"puntaje/{cant_dados}_dados"] = llamadas / _mejor_tiempo(
+            puntuar, repeticiones
+        )
+        resultados[f"puntaje_empaquetado/{cant_dados}_dados"] = llamadas / _mejor_tiempo(
+            puntuar_empaquetados, repeticiones
+        )
+    return resultados
+
+
+def medir_juegos(juegos: int, repeticiones: int) -> dict[str, float]:
+    """Juegos por segundo de JuegoDiezMil.jugar con cada jugador de jugador.py.
+    Cada repetición empieza con un jugador nuevo y la misma semilla.
+    """
+    resultados: dict[str, float] = {}
+    for nombre, fabrica in JUGADORES.items():
+
+        def jugar():
+            azar = Azar(SEMILLA)
+            jugador = fabrica(azar=azar)
+            for _ in range(juegos):
+                JuegoDiezMil(jugador, azar).jugar()
+
+        resultados[f"juegos/{nombre}"] = juegos / _mejor_tiempo(jugar, repeticiones)
+    return resultados
+
+
+def medir_entrenamiento(episodios: int, repeticiones: int) -> dict[str, float]:
+    """Episodios (juegos) de entrenamiento por segundo de los agentes que
+    aprenden: los de jugador.py con experimentos.entrenar_replica, el de
+    template.py con AgenteQLearning.entrenar y las réplicas de vectorizado.py.
+    """
+    resultados: dict[str, float] = {}
+    semilla = Azar(SEMILLA).semilla
+    for nombre in ["ElBatoQueSoloCalculaPromedios", "AgenteQLearning"]:
+        entrenar = partial(entrenar_replica, JUGADORES[nombre], episodios, semilla)
+        resultados[f"entrenamiento/{nombre}"] = episodios / _mejor_tiempo(
+            entrenar, repeticiones
+        )
+
+    def entrenar_template():
+        ambiente = template.AmbienteDiezMil(azar=Azar(SEMILLA))
+        agente = template.AgenteQLearning(ambiente, 0.1, 1.0, 0.1)
+        with redirect_stderr(io.StringIO()):  # Sin la barra de tqdm.
+            agente.entrenar(episodios)
+
+    resultados["entrenamiento/template.AgenteQLearning"] = episodios / _mejor_tiempo(
+        entrenar_template, repeticiones
+    )
+
+    # Los mismos episodios repartidos en 100 réplicas entrenadas juntas.
+    for nombre, fabrica in [
+        ("ReplicasMonteCarlo", partial(ReplicasMonteCarlo, 100, 0.01)),
+        ("ReplicasQLearning", partial(ReplicasQLearning, 100, 0.05, 0.99, 0.05, 0.9999)),
+    ]:
+        juegos_por_replica = max(1, episodios // 100)
+        resultados[f"entrenamiento/vectorizado.{nombre}"] = 100 * juegos_por_replica / _mejor_tiempo(
+            lambda: entrenar_vectorizado(fabrica(), juegos_por_replica, azar=Azar(SEMILLA)),
+            repeticiones,
+        )
+    return resultados
+
+
+def comparar(
+    resultados: dict[str, float], baseline: dict[str, float], umbral: float
+) -> list[str]:
+    """Imprime cada medición contra la baseline y devuelve las que bajaron
+    más que la fracción umbral.
+    """
+    regresiones: list[str] = []
+    print(f"{'medición':45} {'actual':>12} {'baseline':>12} {'cambio':>8}")
+    for nombre, valor in resultados.items():
+        if nombre not in baseline:
+            print(f"{nombre:45} {valor:12.0f} {'-':>12} {'-':>8}")
+            continue
+        cambio = valor / baseline[nombre] - 1
+        marca = ""
+        if cambio < -umbral:
+            regresiones.append(nombre)
+            marca = "  REGRESIÓN"
+        print(f"{nombre:45} {valor:12.0f} {baseline[nombre]:12.0f} {cambio:+8.1%}{marca}")
+    return regresiones
+
+
+def main(output, baseline_filename, actualizar_baseline, umbral, repeticiones, escala):
+    resultados: dict[str, float] = {}
+    resultados.update(medir_puntaje(int(20000 * escala), repeticiones))
+    resultados.update(medir_juegos(int(200 * escala), repeticiones))
+    resultados.update(medir_entrenamiento(int(200 * escala), repeticiones))
+
+    with open(output, "w") as archivo:
+        json.dump(
+            {
+                "version": VERSION_RESULTADOS,
+                "python": platform.python_version(),
+                "maquina": platform.machine(),
+                "resultados": resultados,
+            },
+            archivo,
+            indent=2,
+        )
+
+    baseline: dict[str, float] = {}
+    if os.path.exists(baseline_filename):
+        with open(baseline_filename) as archivo:
+            baseline = json.load(archivo)["resultados"]
+    regresiones = comparar(resultados, baseline, umbral)
+
+    if actualizar_baseline:
+        with open(output) as origen, open(baseline_filename, "w") as destino:
+            destino.write(origen.read())
+    if regresiones:
+        print(f"{len(regresiones)} regresiones de más de {umbral:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Medir el rendimiento de puntaje, simulación y entrenamiento de 'Diez Mil'.")
+
+    parser.add_argument('-o', '--output', type=str, default='benchmarks.json', help='Archivo JSON con los resultados (default: benchmarks.json)')
+    parser.add_argument('-b', '--baseline', type=str, default='benchmarks_baseline.json', help='Resultados contra los que comparar (default: benchmarks_baseline.json)')
+    parser.add_argument('--actualizar-baseline', action='store_true', help='Guardar estos resultados como la nueva baseline')
+    parser.add_argument('-u', '--umbral', type=float, default=0.1, help='Caída relativa que cuenta como regresión (default: 0.1)')
+    parser.add_argument('-r', '--repeticiones', type=int, default=3, help='Repeticiones de cada medición; se toma la mejor (default: 3)')
+    parser.add_argument('-e', '--escala', type=float, default=1.0, help='Multiplica la cantidad de trabajo de cada medición (default: 1.0)')
+
+    args = parser.parse_args()
+
+    main(args.output, args.baseline, args.actualizar_baseline, args.umbral, args.repeticiones, args.escala)
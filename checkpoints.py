@@ -0,0 +1,123 @@
+import os
+import pickle
+from concurrent.futures import Future, ThreadPoolExecutor
+
+VERSION_CHECKPOINT: int = 2
+
+
+class Checkpointer:
+    def __init__(self, filename: str, cada: int = 1000):
+        """Escribe checkpoints en un hilo aparte, para no frenar el
+        entrenamiento. Cada escritura va a un archivo temporal que después
+        reemplaza a filename con os.replace, así que filename siempre tiene un
+        checkpoint completo aunque el proceso muera a mitad de una escritura.
+
+        Args:
+            filename (str): Nombre/Path del checkpoint.
+            cada (int, optional): Cada cuántos episodios (o unidades de trabajo)
+                guardar; lo usa quien llama a guardar. Defaults to 1000.
+        """
+        self.filename: str = filename
+        self.cada: int = cada
+        self._hilo = ThreadPoolExecutor(max_workers=1)
+        self._pendiente: Future | None = None
+
+    def guardar(self, datos: dict) -> None:
+        """Encola la escritura de datos. datos tiene que ser una copia que el
+        entrenamiento no vaya a modificar (por ejemplo, tablas copiadas con
+        np.copy). Si la escritura anterior no terminó, la espera primero.
+        """
+        if self._pendiente is not None:
+            self._pendiente.result()
+        self._pendiente = self._hilo.submit(self._escribir, datos)
+
+    def _escribir(self, datos: dict) -> None:
+        temporal = self.filename + ".tmp"
+        with open(temporal, "wb") as archivo:
+            pickle.dump({"version": VERSION_CHECKPOINT, **datos}, archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.filename)
+
+    def cerrar(self) -> None:
+        """Espera a que termine la última escritura."""
+        if self._pendiente is not None:
+            self._pendiente.result()
+            self._pendiente = None
+        self._hilo.shutdown()
+
+
+def cargar_checkpoint(filename: str) -> dict:
+    """Lee un checkpoint escrito por Checkpointer.
+
+    Args:
+        filename (str): Nombre/Path del checkpoint.
+
+    Returns:
+        dict: Los datos guardados.
+    """
+    with open(filename, "rb") as archivo:
+        datos = pickle.load(archivo)
+    if datos.get("version") != VERSION_CHECKPOINT:
+        raise ValueError(
+            f"{filename}: versión de checkpoint {datos.get('version')} no soportada"
+        )
+    return datos
+
+
+class RegistroCheckpoint:
+    def __init__(self, filename: str, encabezado: dict):
+        """Checkpoint de sólo agregar: un encabezado y después una entrada por
+        unidad de trabajo terminada, cada una un pickle aparte al final del
+        archivo. Guardar una entrada cuesta lo que mide esa entrada, no todo lo
+        hecho hasta ahí. Si el proceso muere a mitad de una escritura, la
+        entrada incompleta se descarta al volver a abrir el archivo.
+
+        Args:
+            filename (str): Nombre/Path del registro. Si existe, se leen sus
+                entradas y las nuevas se agregan al final.
+            encabezado (dict): Describe el experimento; si el registro existente
+                tiene otro, se lanza ValueError.
+        """
+        self.filename: str = filename
+        self.entradas: list = []
+        if os.path.exists(filename):
+            largo = self._leer(encabezado)
+            self._archivo = open(filename, "r+b")
+            self._archivo.truncate(largo)
+            self._archivo.seek(largo)
+        else:
+            self._archivo = open(filename, "wb")
+            self._escribir({"version": VERSION_CHECKPOINT, **encabezado})
+
+    def _leer(self, encabezado: dict) -> int:
+        """Lee las entradas completas y devuelve hasta qué byte llegan."""
+        with open(self.filename, "rb") as archivo:
+            datos = pickle.load(archivo)
+            if datos.get("version") != VERSION_CHECKPOINT:
+                raise ValueError(
+                    f"{self.filename}: versión de checkpoint {datos.get('version')} no soportada"
+                )
+            del datos["version"]
+            if datos != encabezado:
+                raise ValueError(f"{self.filename} es de otro experimento: {datos}")
+            largo = archivo.tell()
+            while True:
+                try:
+                    self.entradas.append(pickle.load(archivo))
+                except (EOFError, pickle.UnpicklingError):
+                    return largo
+                largo = archivo.tell()
+
+    def agregar(self, entrada) -> None:
+        """Agrega entrada al final del registro y espera a que llegue al disco."""
+        self._escribir(entrada)
+        self.entradas.append(entrada)
+
+    def _escribir(self, datos) -> None:
+        pickle.dump(datos, self._archivo)
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+
+    def cerrar(self) -> None:
+        self._archivo.close()
@@ -0,0 +1,96 @@
+import numpy as np
+from utils import _TABLA_PUNTAJES
+from transiciones import multiconjuntos, tablas_alias
+
+# Dados empaquetados: un multiconjunto de dados como un solo entero, con la
+# cantidad de cada cara en 3 bits: cuentas = sum(cant[cara] << 3*(cara-1)).
+# El orden de los dados se pierde, pero al juego no le importa. 0 es ningún
+# dado.
+BITS_POR_CARA: int = 3
+_MASCARA_CARA: int = (1 << BITS_POR_CARA) - 1
+
+
+def empaquetar(dados: list[int]) -> int:
+    ''' Lista de dados (enteros del 1 al 6) --> dados empaquetados. '''
+    cuentas: int = 0
+    for d in dados:
+        cuentas += 1 << (BITS_POR_CARA * (d - 1))
+    return cuentas
+
+
+def desempaquetar(cuentas: int) -> list[int]:
+    ''' Dados empaquetados --> lista de dados, ordenada. '''
+    return list(_DADOS[cuentas])
+
+
+def cantidad(cuentas: int) -> int:
+    ''' Cantidad de dados. '''
+    return len(_DADOS[cuentas])
+
+
+def puntaje_y_no_usados(cuentas: int) -> tuple[int, int]:
+    ''' Como utils.puntaje_y_no_usados, con dados empaquetados: devuelve el
+        puntaje y los dados no usados, empaquetados.
+        Precondición: cuentas != 0
+    '''
+    return _PUNTAJES[cuentas]
+
+
+def separar(cuentas: int, quitar: int) -> int:
+    ''' Como utils.separar: los dados de cuentas menos los de quitar. Lanza
+        ValueError si quitar tiene algún dado que cuentas no tiene.
+    '''
+    for corrimiento in range(0, 6 * BITS_POR_CARA, BITS_POR_CARA):
+        if (quitar >> corrimiento) & _MASCARA_CARA > (cuentas >> corrimiento) & _MASCARA_CARA:
+            raise ValueError(
+                f"{desempaquetar(quitar)} no está contenido en {desempaquetar(cuentas)}"
+            )
+    return cuentas - quitar
+
+
+def _armar_tablas() -> tuple[dict[int, tuple[int, ...]], dict[int, tuple[int, int]]]:
+    ''' Los dados de cada multiconjunto de 0 a 6 dados y el puntaje y los no
+        usados (empaquetados) de cada uno, a partir de _TABLA_PUNTAJES.
+    '''
+    dados: dict[int, tuple[int, ...]] = {0: ()}
+    puntajes: dict[int, tuple[int, int]] = {}
+    for ds, (puntaje, no_usados) in _TABLA_PUNTAJES.items():
+        dados[empaquetar(ds)] = ds
+        puntajes[empaquetar(ds)] = (puntaje, empaquetar(no_usados))
+    return (dados, puntajes)
+
+
+_DADOS, _PUNTAJES = _armar_tablas()
+
+
+def _armar_tiradas() -> list[tuple[int, list[float], list[int], list[int]]]:
+    ''' Para cada cantidad de dados (0 es 6, como en el juego), las tablas de
+        alias para muestrear el multiconjunto de una tirada con un uniforme:
+        cantidad de multiconjuntos, aceptación, alias y el multiconjunto
+        empaquetado de cada columna.
+    '''
+    tiradas = []
+    for cant_dados in range(7):
+        n = cant_dados or 6
+        columnas = multiconjuntos(n)
+        probabilidades = np.array([formas for (_, formas) in columnas]) / 6**n
+        (aceptar, alias) = tablas_alias(probabilidades)
+        empaquetados = [empaquetar(ds) for (ds, _) in columnas]
+        tiradas.append((len(columnas), aceptar.tolist(), alias.tolist(), empaquetados))
+    return tiradas
+
+
+_TIRADAS = _armar_tiradas()
+
+
+def tirar(cant_dados: int, uniforme: float) -> int:
+    ''' Tirada de cant_dados dados (0 es tirar los 6), empaquetada, a partir
+        de un uniforme en [0, 1): un solo número al azar por tirada y sin
+        armar listas.
+    '''
+    (tamano, aceptar, alias, empaquetados) = _TIRADAS[cant_dados]
+    escalado = uniforme * tamano
+    columna = int(escalado)
+    if escalado - columna >= aceptar[columna]:
+        columna = alias[columna]
+    return empaquetados[columna]
@@ -1,109 +1,118 @@
-from random import randint
-from tqdm import tqdm
-import matplotlib.pyplot as plt
-import numpy as np
-from utils import puntaje_y_no_usados, separar, JUGADA_PLANTARSE, JUGADA_TIRAR
-from jugador import (
-    Jugador,
-    JugadorAleatorio,
-    JugadorSiempreSePlanta,
-    ElBatoQueSoloCalculaPromedios,
-    AgenteQLearning,
-)
+import argparse
+from functools import partial
+# Importar este módulo (o jugador) no carga matplotlib ni tqdm: los gráficos
+# se importan en main y reportes.py. numpy sí se carga, con azar y dados,
+# porque toda simulación tira los dados con el generador de numpy.
+from azar import Azar, azar_por_defecto
+from estados import CODIFICADORES
+from eventos import Oyente, OyenteTexto
+from dados import cantidad, desempaquetar
+from dados import puntaje_y_no_usados as puntaje_empaquetado
+from dados import separar as separar_empaquetados
+from utils import JUGADA_PLANTARSE, JUGADA_TIRAR
+from jugador import Jugador, ElBatoQueSoloCalculaPromedios
 
 
 class JuegoDiezMil:
-    def __init__(self, jugador: Jugador):
+    def __init__(self, jugador: Jugador, azar: Azar | None = None):
         self.jugador: Jugador = jugador
-
-    def jugar(self, verbose: bool = False, tope_turnos: int = 1000) -> tuple[int, int]:
+        self.azar: Azar = azar if azar is not None else azar_por_defecto()
+
+    def jugar(
+        self,
+        verbose: bool = False,
+        tope_turnos: int = 1000,
+        oyente: Oyente | None = None,
+    ) -> tuple[int, int]:
         """Juega un juego de 10mil para un jugador, hasta terminar o hasta
         llegar a tope_turnos turnos. Devuelve la cantidad de turnos que
-        necesitó y el puntaje final.
+        necesitó y el puntaje final. Si hay oyente le avisa cada evento del
+        juego; verbose=True sin oyente imprime cada turno con OyenteTexto.
+        Sin oyente no se arma ningún texto.
         """
+        if verbose and oyente is None:
+            oyente = OyenteTexto()
+        # Se resuelve una vez por juego si el jugador aprende; si no, no se
+        # llama a nada en cada tirada.
+        observar = self.jugador.observar if self.jugador.aprende() else None
         turno: int = 0
         puntaje_total: int = 0
         while puntaje_total < 10000 and turno < tope_turnos:
             # Nuevo turno
             turno += 1
             puntaje_turno: int = 0
-            msg: str = "turno " + str(turno) + ":"
+            if oyente is not None:
+                oyente.inicio_turno(turno)
 
-            # Un turno siempre empieza tirando los 6 dados.
+            # Un turno siempre empieza tirando los 6 dados. Los dados van
+            # empaquetados (ver dados.py): cada tirada es un entero, sin listas.
             jugada: int = JUGADA_TIRAR
-            dados_a_tirar: list[int] = [1, 2, 3, 4, 5, 6]
+            cant_a_tirar: int = 6
             fin_de_turno: bool = False
 
             while not fin_de_turno:
                 # Tira los dados que correspondan y calcula su puntaje.
-                dados: list[int] = [randint(1, 6) for _ in range(len(dados_a_tirar))]
-                (puntaje_tirada, _) = puntaje_y_no_usados(dados)
-                msg += " " + "".join(map(str, dados)) + " "
-                # print(dados, _)
+                tirados: int = self.azar.dados_empaquetados(cant_a_tirar)
+                (puntaje_tirada, _) = puntaje_empaquetado(tirados)
+                if oyente is not None:
+                    oyente.tirada(desempaquetar(tirados), puntaje_tirada)
 
                 if puntaje_tirada == 0:
                     # Mala suerte, no suma nada. Pierde el turno.
                     fin_de_turno = True
                     puntaje_turno = 0
-                    if isinstance(self.jugador, ElBatoQueSoloCalculaPromedios):
-                        self.jugador.actualizar_tabla(len(dados_a_tirar), puntaje_turno)
-                    elif isinstance(self.jugador, AgenteQLearning):
-                        self.jugador.actualizar_tabla(len(dados_a_tirar), puntaje_turno)
-                        # print("PERDIO", dados_a_tirar, puntaje_turno)
+                    if observar is not None:
+                        observar(cant_a_tirar, puntaje_turno, True)
 
                 else:
                     # Bien, suma puntos. Preguntamos al jugador qué quiere hacer.
-                    jugada, dados_a_tirar = self.jugador.jugar(
-                        puntaje_total, puntaje_turno, dados
+                    jugada, a_tirar = self.jugador.jugar_empaquetado(
+                        puntaje_total, puntaje_turno, tirados
                     )
+                    cant_a_tirar = cantidad(a_tirar)
 
                     if jugada == JUGADA_PLANTARSE:
-                        msg += "P"
+                        if oyente is not None:
+                            oyente.jugada(jugada, desempaquetar(a_tirar))
                         fin_de_turno = True
                         puntaje_turno += puntaje_tirada
-                        if isinstance(self.jugador, ElBatoQueSoloCalculaPromedios):
-                            self.jugador.actualizar_tabla(
-                                len(dados_a_tirar), puntaje_turno
-                            )
-                        elif isinstance(self.jugador, AgenteQLearning):
-                            self.jugador.actualizar_tabla(
-                                len(dados_a_tirar), puntaje_turno
-                            )
-                            # print(
-                            #     "SE PLANTO",
-                            #     dados_a_tirar,
-                            #     puntaje_turno,
-                            #     puntaje_tirada,
-                            # )
+                        if observar is not None:
+                            observar(cant_a_tirar, puntaje_turno, True)
 
                     elif jugada == JUGADA_TIRAR:
-                        dados_a_separar = separar(dados, dados_a_tirar)
-                        assert len(dados_a_separar) + len(dados_a_tirar) == len(dados)
-                        puntaje_tirada, dados_no_usados = puntaje_y_no_usados(
-                            dados_a_separar
-                        )
-                        assert puntaje_tirada > 0 and len(dados_no_usados) == 0
+                        separados = separar_empaquetados(tirados, a_tirar)
+                        puntaje_tirada, no_usados = puntaje_empaquetado(separados)
+                        assert puntaje_tirada > 0 and no_usados == 0
                         puntaje_turno += puntaje_tirada
-                        if isinstance(self.jugador, AgenteQLearning):
-                            self.jugador.actualizar_tabla(
-                                len(dados_a_tirar), puntaje_tirada
-                            )
-                            # print("JUGO", dados_a_tirar, puntaje_turno, puntaje_tirada)
+                        if observar is not None:
+                            observar(cant_a_tirar, puntaje_tirada, False)
                         # Cuando usó todos los dados, vuelve a tirar todo.
-                        if len(dados_a_tirar) == 0:
-                            dados_a_tirar = [1, 2, 3, 4, 5, 6]
-                        msg += "T(" + "".join(map(str, dados_a_tirar)) + ") "
+                        if cant_a_tirar == 0:
+                            cant_a_tirar = 6
+                        if oyente is not None:
+                            oyente.jugada(
+                                jugada,
+                                desempaquetar(a_tirar) if a_tirar else [1, 2, 3, 4, 5, 6],
+                            )
 
             puntaje_total += puntaje_turno
-            msg += (
-                " --> " + str(puntaje_turno) + " puntos. TOTAL: " + str(puntaje_total)
-            )
-            if verbose:
-                print(msg)
+            if oyente is not None:
+                oyente.fin_turno(turno, puntaje_turno, puntaje_total)
         return (turno, puntaje_total)
 
 
-def main():
+def main(
+    perfilar: bool = False,
+    pstats_filename: str | None = None,
+    checkpoint_filename: str | None = None,
+    imagen_filename: str = "Montecarlo.png",
+    resultados_filename: str = "Montecarlo.npz",
+    vectorizado: bool = False,
+    codificador: str = "dados",
+):
+    if vectorizado and (perfilar or pstats_filename is not None or checkpoint_filename is not None):
+        raise ValueError("vectorizado no admite perfilar, pstats ni checkpoint")
+
     # jugador = JugadorAleatorio("random")
     # juego = JuegoDiezMil(jugador)
     # (cantidad_turnos, puntaje_final) = juego.jugar(verbose=True)
@@ -117,45 +126,76 @@ def main():
     # jugador = ElBatoQueSoloCalculaPromedios(0.05)
     # jugador_random = JugadorAleatorio("random")
 
-    play_amounts = []
-    for j in tqdm(range(100)):
-        player_amounts = []
-        jugador = ElBatoQueSoloCalculaPromedios(0.01)
-        # jugador = AgenteQLearning(0.05, 0.99, 0.05, 0.05)
-
-        for i in tqdm(range(500)):
-            juego = JuegoDiezMil(jugador)
-            # juego_aleatorio = JuegoDiezMil(jugador_random)
-            (cantidad_turnos, puntaje_final) = juego.jugar(verbose=False)
-            # (cantidad_turnos_random, puntaje_final_random) = juego_aleatorio.jugar(
-            #     verbose=False
-            # )
-            player_amounts.append(cantidad_turnos)
-            # play_amounts_random.append((i, cantidad_turnos_random))
-            # print(jugador.nombre, cantidad_turnos, puntaje_final)
-        # jugador.print_table()
-        play_amounts.append(player_amounts)
-
-    # Convert play_amounts to a numpy array for easier manipulation
-    play_amounts = np.array(play_amounts)
-
-    # Calculate the average play amount across all agents for each iteration
-    average_play_amounts = np.mean(play_amounts, axis=0)
-
-    # Plot the average play amounts
-    plt.figure(figsize=(10, 6))
-    plt.plot(
-        range(len(average_play_amounts)),
-        average_play_amounts,
-        label="Average Play Amounts",
-    )
-    plt.xlabel("Iteration")
-    plt.ylabel("Average Play Amount")
-    plt.title("Average Play Amounts Across 30 Agents Over 1000 Iterations")
-    plt.legend()
-    plt.show()
-    plt.savefig("Montecarlo.png")
+    # Importados acá porque dependen de este módulo.
+    from experimentos import acumular_replicas
+    from perfilado import Perfilador, ReporteProgreso
+    from reportes import GraficoIncremental, graficar_curva
+
+    # El gráfico y los resultados se actualizan durante la corrida; con
+    # `python reportes.py Montecarlo.npz -s` se pueden seguir desde otro lado.
+    titulo = "Average Play Amounts Across 100 Agents Over 500 Iterations"
+    grafico = GraficoIncremental(imagen_filename, resultados_filename, titulo=titulo)
+
+    # Cada réplica entrena un jugador nuevo durante 500 juegos; las réplicas
+    # corren en paralelo y sólo se guardan estadísticas en línea por
+    # iteración (ver estadisticas.CurvaEnLinea), no cada juego de cada réplica.
+    if vectorizado:
+        # Las 100 réplicas juntas en un solo programa de arreglos: no pasa
+        # por JuegoDiezMil (que es lo que mide Perfilador) ni guarda
+        # checkpoints, y el gráfico se arma al final.
+        from estadisticas import CurvaEnLinea
+        from vectorizado import ReplicasMonteCarlo, entrenar_vectorizado
+
+        estadisticas = CurvaEnLinea(500)
+        for curva in entrenar_vectorizado(ReplicasMonteCarlo(100, 0.01), 500, azar=Azar(0)):
+            estadisticas.agregar_replica(curva)
+    elif perfilar or pstats_filename is not None:
+        # La instrumentación sólo ve el proceso actual.
+        reporte = ReporteProgreso(100 * 500)
+        with Perfilador(pstats_filename, reporte) as perfilador:
+            estadisticas = acumular_replicas(
+                partial(ElBatoQueSoloCalculaPromedios, 0.01, codificador=CODIFICADORES[codificador]),
+                100,
+                500,
+                semilla=0,
+                procesos=1,
+                reporte=reporte,
+                checkpoint_filename=checkpoint_filename,
+                al_combinar=grafico,
+            )
+        print(perfilador.resumen())
+    else:
+        estadisticas = acumular_replicas(
+            partial(ElBatoQueSoloCalculaPromedios, 0.01, codificador=CODIFICADORES[codificador]),
+            100,
+            500,
+            semilla=0,
+            checkpoint_filename=checkpoint_filename,
+            al_combinar=grafico,
+        )
+    # estadisticas = acumular_replicas(
+    #     partial(AgenteQLearning, 0.05, 0.99, 0.05, 0.05), 100, 500, semilla=0
+    # )
+
+    estadisticas.guardar(resultados_filename)
+    graficar_curva(estadisticas, imagen_filename, titulo=titulo)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Entrenar réplicas de un agente de Monte Carlo y graficar su curva de aprendizaje promedio.")
+
+    parser.add_argument('-p', '--perfilar', action='store_true', help='Medir el tiempo de cada fase (corre en un solo proceso)')
+    parser.add_argument('--pstats', type=str, default=None, help='Guardar además un volcado de cProfile en este archivo')
+    parser.add_argument('-c', '--checkpoint', type=str, default=None, help='Guardar el avance (incluidas las réplicas a medio entrenar, en archivos con este nombre como prefijo) y retomar desde él si existe')
+    parser.add_argument('--vectorizado', action='store_true', help='Entrenar todas las réplicas juntas con vectorizado.py (mismas reglas, otros números al azar; el gráfico se arma sólo al final)')
+    parser.add_argument('--codificador', type=str, default='dados', choices=list(CODIFICADORES), help='Estados que distingue el jugador (ver estados.CODIFICADORES; default: dados)')
+    parser.add_argument('-o', '--output', type=str, default='Montecarlo.png', help='Imagen con la curva de aprendizaje (default: Montecarlo.png)')
+    parser.add_argument('-r', '--resultados', type=str, default='Montecarlo.npz', help='Archivo con las estadísticas de la curva, para graficar con reportes.py (default: Montecarlo.npz)')
+
+    args = parser.parse_args()
+    if args.vectorizado and args.codificador != 'dados':
+        parser.error('--vectorizado sólo distingue los dados no usados (--codificador dados)')
+    if args.vectorizado and (args.perfilar or args.pstats is not None or args.checkpoint is not None):
+        parser.error('--vectorizado no se puede combinar con -p/--perfilar, --pstats ni -c/--checkpoint')
+
+    main(args.perfilar, args.pstats, args.checkpoint, args.output, args.resultados, args.vectorizado, args.codificador)
@@ -1,16 +1,32 @@
 import argparse
 from template import AmbienteDiezMil, AgenteQLearning
+from azar import Azar
+from checkpoints import Checkpointer, cargar_checkpoint
 
-def main(episodios, verbose):
-    # Crear una instancia del ambiente
-    ambiente = AmbienteDiezMil()
+def main(episodios, verbose, alpha, gamma, epsilon, csv, semilla, checkpoint, checkpoint_cada, resume):
+    if resume:
+        # Retomar el entrenamiento desde el último checkpoint
+        agente = AgenteQLearning.desde_checkpoint(cargar_checkpoint(checkpoint))
+        print(f"Retomando desde el episodio {agente.episodios_entrenados}")
+    else:
+        # Crear una instancia del ambiente
+        ambiente = AmbienteDiezMil(azar=Azar(semilla))
 
-    # Crear un agente de Q-learning
-    agente = AgenteQLearning(ambiente)
+        # Crear un agente de Q-learning
+        agente = AgenteQLearning(ambiente, alpha, gamma, epsilon)
+
+    checkpointer = Checkpointer(checkpoint, checkpoint_cada) if checkpoint_cada > 0 else None
 
     # Entrenar al agente con un número de episodios
-    agente.entrenar(episodios, verbose=verbose)
-    agente.guardar_politica(f"politica_{episodios}.csv")
+    agente.entrenar(
+        max(episodios - agente.episodios_entrenados, 0),
+        verbose=verbose,
+        checkpointer=checkpointer,
+    )
+    if checkpointer is not None:
+        checkpointer.cerrar()
+    extension = "csv" if csv else "pol"
+    agente.guardar_politica(f"politica_{episodios}.{extension}")
 
 
 if __name__ == '__main__':
@@ -19,10 +35,18 @@ if __name__ == '__main__':
 
     # Agregar argumentos
     parser.add_argument('-e', '--episodios', type=int, default=10000, help='Número de episodios para entrenar al agente (default: 10000)')
+    parser.add_argument('-a', '--alpha', type=float, default=0.1, help='Tasa de aprendizaje (default: 0.1)')
+    parser.add_argument('-g', '--gamma', type=float, default=1.0, help='Factor de descuento (default: 1.0)')
+    parser.add_argument('--epsilon', type=float, default=0.1, help='Probabilidad de explorar (default: 0.1)')
+    parser.add_argument('-s', '--semilla', type=int, default=None, help='Semilla para reproducir el entrenamiento (default: al azar)')
+    parser.add_argument('--csv', action='store_true', help='Guardar la política en CSV en lugar del formato binario')
+    parser.add_argument('-c', '--checkpoint', type=str, default='checkpoint.pkl', help='Archivo de checkpoint (default: checkpoint.pkl)')
+    parser.add_argument('--checkpoint-cada', type=int, default=0, help='Episodios entre checkpoints; 0 para no guardarlos (default: 0)')
+    parser.add_argument('--resume', action='store_true', help='Retomar el entrenamiento desde el checkpoint (ignora los hiperparámetros y la semilla)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Activar modo verbose para ver más detalles durante el entrenamiento')
 
     # Parsear los argumentos
     args = parser.parse_args()
 
     # Llamar a la función principal con los argumentos proporcionados
-    main(args.episodios, args.verbose)
+    main(args.episodios, args.verbose, args.alpha, args.gamma, args.epsilon, args.csv, args.semilla, args.checkpoint, args.checkpoint_cada, args.resume)
@@ -0,0 +1,139 @@
+import os
+from statistics import NormalDist
+import numpy as np
+
+
+class CurvaEnLinea:
+    def __init__(self, cantidad_juegos: int, tope_turnos: int = 1000, ventana: int = 100):
+        """Estadísticas de una curva de aprendizaje (turnos por juego) sobre
+        muchas réplicas, sin guardar cada valor: por iteración lleva la
+        cantidad, la media y la suma de cuadrados de desvíos (Welford), y por
+        ventana de iteraciones un histograma de turnos para los cuantiles.
+        Dos CurvaEnLinea se pueden combinar, por ejemplo las de distintos
+        procesos. La memoria es O(cantidad_juegos), no O(réplicas x juegos).
+
+        Args:
+            cantidad_juegos (int): Juegos (iteraciones) de cada réplica.
+            tope_turnos (int, optional): Máximo de turnos de un juego; acota
+                los histogramas. Defaults to 1000.
+            ventana (int, optional): Iteraciones por ventana para promedios
+                por ventana y cuantiles. Defaults to 100.
+        """
+        self.cantidad_juegos: int = cantidad_juegos
+        self.tope_turnos: int = tope_turnos
+        self.ventana: int = ventana
+        self.cantidades = np.zeros(cantidad_juegos, dtype=np.int64)
+        self.medias = np.zeros(cantidad_juegos)
+        self.m2 = np.zeros(cantidad_juegos)
+        cantidad_ventanas = -(-cantidad_juegos // ventana)
+        self.histogramas = np.zeros((cantidad_ventanas, tope_turnos + 1), dtype=np.int64)
+
+    def agregar_juego(self, indice: int, turnos: int) -> None:
+        """Agrega el resultado del juego número indice de una réplica."""
+        self.cantidades[indice] += 1
+        delta = turnos - self.medias[indice]
+        self.medias[indice] += delta / self.cantidades[indice]
+        self.m2[indice] += delta * (turnos - self.medias[indice])
+        self.histogramas[indice // self.ventana, turnos] += 1
+
+    def agregar_replica(self, curva) -> None:
+        """Agrega la curva completa de una réplica (un valor por iteración)."""
+        curva = np.asarray(curva)
+        self.cantidades += 1
+        delta = curva - self.medias
+        self.medias += delta / self.cantidades
+        self.m2 += delta * (curva - self.medias)
+        ventanas = np.arange(self.cantidad_juegos) // self.ventana
+        np.add.at(self.histogramas, (ventanas, curva), 1)
+
+    def combinar(self, otra: "CurvaEnLinea") -> None:
+        """Suma en esta curva las réplicas de otra (fórmula de Chan et al.)."""
+        cantidades = self.cantidades + otra.cantidades
+        con_datos = cantidades > 0
+        delta = otra.medias - self.medias
+        peso = np.divide(otra.cantidades, cantidades, out=np.zeros(len(cantidades)), where=con_datos)
+        self.medias += delta * peso
+        self.m2 += otra.m2 + delta**2 * self.cantidades * peso
+        self.cantidades = cantidades
+        self.histogramas += otra.histogramas
+
+    def varianzas(self) -> np.ndarray:
+        """Varianza muestral por iteración (nan con menos de 2 réplicas)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.cantidades > 1, self.m2 / (self.cantidades - 1), np.nan)
+
+    def intervalo_confianza(self, nivel: float = 0.95) -> tuple[np.ndarray, np.ndarray]:
+        """Intervalo de confianza normal de la media de cada iteración."""
+        z = NormalDist().inv_cdf((1 + nivel) / 2)
+        error = z * np.sqrt(self.varianzas() / np.maximum(self.cantidades, 1))
+        return (self.medias - error, self.medias + error)
+
+    def medias_por_ventana(self) -> np.ndarray:
+        """Promedio de turnos en cada ventana de iteraciones."""
+        turnos = np.arange(self.tope_turnos + 1)
+        totales = self.histogramas.sum(axis=1)
+        return (self.histogramas @ turnos) / np.maximum(totales, 1)
+
+    def cuantiles(self, probabilidades: list[float]) -> np.ndarray:
+        """Cuantiles de turnos de cada ventana, como matriz de
+        (ventanas x probabilidades).
+        """
+        acumulados = np.cumsum(self.histogramas, axis=1)
+        totales = acumulados[:, -1:]
+        objetivos = np.asarray(probabilidades) * np.maximum(totales, 1)
+        # Primer valor de turnos cuya frecuencia acumulada alcanza cada objetivo.
+        return np.stack(
+            [(acumulados < objetivos[:, [j]]).sum(axis=1) for j in range(len(probabilidades))],
+            axis=1,
+        )
+
+    def submuestrear(self, puntos: int = 1000, nivel: float = 0.95) -> dict[str, np.ndarray]:
+        """Curva reducida a lo sumo a `puntos` puntos para graficar,
+        promediando iteraciones consecutivas. Devuelve las iteraciones (el
+        centro de cada grupo), la media y los bordes del intervalo.
+        """
+        (bajo, alto) = self.intervalo_confianza(nivel)
+        tamano = max(1, -(-self.cantidad_juegos // puntos))
+        grupos = np.arange(self.cantidad_juegos) // tamano
+        por_grupo = np.bincount(grupos)
+
+        def reducir(valores):
+            return np.bincount(grupos, weights=valores) / por_grupo
+
+        return {
+            "iteraciones": reducir(np.arange(self.cantidad_juegos, dtype=float)),
+            "medias": reducir(self.medias),
+            "bajo": reducir(bajo),
+            "alto": reducir(alto),
+        }
+
+    def guardar(self, filename: str) -> None:
+        """Guarda las estadísticas en un .npz (ver cargar). Escribe primero a
+        un temporal y lo renombra, para que quien lea el archivo durante una
+        corrida nunca vea uno a medio escribir.
+        """
+        temporal = filename + ".tmp"
+        with open(temporal, "wb") as archivo:
+            np.savez(
+                archivo,
+                cantidad_juegos=self.cantidad_juegos,
+                tope_turnos=self.tope_turnos,
+                ventana=self.ventana,
+                cantidades=self.cantidades,
+                medias=self.medias,
+                m2=self.m2,
+                histogramas=self.histogramas,
+            )
+        os.replace(temporal, filename)
+
+    @classmethod
+    def cargar(cls, filename: str) -> "CurvaEnLinea":
+        with np.load(filename) as datos:
+            curva = cls(
+                int(datos["cantidad_juegos"]), int(datos["tope_turnos"]), int(datos["ventana"])
+            )
+            curva.cantidades = datos["cantidades"]
+            curva.medias = datos["medias"]
+            curva.m2 = datos["m2"]
+            curva.histogramas = datos["histogramas"]
+        return curva
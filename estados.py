@@ -0,0 +1,85 @@
+from bisect import bisect_right
+from politicas import PUNTAJE_OBJETIVO
+
+
+class CodificadorEstado:
+    def __init__(
+        self,
+        cortes_turno: list[int] = (),
+        cortes_total: list[int] = (),
+        alcanza_para_ganar: bool = False,
+    ):
+        """Convierte el estado de una decisión (dados no usados, puntaje del
+        turno y puntaje total) en un índice entero denso, para indexar las
+        tablas de los jugadores que aprenden. Los puntajes se agrupan en
+        niveles según puntos de corte: con cortes_turno=[300, 500] hay tres
+        niveles de puntaje del turno, < 300, de 300 a 499 y >= 500. Sin cortes
+        el índice es la cantidad de dados no usados (0 a 6), como antes.
+
+        La cantidad de estados es 7 x niveles de turno x niveles de total
+        (x 2 con alcanza_para_ganar), así que las tablas crecen con la
+        cantidad de cortes y no con el rango de los puntajes.
+
+        Args:
+            cortes_turno (list[int], optional): Puntos de corte del puntaje
+                del turno (incluyendo la tirada actual). Defaults to ().
+            cortes_total (list[int], optional): Puntos de corte del puntaje
+                total. Defaults to ().
+            alcanza_para_ganar (bool, optional): Agrega si el total más el
+                turno ya llega a PUNTAJE_OBJETIVO. Defaults to False.
+        """
+        self.cortes_turno: list[int] = sorted(cortes_turno)
+        self.cortes_total: list[int] = sorted(cortes_total)
+        self.alcanza_para_ganar: bool = alcanza_para_ganar
+        self.niveles_turno: int = len(self.cortes_turno) + 1
+        self.niveles_total: int = len(self.cortes_total) + 1
+        self.cant_estados: int = (
+            7 * self.niveles_turno * self.niveles_total * (2 if alcanza_para_ganar else 1)
+        )
+
+    def indice(self, cant_dados: int, puntaje_turno: int, puntaje_total: int) -> int:
+        indice: int = cant_dados
+        if self.cortes_turno:
+            indice = indice * self.niveles_turno + bisect_right(self.cortes_turno, puntaje_turno)
+        if self.cortes_total:
+            indice = indice * self.niveles_total + bisect_right(self.cortes_total, puntaje_total)
+        if self.alcanza_para_ganar:
+            indice = 2 * indice + (puntaje_total + puntaje_turno >= PUNTAJE_OBJETIVO)
+        return indice
+
+    def describir(self, indice: int) -> str:
+        """Texto del estado de un índice, para mostrar tablas."""
+        partes: list[str] = []
+        if self.alcanza_para_ganar:
+            (indice, alcanza) = divmod(indice, 2)
+            partes.append("alcanza" if alcanza else "no alcanza")
+        if self.cortes_total:
+            (indice, nivel) = divmod(indice, self.niveles_total)
+            partes.append("total " + _rango(self.cortes_total, nivel))
+        if self.cortes_turno:
+            (indice, nivel) = divmod(indice, self.niveles_turno)
+            partes.append("turno " + _rango(self.cortes_turno, nivel))
+        partes.append(f"{indice} dados")
+        return ", ".join(reversed(partes))
+
+
+def _rango(cortes: list[int], nivel: int) -> str:
+    ''' Rango de puntajes del nivel dado según los cortes. '''
+    if nivel == 0:
+        return f"< {cortes[0]}"
+    if nivel == len(cortes):
+        return f">= {cortes[-1]}"
+    return f"{cortes[nivel - 1]}-{cortes[nivel] - 1}"
+
+
+# Codificadores con nombre, para elegir con --codificador en diezmil.py,
+# evaluacion.py y barrido.py.
+CODIFICADORES: dict[str, CodificadorEstado] = {
+    "dados": CodificadorEstado(),
+    "riesgo": CodificadorEstado(cortes_turno=[300, 400, 500, 750, 1000]),
+    "completo": CodificadorEstado(
+        cortes_turno=[300, 400, 500, 750, 1000],
+        cortes_total=[5000, 8000, 9000],
+        alcanza_para_ganar=True,
+    ),
+}
@@ -0,0 +1,338 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist
+from typing import Callable
+import numpy as np
+from azar import Azar
+from dados import empaquetar
+from diezmil import JuegoDiezMil
+from estados import CODIFICADORES
+from eventos import Oyente
+from jugador import (
+    Jugador,
+    JugadorAleatorio,
+    JugadorSiempreSePlanta,
+    ElBatoQueSoloCalculaPromedios,
+    AgenteQLearning,
+)
+from simulador import DadosComunes, SimuladorDiezMil
+
+CUANTILES: list[float] = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def _jugar_lote(
+    politicas: list[np.ndarray], clave: int, cantidad_juegos: int, tope_turnos: int
+) -> list[np.ndarray]:
+    """Juega un lote con cada política, todas con los mismos dados."""
+    return [
+        SimuladorDiezMil(politica).jugar(
+            cantidad_juegos, tope_turnos, dados_comunes=DadosComunes(clave)
+        )[0]
+        for politica in politicas
+    ]
+
+
+def _intervalo(valores: np.ndarray, z: float) -> tuple[float, float, float]:
+    """Media y bordes del intervalo de confianza normal de la media."""
+    media = float(valores.mean())
+    error = z * float(valores.std(ddof=1)) / np.sqrt(len(valores)) if len(valores) > 1 else np.inf
+    return (media, media - error, media + error)
+
+
+def evaluar_politicas(
+    politicas: dict[str, np.ndarray],
+    semilla: int = 0,
+    juegos_por_lote: int = 1000,
+    max_juegos: int = 100000,
+    precision: float = 0.05,
+    nivel: float = 0.95,
+    tope_turnos: int = 1000,
+    procesos: int = 1,
+) -> dict:
+    """Evalúa una o más políticas jugando lotes de juegos con SimuladorDiezMil.
+    El lote i usa siempre los mismos dados (DadosComunes con la i-ésima clave
+    derivada de semilla), así que los resultados son reproducibles y, con
+    varias políticas, cada una juega con los mismos dados que las demás: las
+    diferencias entre cada par se estiman con muchos menos juegos que
+    comparando evaluaciones independientes.
+
+    Se detiene antes de max_juegos cuando la mitad del intervalo de confianza
+    es menor o igual a precision turnos: el de la media con una sola política,
+    o el de la diferencia de cada par con varias.
+
+    Args:
+        politicas (dict[str, np.ndarray]): Políticas por nombre (ver politicas.py).
+        semilla (int, optional): Semilla del conjunto de lotes. Defaults to 0.
+        juegos_por_lote (int, optional): Juegos por lote. Defaults to 1000.
+        max_juegos (int, optional): Máximo de juegos por política. Defaults to 100000.
+        precision (float, optional): Mitad del intervalo buscada, en turnos.
+            Defaults to 0.05.
+        nivel (float, optional): Nivel de confianza. Defaults to 0.95.
+        tope_turnos (int, optional): Tope de turnos de cada juego. Defaults to 1000.
+        procesos (int, optional): Procesos que juegan lotes en paralelo. El
+            resultado no depende de este valor. Defaults to 1.
+
+    Returns:
+        dict: "juegos" jugados por política, "resultados" con la media, el
+        intervalo, el desvío, los cuantiles (CUANTILES) y el máximo de turnos
+        de cada una, y "diferencias" con, para cada par (a, b) (b antes que a
+        en politicas), la media e intervalo de (turnos de a - turnos de b) y
+        la fracción de juegos en que a necesitó menos, igual o más turnos.
+    """
+    nombres = list(politicas)
+    z = NormalDist().inv_cdf((1 + nivel) / 2)
+    cantidad_lotes = -(-max_juegos // juegos_por_lote)
+    claves = [
+        int(hija.generate_state(1, np.uint64)[0])
+        for hija in np.random.SeedSequence(semilla).spawn(cantidad_lotes)
+    ]
+    turnos: list[list[np.ndarray]] = [[] for _ in nombres]
+
+    def suficiente() -> bool:
+        juntos = [np.concatenate(t) for t in turnos]
+        if len(juntos) == 1:
+            comparar = [juntos[0]]
+        else:
+            comparar = [
+                segundo - primero
+                for (i, primero) in enumerate(juntos)
+                for segundo in juntos[i + 1:]
+            ]
+        for valores in comparar:
+            (_, bajo, alto) = _intervalo(valores, z)
+            if (alto - bajo) / 2 > precision:
+                return False
+        return True
+
+    # Los lotes se juegan en rondas de `procesos`, pero se suman y se revisa
+    # el criterio de parada de a uno, en orden.
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    mapear = pool.map if pool is not None else map
+    try:
+        for inicio in range(0, cantidad_lotes, procesos):
+            ronda = claves[inicio:inicio + procesos]
+            lotes = mapear(
+                _jugar_lote,
+                [list(politicas.values())] * len(ronda),
+                ronda,
+                [juegos_por_lote] * len(ronda),
+                [tope_turnos] * len(ronda),
+            )
+            terminar = False
+            for lote in lotes:
+                for acumulados, resultado in zip(turnos, lote):
+                    acumulados.append(resultado)
+                if suficiente():
+                    terminar = True
+                    break
+            if terminar:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return _resumir(dict(zip(nombres, (np.concatenate(t) for t in turnos))), z)
+
+
+def _resumir(turnos: dict[str, np.ndarray], z: float) -> dict:
+    """Arma el resultado de una evaluación a partir de los turnos de cada
+    participante en los mismos juegos (ver evaluar_politicas).
+    """
+    nombres = list(turnos)
+    resultado: dict = {"juegos": len(turnos[nombres[0]]), "resultados": {}, "diferencias": {}}
+    for nombre, valores in turnos.items():
+        (media, bajo, alto) = _intervalo(valores, z)
+        resultado["resultados"][nombre] = {
+            "media": media,
+            "intervalo": (bajo, alto),
+            "desvio": float(valores.std(ddof=1)),
+            "cuantiles": dict(zip(CUANTILES, np.quantile(valores, CUANTILES).tolist())),
+            "maximo": int(valores.max()),
+        }
+    for (i, primero) in enumerate(nombres):
+        for segundo in nombres[i + 1:]:
+            diferencias = turnos[segundo] - turnos[primero]
+            (media, bajo, alto) = _intervalo(diferencias, z)
+            resultado["diferencias"][(segundo, primero)] = {
+                "media": media,
+                "intervalo": (bajo, alto),
+                "menos": float(np.mean(diferencias < 0)),
+                "igual": float(np.mean(diferencias == 0)),
+                "mas": float(np.mean(diferencias > 0)),
+            }
+    return resultado
+
+
+class TiradasComunes(Oyente):
+    # Turnos y tiradas por turno que se generan de entrada para cada juego.
+    TURNOS: int = 64
+    TIRADAS: int = 8
+
+    def __init__(self, semilla: int, juego: int):
+        """Dados de un juego de JuegoDiezMil que no dependen del jugador: la
+        tirada r del turno t usa los primeros n dados de la fila (t, r) de
+        una tabla generada de entrada, así que un jugador que tira menos dados
+        o se planta antes no corre los dados de los turnos siguientes. Se usa
+        a la vez como azar (sólo tiene los métodos de dados) y como oyente del juego, para
+        saber cuándo empieza cada turno. Un jugador puede recibir los dados en
+        otro orden que en la tabla (JuegoDiezMil los maneja empaquetados).
+
+        Args:
+            semilla (int): Semilla de la evaluación.
+            juego (int): Número de juego; cada uno tiene su propia tabla.
+        """
+        self._semilla: int = semilla
+        self._juego: int = juego
+        # Queda como arreglo: pasar toda la tabla a listas cuesta más que
+        # pasar sólo las tiradas que se usan.
+        self._tabla: np.ndarray = np.random.default_rng(
+            np.random.SeedSequence(semilla, spawn_key=(0, juego))
+        ).integers(1, 7, size=(self.TURNOS, self.TIRADAS, 6))
+        # Tiradas de más de las que entran en la tabla, por turno.
+        self._extra: dict[int, tuple[np.random.Generator, list]] = {}
+        self._turno: int = 0
+        self._tirada: int = 0
+
+    def inicio_turno(self, turno: int) -> None:
+        self._turno = turno - 1
+        self._tirada = 0
+
+    def dados(self, cantidad: int) -> list[int]:
+        (turno, tirada) = (self._turno, self._tirada)
+        self._tirada += 1
+        if turno < self.TURNOS and tirada < self.TIRADAS:
+            return self._tabla[turno, tirada, :cantidad].tolist()
+        # Fuera de la tabla (raro): cada turno tiene su propio generador, que
+        # se consume siempre en el mismo orden.
+        if turno not in self._extra:
+            semilla_turno = np.random.SeedSequence(self._semilla, spawn_key=(2, self._juego, turno))
+            self._extra[turno] = (np.random.default_rng(semilla_turno), [])
+        (generador, filas) = self._extra[turno]
+        while len(filas) <= tirada:
+            filas.append(generador.integers(1, 7, size=6).tolist())
+        return filas[tirada][:cantidad]
+
+    def dados_empaquetados(self, cantidad: int) -> int:
+        return empaquetar(self.dados(cantidad))
+
+
+def _jugar_jugador(
+    fabrica_jugador: Callable[..., Jugador],
+    cantidad_juegos: int,
+    semilla: int,
+    tope_turnos: int,
+) -> np.ndarray:
+    """Crea un jugador y le hace jugar los juegos de la evaluación en orden."""
+    jugador = fabrica_jugador(azar=Azar(np.random.SeedSequence(semilla, spawn_key=(1,))))
+    turnos = np.zeros(cantidad_juegos, dtype=np.int64)
+    for juego in range(cantidad_juegos):
+        tiradas = TiradasComunes(semilla, juego)
+        (turnos[juego], _) = JuegoDiezMil(jugador, tiradas).jugar(
+            tope_turnos=tope_turnos, oyente=tiradas
+        )
+    return turnos
+
+
+def evaluar_jugadores(
+    fabricas: dict[str, Callable[..., Jugador]],
+    cantidad_juegos: int,
+    semilla: int = 0,
+    nivel: float = 0.95,
+    tope_turnos: int = 1000,
+    procesos: int = 1,
+) -> dict:
+    """Compara implementaciones de Jugador con números aleatorios comunes:
+    todos juegan los mismos cantidad_juegos juegos, con los mismos dados en
+    cada turno y tirada (ver TiradasComunes), así que las diferencias por
+    juego tienen mucha menos varianza que comparando corridas independientes.
+    Los jugadores que aprenden lo hacen durante los juegos, como en
+    experimentos.entrenar_replica; su azar propio (para explorar) también
+    sale de semilla y es el mismo para todos.
+
+    Args:
+        fabricas (dict[str, Callable[..., Jugador]]): Fábricas de jugadores
+            por nombre; reciben el argumento azar.
+        cantidad_juegos (int): Juegos de cada jugador.
+        semilla (int, optional): Semilla de los dados. Defaults to 0.
+        nivel (float, optional): Nivel de confianza. Defaults to 0.95.
+        tope_turnos (int, optional): Tope de turnos de cada juego. Defaults to 1000.
+        procesos (int, optional): Procesos; cada jugador corre en uno.
+            Defaults to 1.
+
+    Returns:
+        dict: Como evaluar_politicas, con un resultado por jugador y la
+        diferencia de cada par.
+    """
+    argumentos = (
+        list(fabricas.values()),
+        [cantidad_juegos] * len(fabricas),
+        [semilla] * len(fabricas),
+        [tope_turnos] * len(fabricas),
+    )
+    if procesos == 1:
+        turnos = list(map(_jugar_jugador, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            turnos = list(pool.map(_jugar_jugador, *argumentos))
+    return _resumir(dict(zip(fabricas, turnos)), NormalDist().inv_cdf((1 + nivel) / 2))
+
+
+def imprimir_evaluacion(resultado: dict, nivel: float = 0.95) -> None:
+    """Imprime lo que devuelven evaluar_politicas y evaluar_jugadores, de
+    menor a mayor media de turnos.
+    """
+    print(f"Juegos: {resultado['juegos']}")
+    print(
+        f"{'nombre':30} {'media':>8} {f'IC {nivel:.0%}':>19} {'desvío':>7} "
+        + " ".join(f"{f'q{int(q * 100)}':>5}" for q in CUANTILES)
+        + f" {'máx':>5}"
+    )
+    for nombre, datos in sorted(resultado["resultados"].items(), key=lambda item: item[1]["media"]):
+        (bajo, alto) = datos["intervalo"]
+        print(
+            f"{nombre:30} {datos['media']:8.3f} [{bajo:8.3f}, {alto:8.3f}] "
+            f"{datos['desvio']:7.2f} "
+            + " ".join(f"{c:5.0f}" for c in datos["cuantiles"].values())
+            + f" {datos['maximo']:5d}"
+        )
+    if resultado["diferencias"]:
+        print("\nDiferencias de turnos con los mismos dados (a - b):")
+        print(f"{'a':30} {'b':30} {'media':>8} {f'IC {nivel:.0%}':>19} {'menos':>6} {'igual':>6} {'más':>6}")
+        for (a, b), datos in resultado["diferencias"].items():
+            (bajo, alto) = datos["intervalo"]
+            marca = "" if bajo <= 0 <= alto else " *"
+            print(
+                f"{a:30} {b:30} {datos['media']:+8.3f} [{bajo:+8.3f}, {alto:+8.3f}] "
+                f"{datos['menos']:6.1%} {datos['igual']:6.1%} {datos['mas']:6.1%}{marca}"
+            )
+        print(f"* diferencia significativa al {nivel:.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Comparar los jugadores de jugador.py en los mismos juegos de 'Diez Mil' (mismos dados para todos).")
+
+    parser.add_argument('-n', '--juegos', type=int, default=2000, help='Juegos de cada jugador (default: 2000)')
+    parser.add_argument('-s', '--semilla', type=int, default=0, help='Semilla de los dados (default: 0)')
+    parser.add_argument('-p', '--procesos', type=int, default=1, help='Procesos; cada jugador corre en uno (default: 1)')
+    parser.add_argument('--codificador', type=str, default='dados', choices=list(CODIFICADORES), help='Estados que distinguen los jugadores que aprenden (default: dados)')
+
+    args = parser.parse_args()
+    codificador = CODIFICADORES[args.codificador]
+
+    resultado = evaluar_jugadores(
+        {
+            "JugadorAleatorio": partial(JugadorAleatorio, "random"),
+            "JugadorSiempreSePlanta": partial(JugadorSiempreSePlanta, "plantón"),
+            "ElBatoQueSoloCalculaPromedios": partial(
+                ElBatoQueSoloCalculaPromedios, 0.01, codificador=codificador
+            ),
+            "AgenteQLearning": partial(
+                AgenteQLearning, 0.05, 0.99, 0.05, 0.9999, codificador=codificador
+            ),
+        },
+        args.juegos,
+        semilla=args.semilla,
+        procesos=args.procesos,
+    )
+    imprimir_evaluacion(resultado)
@@ -0,0 +1,151 @@
+import struct
+from array import array
+from utils import JUGADA_PLANTARSE, JUGADA_TIRAR
+
+
+class Oyente:
+    """Recibe los eventos de un juego de JuegoDiezMil.jugar. Cada tipo de
+    evento es un método; por defecto no hacen nada, así que alcanza con
+    redefinir los que interesen.
+    """
+
+    def inicio_turno(self, turno: int) -> None:
+        pass
+
+    def tirada(self, dados: list[int], puntaje: int) -> None:
+        """Los dados que salieron y su puntaje (0 si se pierde el turno)."""
+        pass
+
+    def jugada(self, jugada: int, dados_a_tirar: list[int]) -> None:
+        """La jugada elegida y los dados que se van a tirar a continuación."""
+        pass
+
+    def fin_turno(self, turno: int, puntaje_turno: int, puntaje_total: int) -> None:
+        pass
+
+
+class OyenteTexto(Oyente):
+    def __init__(self, salida=print):
+        """Arma el texto de cada turno (el mismo que imprime verbose) y lo
+        pasa a salida al terminar el turno.
+        """
+        self.salida = salida
+        self._msg: str = ""
+
+    def inicio_turno(self, turno: int) -> None:
+        self._msg = "turno " + str(turno) + ":"
+
+    def tirada(self, dados: list[int], puntaje: int) -> None:
+        self._msg += " " + "".join(map(str, dados)) + " "
+
+    def jugada(self, jugada: int, dados_a_tirar: list[int]) -> None:
+        if jugada == JUGADA_PLANTARSE:
+            self._msg += "P"
+        elif jugada == JUGADA_TIRAR:
+            self._msg += "T(" + "".join(map(str, dados_a_tirar)) + ") "
+
+    def fin_turno(self, turno: int, puntaje_turno: int, puntaje_total: int) -> None:
+        self._msg += (
+            " --> " + str(puntaje_turno) + " puntos. TOTAL: " + str(puntaje_total)
+        )
+        self.salida(self._msg)
+
+
+# Códigos de evento de TrazaBinaria. Cada evento ocupa 3 enteros:
+# (código, dato_1, dato_2).
+EVENTO_INICIO_TURNO: int = 0  # (turno, 0)
+EVENTO_TIRADA: int = 1  # (dados en orden, puntaje)
+EVENTO_JUGADA: int = 2  # (jugada, dados a tirar en orden)
+EVENTO_FIN_TURNO: int = 3  # (puntaje del turno, puntaje total)
+
+
+# Archivo de TrazaBinaria: encabezado (MAGIA_TRAZA, VERSION_TRAZA) y los
+# eventos, de a 3 enteros de 32 bits con signo, little-endian en cualquier
+# plataforma.
+MAGIA_TRAZA: bytes = b"DMTR"
+VERSION_TRAZA: int = 1
+_ENCABEZADO_TRAZA = struct.Struct("<4sI")
+_EVENTO_TRAZA = struct.Struct("<3i")
+
+
+def _empaquetar_en_orden(dados: list[int]) -> int:
+    ''' Guarda hasta 6 dados en un entero, de a 3 bits por posición, para
+        reproducirlos en el mismo orden. No es el formato de dados.empaquetar
+        (3 bits por cara, sin orden), que es el que usa el juego.
+        Ejemplo: _empaquetar_en_orden([2, 5]) --> 2 + 5 * 8 = 42
+    '''
+    empaquetado: int = 0
+    for i, dado in enumerate(dados):
+        empaquetado |= dado << (3 * i)
+    return empaquetado
+
+
+def _desempaquetar_en_orden(empaquetado: int) -> list[int]:
+    ''' Inversa de _empaquetar_en_orden (los dados valen de 1 a 6, nunca 0).
+        Ejemplo: _desempaquetar_en_orden(42) --> [2, 5]
+    '''
+    dados: list[int] = []
+    while empaquetado:
+        dados.append(empaquetado & 7)
+        empaquetado >>= 3
+    return dados
+
+
+class TrazaBinaria(Oyente):
+    def __init__(self):
+        """Graba los eventos en un buffer compacto de enteros (array('i')),
+        que se puede guardar, cargar y reproducir sobre otro Oyente. En disco
+        los enteros van con tamaño y orden de bytes fijos (ver MAGIA_TRAZA).
+        """
+        self.eventos: array = array("i")
+
+    def inicio_turno(self, turno: int) -> None:
+        self.eventos.extend((EVENTO_INICIO_TURNO, turno, 0))
+
+    def tirada(self, dados: list[int], puntaje: int) -> None:
+        self.eventos.extend((EVENTO_TIRADA, _empaquetar_en_orden(dados), puntaje))
+
+    def jugada(self, jugada: int, dados_a_tirar: list[int]) -> None:
+        self.eventos.extend((EVENTO_JUGADA, jugada, _empaquetar_en_orden(dados_a_tirar)))
+
+    def fin_turno(self, turno: int, puntaje_turno: int, puntaje_total: int) -> None:
+        self.eventos.extend((EVENTO_FIN_TURNO, puntaje_turno, puntaje_total))
+
+    def reproducir(self, oyente: Oyente) -> None:
+        """Envía a oyente los eventos grabados, en el mismo orden."""
+        turno: int = 0
+        for i in range(0, len(self.eventos), 3):
+            (codigo, dato_1, dato_2) = self.eventos[i:i + 3]
+            if codigo == EVENTO_INICIO_TURNO:
+                turno = dato_1
+                oyente.inicio_turno(turno)
+            elif codigo == EVENTO_TIRADA:
+                oyente.tirada(_desempaquetar_en_orden(dato_1), dato_2)
+            elif codigo == EVENTO_JUGADA:
+                oyente.jugada(dato_1, _desempaquetar_en_orden(dato_2))
+            elif codigo == EVENTO_FIN_TURNO:
+                oyente.fin_turno(turno, dato_1, dato_2)
+
+    def guardar(self, filename: str) -> None:
+        """Guarda los eventos con el formato de MAGIA_TRAZA y VERSION_TRAZA."""
+        with open(filename, "wb") as archivo:
+            archivo.write(_ENCABEZADO_TRAZA.pack(MAGIA_TRAZA, VERSION_TRAZA))
+            archivo.write(struct.pack(f"<{len(self.eventos)}i", *self.eventos))
+
+    @classmethod
+    def cargar(cls, filename: str) -> "TrazaBinaria":
+        """Lee una traza escrita por guardar."""
+        with open(filename, "rb") as archivo:
+            datos = archivo.read()
+        encabezado = datos[:_ENCABEZADO_TRAZA.size]
+        cuerpo = datos[_ENCABEZADO_TRAZA.size:]
+        if (
+            len(encabezado) < _ENCABEZADO_TRAZA.size
+            or _ENCABEZADO_TRAZA.unpack(encabezado) != (MAGIA_TRAZA, VERSION_TRAZA)
+            or len(cuerpo) % _EVENTO_TRAZA.size != 0
+        ):
+            raise ValueError(f"{filename} no es una traza de la versión {VERSION_TRAZA}")
+        traza = cls()
+        for evento in _EVENTO_TRAZA.iter_unpack(cuerpo):
+            traza.eventos.extend(evento)
+        return traza
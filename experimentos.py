@@ -0,0 +1,303 @@
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+import numpy as np
+from azar import Azar
+from checkpoints import Checkpointer, RegistroCheckpoint, cargar_checkpoint
+from diezmil import JuegoDiezMil
+from estadisticas import CurvaEnLinea
+from jugador import Jugador
+from perfilado import ReporteProgreso
+
+
+def entrenar_replica(
+    fabrica_jugador: Callable[..., Jugador],
+    cantidad_juegos: int,
+    semilla: np.random.SeedSequence,
+    en_curso: str | None = None,
+    juegos_por_checkpoint: int = 100,
+) -> list[int]:
+    """Crea un jugador nuevo y le hace jugar cantidad_juegos juegos seguidos,
+    con un Azar propio de la réplica para el jugador y los dados. Devuelve la
+    cantidad de turnos de cada juego (su curva de aprendizaje).
+
+    Si se da en_curso, cada juegos_por_checkpoint juegos guarda ahí el jugador
+    (sus tablas, contadores y epsilon), el Azar y la curva hasta ese momento,
+    y si el archivo ya existe sigue desde ahí: el resultado es el mismo que
+    sin interrupciones.
+    """
+    if en_curso is not None and os.path.exists(en_curso):
+        datos = cargar_checkpoint(en_curso)
+        (jugador, azar, curva) = (datos["jugador"], datos["azar"], datos["curva"])
+    else:
+        azar = Azar(semilla)
+        (jugador, curva) = (fabrica_jugador(azar=azar), [])
+    if en_curso is None:
+        return curva + jugar_juegos(jugador, azar, cantidad_juegos - len(curva))
+    checkpointer = Checkpointer(en_curso, cada=juegos_por_checkpoint)
+    while len(curva) < cantidad_juegos:
+        cantidad = min(checkpointer.cada, cantidad_juegos - len(curva))
+        curva += jugar_juegos(jugador, azar, cantidad)
+        # Una sola deepcopy para que el jugador y los dados sigan
+        # compartiendo el mismo Azar al recargar.
+        checkpointer.guardar(
+            copy.deepcopy({"jugador": jugador, "azar": azar, "curva": curva})
+        )
+    checkpointer.cerrar()
+    return curva
+
+
+def _archivo_en_curso(checkpoint_filename: str | None, indice: int | str) -> str | None:
+    if checkpoint_filename is None:
+        return None
+    return f"{checkpoint_filename}.{indice}"
+
+
+def _borrar(filename: str | None) -> None:
+    if filename is not None and os.path.exists(filename):
+        os.remove(filename)
+
+
+def jugar_juegos(jugador: Jugador, azar: Azar, cantidad_juegos: int) -> list[int]:
+    """Hace jugar a jugador cantidad_juegos juegos seguidos con los dados de
+    azar y devuelve la cantidad de turnos de cada uno. Llamarla dos veces
+    seguidas con el mismo jugador y azar da lo mismo que una sola vez con la
+    suma de los juegos.
+    """
+    cantidades_turnos: list[int] = []
+    for _ in range(cantidad_juegos):
+        (cantidad_turnos, _) = JuegoDiezMil(jugador, azar).jugar(verbose=False)
+        cantidades_turnos.append(cantidad_turnos)
+    return cantidades_turnos
+
+
+def correr_replicas(
+    fabrica_jugador: Callable[..., Jugador],
+    cantidad_replicas: int,
+    cantidad_juegos: int,
+    semilla: int = 0,
+    procesos: int | None = None,
+    reporte: ReporteProgreso | None = None,
+    checkpoint_filename: str | None = None,
+    juegos_por_checkpoint: int = 100,
+) -> np.ndarray:
+    """Entrena cantidad_replicas jugadores independientes, repartidos en un
+    pool de procesos, y devuelve un arreglo de (réplicas x juegos) con la
+    cantidad de turnos de cada juego.
+
+    Args:
+        fabrica_jugador (Callable[..., Jugador]): Crea un jugador nuevo; recibe
+            el Azar de la réplica en el argumento azar. Tiene que poder
+            serializarse con pickle (por ejemplo una clase o un
+            functools.partial).
+        cantidad_replicas (int): Cantidad de jugadores a entrenar.
+        cantidad_juegos (int): Juegos que juega cada jugador.
+        semilla (int, optional): Semilla maestra. Cada réplica usa la
+            SeedSequence hija de su índice, así que con la misma semilla el
+            resultado es idéntico para cualquier cantidad de procesos.
+        procesos (int | None, optional): Procesos a usar. None usa todos los
+            núcleos; 1 corre todo en el proceso actual.
+        reporte (ReporteProgreso | None, optional): Dónde informar el avance
+            al terminar cada réplica. Defaults to None (uno nuevo).
+        checkpoint_filename (str | None, optional): Si se da, agrega ahí la
+            curva de cada réplica al terminarla y, si ya existe, sólo corre las
+            que faltan. Las réplicas a medio entrenar se guardan aparte, en
+            checkpoint_filename seguido de "." y su índice (ver
+            entrenar_replica), y siguen desde donde quedaron. El resultado es
+            el mismo que sin interrupciones. Defaults to None.
+        juegos_por_checkpoint (int, optional): Cada cuántos juegos guardar las
+            réplicas a medio entrenar. Defaults to 100.
+
+    Returns:
+        np.ndarray: Cantidad de turnos por réplica y juego.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(cantidad_replicas)
+    parametros = {
+        "semilla": semilla,
+        "cantidad_replicas": cantidad_replicas,
+        "cantidad_juegos": cantidad_juegos,
+    }
+    # curvas[i] es la curva de la réplica i, a medida que terminan.
+    curvas: dict[int, list[int]] = {}
+    registro: RegistroCheckpoint | None = None
+    if checkpoint_filename is not None:
+        registro = RegistroCheckpoint(checkpoint_filename, parametros)
+        curvas = dict(registro.entradas)
+    pendientes = [i for i in range(cantidad_replicas) if i not in curvas]
+    en_curso = [_archivo_en_curso(checkpoint_filename, i) for i in pendientes]
+    argumentos = (
+        [fabrica_jugador] * len(pendientes),
+        [cantidad_juegos] * len(pendientes),
+        [semillas[i] for i in pendientes],
+        en_curso,
+        [juegos_por_checkpoint] * len(pendientes),
+    )
+    if reporte is None:
+        reporte = ReporteProgreso(cantidad_replicas * cantidad_juegos)
+    reporte.avanzar(juegos=len(curvas) * cantidad_juegos)
+
+    def registrar(indice: int, curva: list[int]) -> None:
+        curvas[indice] = curva
+        reporte.avanzar(juegos=cantidad_juegos)
+        if registro is not None:
+            registro.agregar((indice, curva))
+            _borrar(_archivo_en_curso(checkpoint_filename, indice))
+
+    if procesos == 1:
+        for indice, curva in zip(pendientes, map(entrenar_replica, *argumentos)):
+            registrar(indice, curva)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            for indice, curva in zip(pendientes, pool.map(entrenar_replica, *argumentos)):
+                registrar(indice, curva)
+    if registro is not None:
+        registro.cerrar()
+    reporte.reportar()
+    return np.array([curvas[i] for i in range(cantidad_replicas)])
+
+
+def _acumular_bloque(
+    fabrica_jugador: Callable[..., Jugador],
+    cantidad_juegos: int,
+    semillas: list[np.random.SeedSequence],
+    ventana: int,
+    en_curso: str | None = None,
+    juegos_por_checkpoint: int = 100,
+) -> CurvaEnLinea:
+    """Entrena las réplicas de un bloque y devuelve sólo sus estadísticas. Si
+    se da en_curso, guarda ahí las estadísticas de las réplicas terminadas y
+    la réplica a medio entrenar en en_curso seguido de "." y su índice en el
+    bloque, y sigue desde ahí si ya existen.
+    """
+    curva_en_linea = CurvaEnLinea(cantidad_juegos, ventana=ventana)
+    hechas: int = 0
+    if en_curso is not None and os.path.exists(en_curso):
+        datos = cargar_checkpoint(en_curso)
+        (curva_en_linea, hechas) = (datos["estadisticas"], datos["hechas"])
+    for indice in range(hechas, len(semillas)):
+        curva_en_linea.agregar_replica(
+            entrenar_replica(
+                fabrica_jugador,
+                cantidad_juegos,
+                semillas[indice],
+                _archivo_en_curso(en_curso, indice),
+                juegos_por_checkpoint,
+            )
+        )
+        if en_curso is not None:
+            checkpointer = Checkpointer(en_curso)
+            checkpointer.guardar(
+                {"estadisticas": copy.deepcopy(curva_en_linea), "hechas": indice + 1}
+            )
+            checkpointer.cerrar()
+            _borrar(_archivo_en_curso(en_curso, indice))
+    return curva_en_linea
+
+
+def acumular_replicas(
+    fabrica_jugador: Callable[..., Jugador],
+    cantidad_replicas: int,
+    cantidad_juegos: int,
+    semilla: int = 0,
+    procesos: int | None = None,
+    reporte: ReporteProgreso | None = None,
+    checkpoint_filename: str | None = None,
+    replicas_por_bloque: int = 10,
+    ventana: int = 100,
+    al_combinar: Callable[[CurvaEnLinea], None] | None = None,
+    juegos_por_checkpoint: int = 100,
+) -> CurvaEnLinea:
+    """Como correr_replicas, pero en lugar de devolver el arreglo de
+    (réplicas x juegos) devuelve estadísticas en línea (ver CurvaEnLinea).
+    Cada proceso entrena bloques de replicas_por_bloque réplicas y devuelve
+    sus estadísticas, que se combinan en orden a medida que terminan, así que
+    la memoria no crece con la cantidad de réplicas y el resultado es
+    idéntico para cualquier cantidad de procesos.
+
+    Args:
+        replicas_por_bloque (int, optional): Réplicas por tarea. Defaults to 10.
+        ventana (int, optional): Iteraciones por ventana de CurvaEnLinea.
+            Defaults to 100.
+        al_combinar (Callable[[CurvaEnLinea], None] | None, optional): Se
+            llama con las estadísticas acumuladas cada vez que se suma un
+            bloque, por ejemplo un reportes.GraficoIncremental. Defaults to None.
+        El resto como en correr_replicas; el checkpoint guarda sólo las
+        estadísticas combinadas y cuántos bloques ya se sumaron, y cada bloque
+        en curso guarda su avance en checkpoint_filename seguido de
+        ".bloque" y su índice.
+
+    Returns:
+        CurvaEnLinea: Estadísticas de la curva de aprendizaje.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(cantidad_replicas)
+    bloques = [
+        semillas[i:i + replicas_por_bloque]
+        for i in range(0, cantidad_replicas, replicas_por_bloque)
+    ]
+    parametros = {
+        "semilla": semilla,
+        "cantidad_replicas": cantidad_replicas,
+        "cantidad_juegos": cantidad_juegos,
+        "replicas_por_bloque": replicas_por_bloque,
+        "ventana": ventana,
+    }
+    total = CurvaEnLinea(cantidad_juegos, ventana=ventana)
+    bloques_hechos: int = 0
+    checkpointer: Checkpointer | None = None
+    if checkpoint_filename is not None:
+        if os.path.exists(checkpoint_filename):
+            datos = cargar_checkpoint(checkpoint_filename)
+            if datos["parametros"] != parametros:
+                raise ValueError(
+                    f"{checkpoint_filename} es de otro experimento: {datos['parametros']}"
+                )
+            (total, bloques_hechos) = (datos["estadisticas"], datos["bloques_hechos"])
+        checkpointer = Checkpointer(checkpoint_filename, cada=1)
+    pendientes = bloques[bloques_hechos:]
+    en_curso = [
+        _archivo_en_curso(checkpoint_filename, f"bloque{b}")
+        for b in range(bloques_hechos, len(bloques))
+    ]
+    argumentos = (
+        [fabrica_jugador] * len(pendientes),
+        [cantidad_juegos] * len(pendientes),
+        pendientes,
+        [ventana] * len(pendientes),
+        en_curso,
+        [juegos_por_checkpoint] * len(pendientes),
+    )
+    if reporte is None:
+        reporte = ReporteProgreso(cantidad_replicas * cantidad_juegos)
+    reporte.avanzar(juegos=sum(map(len, bloques[:bloques_hechos])) * cantidad_juegos)
+
+    def registrar(bloque: CurvaEnLinea, cantidad: int) -> None:
+        nonlocal bloques_hechos
+        total.combinar(bloque)
+        bloques_hechos += 1
+        reporte.avanzar(juegos=cantidad * cantidad_juegos)
+        if al_combinar is not None:
+            al_combinar(total)
+        if checkpointer is not None:
+            checkpointer.guardar(
+                {
+                    "parametros": parametros,
+                    "estadisticas": copy.deepcopy(total),
+                    "bloques_hechos": bloques_hechos,
+                }
+            )
+            _borrar(_archivo_en_curso(checkpoint_filename, f"bloque{bloques_hechos - 1}"))
+
+    if procesos == 1:
+        for semillas_bloque, bloque in zip(pendientes, map(_acumular_bloque, *argumentos)):
+            registrar(bloque, len(semillas_bloque))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            for semillas_bloque, bloque in zip(
+                pendientes, pool.map(_acumular_bloque, *argumentos)
+            ):
+                registrar(bloque, len(semillas_bloque))
+    if checkpointer is not None:
+        checkpointer.cerrar()
+    reporte.reportar()
+    return total
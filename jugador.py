@@ -1,6 +1,9 @@
-from random import randint, uniform
-import random
 from abc import ABC, abstractmethod
+import numpy as np
+from azar import Azar, azar_por_defecto
+from estados import CodificadorEstado
+from dados import cantidad, desempaquetar, empaquetar
+from dados import puntaje_y_no_usados as puntaje_empaquetado
 from utils import puntaje_y_no_usados, JUGADA_PLANTARSE, JUGADA_TIRAR
 
 
@@ -15,10 +18,34 @@ class Jugador(ABC):
     ) -> tuple[int, list[int]]:
         pass
 
+    def jugar_empaquetado(
+        self, puntaje_total: int, puntaje_turno: int, dados: int
+    ) -> tuple[int, int]:
+        """Como jugar, con los dados empaquetados (ver dados.py); es lo que
+        llama JuegoDiezMil. Por defecto pasa los dados a lista y llama a
+        jugar, así que alcanza con implementar jugar; los jugadores pueden
+        redefinirla para no armar listas.
+        """
+        (jugada, dados_a_tirar) = self.jugar(puntaje_total, puntaje_turno, desempaquetar(dados))
+        return (jugada, empaquetar(dados_a_tirar))
+
+    def observar(self, estado: int, recompensa: int, fin_turno: bool) -> None:
+        """Recibe el resultado de la última jugada: los dados que quedaron para
+        tirar, la recompensa (el puntaje del turno si terminó, o el de la
+        tirada si sigue) y si terminó el turno. Por defecto no hace nada; los
+        jugadores que aprenden la redefinen.
+        """
+        pass
+
+    def aprende(self) -> bool:
+        """Indica si el jugador redefine observar. Si no, JuegoDiezMil no la llama."""
+        return type(self).observar is not Jugador.observar
+
 
 class JugadorAleatorio(Jugador):
-    def __init__(self, nombre: str):
+    def __init__(self, nombre: str, azar: Azar | None = None):
         self.nombre = nombre
+        self.azar = azar if azar is not None else azar_por_defecto()
 
     def jugar(
         self,
@@ -28,15 +55,24 @@ class JugadorAleatorio(Jugador):
         verbose: bool = False,
     ) -> tuple[int, list[int]]:
         (puntaje, no_usados) = puntaje_y_no_usados(dados)
-        if randint(0, 1) == 0:
+        if self.azar.uniforme() < 0.5:
             return (JUGADA_PLANTARSE, [])
         else:
             return (JUGADA_TIRAR, no_usados)
 
+    def jugar_empaquetado(
+        self, puntaje_total: int, puntaje_turno: int, dados: int
+    ) -> tuple[int, int]:
+        if self.azar.uniforme() < 0.5:
+            return (JUGADA_PLANTARSE, 0)
+        else:
+            return (JUGADA_TIRAR, puntaje_empaquetado(dados)[1])
+
 
 class JugadorSiempreSePlanta(Jugador):
-    def __init__(self, nombre: str):
+    def __init__(self, nombre: str, azar: Azar | None = None):
         self.nombre = nombre
+        self.azar = azar if azar is not None else azar_por_defecto()
 
     def jugar(
         self,
@@ -47,197 +83,255 @@ class JugadorSiempreSePlanta(Jugador):
     ) -> tuple[int, list[int]]:
         return (JUGADA_PLANTARSE, [])
 
+    def jugar_empaquetado(
+        self, puntaje_total: int, puntaje_turno: int, dados: int
+    ) -> tuple[int, int]:
+        return (JUGADA_PLANTARSE, 0)
+
 
 class ElBatoQueSoloCalculaPromedios(Jugador):
-    def __init__(self, epsilon: float):
+    def __init__(
+        self,
+        epsilon: float,
+        azar: Azar | None = None,
+        codificador: CodificadorEstado | None = None,
+        primera_visita: bool = False,
+        alpha: float | None = None,
+    ):
+        """Monte Carlo: el valor de cada (estado, jugada) es el promedio de
+        los puntajes de los turnos en que se eligió. Las jugadas del turno en
+        curso se cuentan en contadores de tamaño fijo por estado y jugada, y
+        al terminar el turno se actualizan sólo los (estado, jugada) que
+        aparecieron; memoria y tiempo por turno no dependen de lo largo del
+        turno.
+
+        Args:
+            epsilon (float): Probabilidad de jugar al azar (e-greedy).
+            azar (Azar | None, optional): Fuente de números al azar.
+                Defaults to azar_por_defecto().
+            codificador (CodificadorEstado | None, optional): Codificación de
+                los estados. Defaults to sólo la cantidad de dados no usados.
+            primera_visita (bool, optional): Si un (estado, jugada) aparece
+                varias veces en un turno, cuenta una sola (first-visit) en
+                vez de una por vez (every-visit). Defaults to False.
+            alpha (float | None, optional): Paso constante: cada visita mueve
+                el valor una fracción alpha hacia el puntaje del turno, en vez
+                de promediar todos los turnos por igual, para seguir a los
+                valores cuando cambian. Defaults to None (promedio).
+        """
         self.nombre = "Monte Carlo"
         self.epsilon = epsilon  # e-greedy
-        self.history = []
-        self.estados = {
-            0: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-            1: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-            2: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-            3: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-            4: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-            5: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-            6: {"tirar": 0, "plantarse": 0, "c_tirar": 1, "c_plantarse": 1},
-        }
+        self.azar = azar if azar is not None else azar_por_defecto()
+        # Por defecto el estado es sólo la cantidad de dados no usados.
+        self.codificador = codificador if codificador is not None else CodificadorEstado()
+        self.primera_visita = primera_visita
+        self.alpha = alpha
+        # Suma de retornos y cantidad de visitas por estado (índice del
+        # codificador) y jugada (JUGADA_PLANTARSE / JUGADA_TIRAR), y el valor
+        # estimado con el que se decide.
+        self.retornos = np.zeros((self.codificador.cant_estados, 2))
+        self.cuentas = np.ones((self.codificador.cant_estados, 2))
+        self.valores = np.zeros((self.codificador.cant_estados, 2))
+        # Visitas del turno en curso, por estado * 2 + jugada, y cuáles se
+        # tocaron (a lo sumo una vez cada una) para no recorrer toda la tabla.
+        self._visitas: list[int] = [0] * (2 * self.codificador.cant_estados)
+        self._tocados: list[int] = []
 
     def print_table(self):
-        for state, rewards in self.estados.items():
-            reward_plantarse = rewards["plantarse"]
-            reward_tirar = rewards["tirar"]
-            avg_reward_plantarse = reward_plantarse / rewards["c_plantarse"]
-            avg_reward_tirar = reward_tirar / rewards["c_tirar"]
-            ct = rewards["c_tirar"]
-            cp = rewards["c_plantarse"]
-
-            print(f"State {state}:")
+        for state in range(len(self.valores)):
+            ct = self.cuentas[state, JUGADA_TIRAR]
+            cp = self.cuentas[state, JUGADA_PLANTARSE]
+
+            print(f"State {state} ({self.codificador.describir(state)}):")
             print(f"  Cantidad plantarse: {cp:.2f}")
             print(f"  Cantidad tirar: {ct:.2f}")
-            print(f"  Promedio reward_plantarse: {avg_reward_plantarse:.2f}")
-            print(f"  Promedio reward_tirar: {avg_reward_tirar:.2f}")
+            print(f"  Promedio reward_plantarse: {self.valores[state, JUGADA_PLANTARSE]:.2f}")
+            print(f"  Promedio reward_tirar: {self.valores[state, JUGADA_TIRAR]:.2f}")
 
     def jugar(self, puntaje_total: int, puntaje_turno: int, dados: list[int]):
         (puntaje, no_usados) = puntaje_y_no_usados(dados)
-        cant_dados = len(no_usados)
-
-        if uniform(0, 1) < self.epsilon:
-            if uniform(0, 1) > 0.5:
-                self.history.append((cant_dados, "plantarse"))
-                return (JUGADA_PLANTARSE, [])
-            else:
-                self.history.append((cant_dados, "tirar"))
-                return (JUGADA_TIRAR, no_usados)
+        if self._decidir(puntaje_total, puntaje_turno + puntaje, len(no_usados)) == JUGADA_TIRAR:
+            return (JUGADA_TIRAR, no_usados)
         else:
-            if (
-                self.estados[cant_dados]["tirar"] / self.estados[cant_dados]["c_tirar"]
-                > self.estados[cant_dados]["plantarse"]
-                / self.estados[cant_dados]["c_plantarse"]
-            ):
-                self.history.append((cant_dados, "tirar"))
-                return (JUGADA_TIRAR, no_usados)
-            elif (
-                self.estados[cant_dados]["tirar"] / self.estados[cant_dados]["c_tirar"]
-                < self.estados[cant_dados]["plantarse"]
-                / self.estados[cant_dados]["c_plantarse"]
-            ):
-                self.history.append((cant_dados, "plantarse"))
-                return (JUGADA_PLANTARSE, [])
-            else:
-                if uniform(0, 1) > 0.5:
-                    return (JUGADA_TIRAR, no_usados)
-                else:
-                    return (JUGADA_PLANTARSE, [])
-
-    def actualizar_tabla(self, estado, puntaje_turno):
-        for estado, accion in self.history:
-            self.estados[estado][accion] += puntaje_turno
-            self.estados[estado]["c_" + accion] += 1
-        self.history.clear()
-
-
-class AgenteQLearning(Jugador):
-    def __init__(self, alpha: float, gamma: float, epsilon: float):
-        self.nombre = "Q-Learning"
-        self.alpha = alpha
-        self.gamma = gamma
-        self.epsilon = epsilon
-        # initialize the values at random
-        # self.q_table = {
-        #     0: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        #     1: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        #     2: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        #     3: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        #     4: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        #     5: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        #     6: {"tirar": randint(0, 10), "plantarse": randint(0, 10)},
-        # }
-
-        self.q_table = {
-            0: {"tirar": 0, "plantarse": 0},
-            1: {"tirar": 0, "plantarse": 0},
-            2: {"tirar": 0, "plantarse": 0},
-            3: {"tirar": 0, "plantarse": 0},
-            4: {"tirar": 0, "plantarse": 0},
-            5: {"tirar": 0, "plantarse": 0},
-            6: {"tirar": 0, "plantarse": 0},
-        }
-        self.last_state = None
-        self.last_action = None
-
-    def print_table(self):
-        for state, rewards in self.q_table.items():
-            reward_plantarse = rewards["plantarse"]
-            reward_tirar = rewards["tirar"]
+            return (JUGADA_PLANTARSE, [])
 
-            print(f"State {state}:")
-            print(f"  Reward plantarse: {reward_plantarse:.2f}")
-            print(f"  Reward tirar: {reward_tirar:.2f}")
+    def jugar_empaquetado(self, puntaje_total: int, puntaje_turno: int, dados: int):
+        (puntaje, no_usados) = puntaje_empaquetado(dados)
+        if self._decidir(puntaje_total, puntaje_turno + puntaje, cantidad(no_usados)) == JUGADA_TIRAR:
+            return (JUGADA_TIRAR, no_usados)
+        else:
+            return (JUGADA_PLANTARSE, 0)
 
-    def jugar(self, puntaje_total: int, puntaje_turno: int, dados: list[int]):
-        (puntaje, no_usados) = puntaje_y_no_usados(dados)
-        cant_dados = len(no_usados)
-        self.last_state = cant_dados
+    def _decidir(self, puntaje_total: int, puntaje_turno: int, cant_dados: int) -> int:
+        estado = self.codificador.indice(cant_dados, puntaje_turno, puntaje_total)
 
-        if uniform(0, 1) < self.epsilon:
-            if uniform(0, 1) > 0.5:
-                self.last_action = "plantarse"
-                return (JUGADA_PLANTARSE, [])
+        if self.azar.uniforme() < self.epsilon:
+            if self.azar.uniforme() > 0.5:
+                jugada = JUGADA_PLANTARSE
             else:
-                self.last_action = "tirar"
-                return (JUGADA_TIRAR, no_usados)
+                jugada = JUGADA_TIRAR
         else:
-            if (
-                self.q_table[cant_dados]["tirar"]
-                > self.q_table[cant_dados]["plantarse"]
-            ):
-                self.last_action = "tirar"
-                return (JUGADA_TIRAR, no_usados)
+            # item() lee escalares sin crear arreglos intermedios.
+            valor_tirar = self.valores.item(estado, JUGADA_TIRAR)
+            valor_plantarse = self.valores.item(estado, JUGADA_PLANTARSE)
+            if valor_tirar > valor_plantarse:
+                jugada = JUGADA_TIRAR
+            elif valor_tirar < valor_plantarse:
+                jugada = JUGADA_PLANTARSE
+            elif self.azar.uniforme() > 0.5:
+                jugada = JUGADA_TIRAR
             else:
-                self.last_action = "plantarse"
-                return (JUGADA_PLANTARSE, [])
+                jugada = JUGADA_PLANTARSE
 
-    def actualizar_tabla(self, estado, puntaje_tirada):
-        if self.last_state is not None and self.last_action is not None:
-            q_value = self.q_table[self.last_state][self.last_action]
-            max_q_value = max(self.q_table[estado].values())
-            self.q_table[self.last_state][self.last_action] = q_value + self.alpha * (
-                puntaje_tirada + self.gamma * max_q_value - q_value
-            )
-        self.last_state = None
-        self.last_action = None
+        # Los desempates también se registran: si no, los estados con
+        # valores iguales nunca salen del empate.
+        clave = 2 * estado + jugada
+        if self._visitas[clave] == 0:
+            self._tocados.append(clave)
+        self._visitas[clave] += 1
+        return jugada
+
+    def observar(self, estado: int, recompensa: int, fin_turno: bool) -> None:
+        # Sólo aprende del puntaje final de cada turno.
+        if fin_turno:
+            self.actualizar_tabla(estado, recompensa)
+
+    def actualizar_tabla(self, estado, puntaje_turno):
+        for clave in self._tocados:
+            (estado, accion) = divmod(clave, 2)
+            visitas = 1 if self.primera_visita else self._visitas[clave]
+            self._visitas[clave] = 0
+            retornos = self.retornos.item(estado, accion) + visitas * puntaje_turno
+            cuentas = self.cuentas.item(estado, accion) + visitas
+            self.retornos[estado, accion] = retornos
+            self.cuentas[estado, accion] = cuentas
+            if self.alpha is None:
+                self.valores[estado, accion] = retornos / cuentas
+            else:
+                # visitas pasos de tamaño alpha hacia el mismo puntaje.
+                valor = self.valores.item(estado, accion)
+                self.valores[estado, accion] = puntaje_turno + (1 - self.alpha) ** visitas * (
+                    valor - puntaje_turno
+                )
+        self._tocados.clear()
 
 
 class AgenteQLearning(Jugador):
     def __init__(
-        self, alpha: float, gamma: float, epsilon: float, epsilon_decay: float
+        self,
+        alpha: float,
+        gamma: float,
+        epsilon: float,
+        epsilon_decay: float,
+        azar: Azar | None = None,
+        codificador: CodificadorEstado | None = None,
     ):
         self.nombre = "Q-Learning"
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         self.epsilon_decay = epsilon_decay
+        self.azar = azar if azar is not None else azar_por_defecto()
+        # Por defecto el estado es sólo la cantidad de dados no usados.
+        self.codificador = codificador if codificador is not None else CodificadorEstado()
 
-        # Initialize Q-table to zero or equal values to avoid biasing towards any action
-        self.q_table = {i: {"tirar": 0, "plantarse": 0} for i in range(7)}
+        # Initialize Q-table to zero or equal values to avoid biasing towards any action.
+        # Indexed by state (índice del codificador) and action (JUGADA_PLANTARSE / JUGADA_TIRAR).
+        self.q_table = np.zeros((self.codificador.cant_estados, 2))
 
         self.last_state = None
         self.last_action = None
+        # Puntaje total de la última decisión, para codificar el estado siguiente.
+        self.last_total = 0
+        # Estado y recompensa de la última vez que tiró: su estado siguiente
+        # es el de la próxima decisión, o el comienzo del turno siguiente si
+        # la tirada no suma, y recién se sabe cuál después de tirar.
+        self._tirada_pendiente: tuple[int, int] | None = None
+
+    def print_table(self):
+        for state in range(len(self.q_table)):
+            reward_plantarse = self.q_table[state, JUGADA_PLANTARSE]
+            reward_tirar = self.q_table[state, JUGADA_TIRAR]
+
+            print(f"State {state} ({self.codificador.describir(state)}):")
+            print(f"  Reward plantarse: {reward_plantarse:.2f}")
+            print(f"  Reward tirar: {reward_tirar:.2f}")
 
     def jugar(self, puntaje_total: int, puntaje_turno: int, dados: list[int]):
         (puntaje, no_usados) = puntaje_y_no_usados(dados)
-        cant_dados = len(no_usados)
-        self.last_state = cant_dados
+        if self._decidir(puntaje_total, puntaje_turno + puntaje, len(no_usados)) == JUGADA_TIRAR:
+            return JUGADA_TIRAR, no_usados
+        else:
+            return JUGADA_PLANTARSE, []
 
-        # Epsilon-greedy action selection
-        if uniform(0, 1) < self.epsilon:
-            action = random.choice(["plantarse", "tirar"])
+    def jugar_empaquetado(self, puntaje_total: int, puntaje_turno: int, dados: int):
+        (puntaje, no_usados) = puntaje_empaquetado(dados)
+        if self._decidir(puntaje_total, puntaje_turno + puntaje, cantidad(no_usados)) == JUGADA_TIRAR:
+            return JUGADA_TIRAR, no_usados
         else:
+            return JUGADA_PLANTARSE, 0
+
+    def _decidir(self, puntaje_total: int, puntaje_turno: int, cant_dados: int) -> int:
+        self.last_total = puntaje_total
+        estado = self.codificador.indice(cant_dados, puntaje_turno, puntaje_total)
+        if self._tirada_pendiente is not None:
+            # La tirada anterior sumó: su estado siguiente es este.
+            (anterior, recompensa) = self._tirada_pendiente
+            self._tirada_pendiente = None
+            self._registrar(anterior, JUGADA_TIRAR, recompensa, estado)
+        self.last_state = estado
+
+        # Epsilon-greedy action selection (ties go to JUGADA_PLANTARSE)
+        if self.azar.uniforme() < self.epsilon:
+            action = JUGADA_PLANTARSE if self.azar.uniforme() < 0.5 else JUGADA_TIRAR
+        else:
+            # argmax over the two actions; item() avoids building a row array.
             action = (
-                "tirar"
-                if self.q_table[cant_dados]["tirar"]
-                > self.q_table[cant_dados]["plantarse"]
-                else "plantarse"
+                JUGADA_TIRAR
+                if self.q_table.item(estado, JUGADA_TIRAR)
+                > self.q_table.item(estado, JUGADA_PLANTARSE)
+                else JUGADA_PLANTARSE
             )
 
         self.last_action = action
-
-        if action == "tirar":
-            return JUGADA_TIRAR, no_usados
-        else:
-            return JUGADA_PLANTARSE, []
+        return action
+
+    def observar(self, estado: int, recompensa: int, fin_turno: bool) -> None:
+        # Si terminó el turno, el estado siguiente es el comienzo del turno
+        # siguiente: se tiran los 6 dados (0 dados no usados), sin puntos de
+        # turno y con el total nuevo. Si tiró, queda pendiente hasta ver la
+        # tirada.
+        if not fin_turno:
+            self._tirada_pendiente = (self.last_state, recompensa)
+            self.actualizar_tabla(None, recompensa)
+            return
+        siguiente = self.codificador.indice(0, 0, self.last_total + recompensa)
+        if self.last_state is None and self._tirada_pendiente is not None:
+            # Perdió el turno: la tirada pendiente termina acá, sin puntos.
+            (self.last_state, recompensa_tirada) = self._tirada_pendiente
+            self.last_action = JUGADA_TIRAR
+            self._tirada_pendiente = None
+            recompensa += recompensa_tirada
+        self.actualizar_tabla(siguiente, recompensa)
 
     def actualizar_tabla(self, estado, puntaje_tirada):
-        if self.last_state is not None and self.last_action is not None:
-            q_value = self.q_table[self.last_state][self.last_action]
-            max_q_value = max(self.q_table[estado].values())
-            self.q_table[self.last_state][self.last_action] = q_value + self.alpha * (
-                puntaje_tirada + self.gamma * max_q_value - q_value
-            )
+        # Con estado None la transición queda pendiente (ver observar).
+        if estado is not None and self.last_state is not None and self.last_action is not None:
+            self._registrar(self.last_state, self.last_action, puntaje_tirada, estado)
 
         # Decay epsilon
         self.epsilon *= self.epsilon_decay
 
         self.last_state = None
         self.last_action = None
+
+    def _registrar(self, estado: int, jugada: int, recompensa: int, siguiente: int) -> None:
+        """Actualiza la tabla con la transición."""
+        q_value = self.q_table.item(estado, jugada)
+        max_q_value = max(
+            self.q_table.item(siguiente, JUGADA_PLANTARSE),
+            self.q_table.item(siguiente, JUGADA_TIRAR),
+        )
+        self.q_table[estado, jugada] = q_value + self.alpha * (
+            recompensa + self.gamma * max_q_value - q_value
+        )
@@ -11,15 +11,43 @@ def main(politica_filename, verbose):
     print(f"Puntaje final: {puntaje_final}")
 
 
+def evaluar(politica_filenames, semilla, max_juegos, lote, precision, procesos):
+    # Importados acá: el modo de una sola partida no los necesita.
+    from evaluacion import evaluar_politicas, imprimir_evaluacion
+    from politicas import leer_politica
+
+    politicas = {filename: leer_politica(filename) for filename in politica_filenames}
+    resultado = evaluar_politicas(
+        politicas,
+        semilla=semilla,
+        juegos_por_lote=lote,
+        max_juegos=max_juegos,
+        precision=precision,
+        procesos=procesos,
+    )
+    imprimir_evaluacion(resultado)
+
+
 if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Jugar una partida de 'Diez Mil' con un agente entrenado usando una política predefinida.")
+    parser = argparse.ArgumentParser(description="Jugar una partida de 'Diez Mil' con un agente entrenado usando una política predefinida, o evaluar una o más políticas en muchas partidas.")
 
     # Agregar argumentos
-    parser.add_argument('-f', '--politica_filename', type=str, help='Archivo con la política entrenada')
+    parser.add_argument('-f', '--politica_filename', type=str, nargs='+', required=True, help='Archivo con la política entrenada (con --evaluar, uno o más para compararlos)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Activar modo verbose para ver más detalles durante el juego')
+    parser.add_argument('--evaluar', action='store_true', help='Evaluar las políticas en muchas partidas con los mismos dados, en lugar de jugar una')
+    parser.add_argument('-s', '--semilla', type=int, default=0, help='Semilla del conjunto de partidas de la evaluación (default: 0)')
+    parser.add_argument('-n', '--max-juegos', type=int, default=100000, help='Máximo de partidas por política en la evaluación (default: 100000)')
+    parser.add_argument('-l', '--lote', type=int, default=1000, help='Partidas por lote en la evaluación (default: 1000)')
+    parser.add_argument('--precision', type=float, default=0.05, help='Cortar la evaluación cuando el intervalo del 95%% tenga esta mitad, en turnos (default: 0.05)')
+    parser.add_argument('-p', '--procesos', type=int, default=1, help='Procesos para la evaluación (default: 1)')
 
     # Parsear los argumentos
     args = parser.parse_args()
+    if not args.evaluar and len(args.politica_filename) > 1:
+        parser.error('para jugar una partida se usa una sola política; para comparar varias, agregar --evaluar')
 
     # Llamar a la función principal con los argumentos proporcionados
-    main(args.politica_filename, args.verbose)
+    if args.evaluar:
+        evaluar(args.politica_filename, args.semilla, args.max_juegos, args.lote, args.precision, args.procesos)
+    else:
+        main(args.politica_filename[0], args.verbose)
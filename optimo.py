@@ -0,0 +1,138 @@
+import argparse
+from functools import lru_cache
+import numpy as np
+from utils import JUGADA_PLANTARSE, JUGADA_TIRAR
+from politicas import PUNTAJE_OBJETIVO, PASO_PUNTAJE, guardar_politica
+from transiciones import modelo
+
+# Cantidad de niveles de puntaje (de a PASO_PUNTAJE) entre 0 y 10000 inclusive.
+NIVELES_PUNTAJE: int = PUNTAJE_OBJETIVO // PASO_PUNTAJE + 1
+
+
+@lru_cache(maxsize=None)
+def _transiciones() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    ''' Transiciones de todos los estados de decisión al elegir tirar, en
+        arreglos planos ordenados por cant_dados (0 a 6). Devuelve el índice
+        de inicio de cada cant_dados, el nivel de puntaje ganado, los dados no
+        usados y la probabilidad de cada resultado con puntaje, y por último
+        la probabilidad de perder el turno para cada cant_dados.
+    '''
+    inicios, ganancias, no_usados, probabilidades = [], [], [], []
+    prob_perder = np.zeros(7)
+    for cant_dados in range(7):
+        # Con 0 dados no usados se vuelven a tirar los 6 (el modelo ya lo tiene en cuenta).
+        (puntajes, cants, probs) = modelo().distribucion(cant_dados)
+        inicios.append(sum(len(g) for g in ganancias))
+        suma = puntajes > 0
+        ganancias.append(puntajes[suma] // PASO_PUNTAJE)
+        no_usados.append(cants[suma])
+        probabilidades.append(probs[suma])
+        prob_perder[cant_dados] = probs[~suma].sum()
+    return (
+        np.array(inicios),
+        np.concatenate(ganancias),
+        np.concatenate(no_usados),
+        np.concatenate(probabilidades),
+        prob_perder,
+    )
+
+
+def _valores_tirar(valores: np.ndarray, nivel: int) -> np.ndarray:
+    ''' Dada la tabla de valores (..., 7, NIVELES_PUNTAJE), ya calculada para
+        los niveles mayores a nivel, devuelve el valor esperado de tirar desde
+        cada estado (..., cant_dados) con puntaje de turno nivel, sin contar
+        los resultados que pierden el turno.
+    '''
+    (inicios, ganancias, no_usados, probabilidades, _) = _transiciones()
+    destinos = np.minimum(nivel + ganancias, NIVELES_PUNTAJE - 1)
+    esperados = valores[..., no_usados, destinos] * probabilidades
+    return np.add.reduceat(esperados, inicios, axis=-1)
+
+
+def resolver_turno() -> tuple[np.ndarray, np.ndarray]:
+    """Calcula la política que maximiza el puntaje esperado de un turno, con
+    el puntaje del turno acotado en 10000. Como cada tirada que suma puntos
+    sube el puntaje del turno, alcanza con una pasada de mayor a menor nivel.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: La política (7 x NIVELES_PUNTAJE) y el
+            puntaje esperado de cada estado de decisión.
+    """
+    valores = np.zeros((7, NIVELES_PUNTAJE))
+    politica = np.zeros((7, NIVELES_PUNTAJE), dtype=np.int8)
+    for nivel in reversed(range(NIVELES_PUNTAJE)):
+        plantarse = nivel * PASO_PUNTAJE
+        if nivel == NIVELES_PUNTAJE - 1:
+            valores[:, nivel] = plantarse
+            continue
+        # Perder el turno vale 0, así que no suma nada.
+        tirar = _valores_tirar(valores, nivel)
+        politica[:, nivel] = np.where(tirar > plantarse, JUGADA_TIRAR, JUGADA_PLANTARSE)
+        valores[:, nivel] = np.maximum(tirar, plantarse)
+    return (politica, valores)
+
+
+def resolver_juego(
+    tolerancia: float = 1e-9, max_iteraciones: int = 10000
+) -> tuple[np.ndarray, np.ndarray]:
+    """Calcula la política que minimiza la cantidad esperada de turnos para
+    llegar a 10000, teniendo en cuenta el puntaje total. Itera valores sobre
+    los turnos esperados desde cada puntaje total hasta que cambian menos que
+    tolerancia.
+
+    Args:
+        tolerancia (float, optional): Cambio máximo para cortar. Defaults to 1e-9.
+        max_iteraciones (int, optional): Tope de iteraciones. Defaults to 10000.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: La política
+            (NIVELES_PUNTAJE - 1 x 7 x NIVELES_PUNTAJE) y los turnos esperados
+            para terminar desde el comienzo de un turno con cada puntaje total.
+    """
+    (_, _, _, _, prob_perder) = _transiciones()
+    niveles_total = NIVELES_PUNTAJE - 1  # Totales de 0 a 9950.
+    # turnos_restantes[t]: turnos esperados desde el comienzo de un turno con
+    # total t; vale 0 a partir de 10000.
+    turnos_restantes = np.zeros(niveles_total + NIVELES_PUNTAJE)
+    # plantarse[t, s]: turnos restantes al plantarse con total t y turno s.
+    filas = np.arange(niveles_total)[:, None] + np.arange(NIVELES_PUNTAJE)
+    valores = np.zeros((niveles_total, 7, NIVELES_PUNTAJE))
+    politica = np.zeros((niveles_total, 7, NIVELES_PUNTAJE), dtype=np.int8)
+
+    for _ in range(max_iteraciones):
+        plantarse = turnos_restantes[filas]
+        perder = turnos_restantes[:niveles_total, None] * prob_perder
+        for nivel in reversed(range(NIVELES_PUNTAJE)):
+            tirar = _valores_tirar(valores, nivel) + perder
+            politica[:, :, nivel] = np.where(
+                tirar < plantarse[:, nivel, None], JUGADA_TIRAR, JUGADA_PLANTARSE
+            )
+            valores[:, :, nivel] = np.minimum(tirar, plantarse[:, nivel, None])
+        # Un turno empieza tirando los 6 dados, como el estado (0 dados, 0 puntos).
+        nuevos = 1 + _valores_tirar(valores, 0)[:, 0] + perder[:, 0]
+        cambio = np.abs(nuevos - turnos_restantes[:niveles_total]).max()
+        turnos_restantes[:niveles_total] = nuevos
+        if cambio < tolerancia:
+            break
+    return (politica, turnos_restantes[:niveles_total])
+
+
+def main(filename, total):
+    if total:
+        (politica, turnos_restantes) = resolver_juego()
+        print(f"Turnos esperados para llegar a 10000: {turnos_restantes[0]:.4f}")
+    else:
+        (politica, valores) = resolver_turno()
+        print(f"Puntaje esperado por turno: {valores[0, 0]:.2f}")
+    guardar_politica(politica, filename)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calcular la política óptima de 'Diez Mil' por programación dinámica.")
+
+    parser.add_argument('-o', '--output', type=str, default='politica_optima.pol', help='Archivo donde guardar la política, en CSV si termina en .csv (default: politica_optima.pol)')
+    parser.add_argument('-t', '--total', action='store_true', help='Tener en cuenta el puntaje total y minimizar los turnos para llegar a 10000')
+
+    args = parser.parse_args()
+
+    main(args.output, args.total)
@@ -0,0 +1,204 @@
+import cProfile
+import sys
+import time
+from functools import wraps
+from azar import Azar
+from diezmil import JuegoDiezMil
+from jugador import Jugador
+import dados
+import utils
+
+
+class ReporteProgreso:
+    def __init__(self, total_juegos: int | None = None, cada: float = 5.0, salida=print):
+        """Informa cada `cada` segundos cuántos juegos y pasos (decisiones de
+        un jugador) se hicieron y a qué velocidad. Reemplaza a las barras de
+        tqdm anidadas.
+
+        Args:
+            total_juegos (int | None, optional): Juegos esperados, para
+                mostrar el avance. Defaults to None.
+            cada (float, optional): Segundos entre reportes. Defaults to 5.0.
+            salida (optional): Función que recibe cada línea. Defaults to print.
+        """
+        self.total_juegos: int | None = total_juegos
+        self.cada: float = cada
+        self.salida = salida
+        self.juegos: int = 0
+        self.pasos: int = 0
+        self._inicio: float = time.perf_counter()
+        self._ultimo_reporte: float = self._inicio
+
+    def avanzar(self, juegos: int = 0, pasos: int = 0) -> None:
+        self.juegos += juegos
+        self.pasos += pasos
+        ahora = time.perf_counter()
+        if ahora - self._ultimo_reporte >= self.cada:
+            self._ultimo_reporte = ahora
+            self.reportar()
+
+    def reportar(self) -> None:
+        transcurrido = max(time.perf_counter() - self._inicio, 1e-9)
+        avance = f"/{self.total_juegos}" if self.total_juegos is not None else ""
+        linea = (
+            f"[{transcurrido:8.1f}s] juegos: {self.juegos}{avance} "
+            f"({self.juegos / transcurrido:.0f} juegos/s)"
+        )
+        if self.pasos:
+            linea += f", pasos: {self.pasos} ({self.pasos / transcurrido:.0f} pasos/s)"
+        self.salida(linea)
+
+
+class _Fase:
+    __slots__ = ("llamadas", "tiempo_total", "tiempo_propio")
+
+    def __init__(self):
+        self.llamadas: int = 0
+        self.tiempo_total: float = 0.0
+        self.tiempo_propio: float = 0.0
+
+
+class Perfilador:
+    def __init__(
+        self,
+        pstats_filename: str | None = None,
+        reporte: ReporteProgreso | None = None,
+    ):
+        """Instrumentación opcional del camino caliente. Al entrar al bloque
+        `with` envuelve con temporizadores a JuegoDiezMil.jugar, el jugar,
+        jugar_empaquetado y actualizar_tabla de cada subclase de Jugador, los
+        puntajes (utils.puntaje_y_no_usados y el de dados empaquetados) y los
+        métodos de Azar; al salir deja todo como estaba. Fuera del bloque
+        no hay ningún costo, porque no queda nada envuelto.
+
+        Args:
+            pstats_filename (str | None, optional): Si se da, además corre
+                cProfile durante el bloque y guarda ahí el volcado de pstats.
+                Defaults to None.
+            reporte (ReporteProgreso | None, optional): Si se da, se le
+                informa cada paso (cada jugar_empaquetado de un Jugador). Los
+                juegos los cuenta quien los corre. Defaults to None.
+        """
+        self.pstats_filename: str | None = pstats_filename
+        self.reporte: ReporteProgreso | None = reporte
+        self.fases: dict[str, _Fase] = {}
+        self._pila: list[float] = []  # Tiempo de hijos de cada llamada abierta.
+        self._restaurar: list[tuple[object, str, object]] = []
+        self._perfil: cProfile.Profile | None = None
+
+    def _envolver(self, nombre: str, funcion, al_terminar=None):
+        fase = self.fases.setdefault(nombre, _Fase())
+        pila = self._pila
+
+        @wraps(funcion)
+        def envuelta(*args, **kwargs):
+            pila.append(0.0)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                transcurrido = time.perf_counter() - inicio
+                hijos = pila.pop()
+                fase.llamadas += 1
+                fase.tiempo_total += transcurrido
+                fase.tiempo_propio += transcurrido - hijos
+                if pila:
+                    pila[-1] += transcurrido
+                if al_terminar is not None:
+                    al_terminar()
+
+        return envuelta
+
+    def _reemplazar(self, objeto, atributo: str, nuevo) -> None:
+        self._restaurar.append((objeto, atributo, objeto.__dict__[atributo]))
+        setattr(objeto, atributo, nuevo)
+
+    def _subclases_jugador(self) -> list[type]:
+        pendientes, clases = [Jugador], []
+        while pendientes:
+            clase = pendientes.pop()
+            clases.append(clase)
+            pendientes.extend(clase.__subclasses__())
+        return clases
+
+    def __enter__(self) -> "Perfilador":
+        reporte = self.reporte
+        contar_paso = (lambda: reporte.avanzar(pasos=1)) if reporte else None
+
+        self._reemplazar(
+            JuegoDiezMil, "jugar", self._envolver("JuegoDiezMil.jugar", JuegoDiezMil.jugar)
+        )
+        for clase in self._subclases_jugador():
+            # JuegoDiezMil llama a jugar_empaquetado una vez por paso (la de
+            # Jugador llama a su vez a jugar).
+            if "jugar_empaquetado" in clase.__dict__:
+                nombre = f"{clase.__name__}.jugar_empaquetado"
+                self._reemplazar(
+                    clase,
+                    "jugar_empaquetado",
+                    self._envolver(nombre, clase.__dict__["jugar_empaquetado"], contar_paso),
+                )
+            if "jugar" in clase.__dict__ and not getattr(
+                clase.jugar, "__isabstractmethod__", False
+            ):
+                nombre = f"{clase.__name__}.jugar"
+                self._reemplazar(clase, "jugar", self._envolver(nombre, clase.__dict__["jugar"]))
+            if "actualizar_tabla" in clase.__dict__:
+                nombre = f"{clase.__name__}.actualizar_tabla"
+                self._reemplazar(
+                    clase,
+                    "actualizar_tabla",
+                    self._envolver(nombre, clase.__dict__["actualizar_tabla"]),
+                )
+        for metodo in ["dados", "dados_empaquetados", "uniforme", "entero"]:
+            self._reemplazar(
+                Azar, metodo, self._envolver(f"Azar.{metodo}", Azar.__dict__[metodo])
+            )
+        # Las funciones de puntaje se importan por nombre (a veces con otro,
+        # como puntaje_empaquetado) en varios módulos: se reemplazan en todos
+        # los nombres que las tengan.
+        for (nombre, original) in [
+            ("puntaje_y_no_usados", utils.puntaje_y_no_usados),
+            ("dados.puntaje_y_no_usados", dados.puntaje_y_no_usados),
+        ]:
+            envuelta = self._envolver(nombre, original)
+            for modulo in list(sys.modules.values()):
+                for (atributo, valor) in list(getattr(modulo, "__dict__", {}).items()):
+                    if valor is original:
+                        self._reemplazar(modulo, atributo, envuelta)
+
+        if self.pstats_filename is not None:
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        return self
+
+    def __exit__(self, *excepcion) -> None:
+        if self._perfil is not None:
+            self._perfil.disable()
+            self._perfil.dump_stats(self.pstats_filename)
+            self._perfil = None
+        for objeto, atributo, original in reversed(self._restaurar):
+            setattr(objeto, atributo, original)
+        self._restaurar.clear()
+
+    def resumen(self) -> str:
+        """Tabla con llamadas, tiempo total (incluye lo que llama), tiempo
+        propio y su porcentaje para cada fase, de mayor a menor tiempo propio.
+        """
+        total_propio = sum(f.tiempo_propio for f in self.fases.values()) or 1e-9
+        lineas = [
+            f"{'fase':45} {'llamadas':>10} {'total (s)':>10} {'propio (s)':>10} "
+            f"{'us/llamada':>10} {'% propio':>8}"
+        ]
+        for nombre, fase in sorted(
+            self.fases.items(), key=lambda item: -item[1].tiempo_propio
+        ):
+            if fase.llamadas == 0:
+                continue
+            lineas.append(
+                f"{nombre:45} {fase.llamadas:10d} {fase.tiempo_total:10.3f} "
+                f"{fase.tiempo_propio:10.3f} "
+                f"{1e6 * fase.tiempo_total / fase.llamadas:10.2f} "
+                f"{fase.tiempo_propio / total_propio:8.1%}"
+            )
+        return "\n".join(lineas)
@@ -0,0 +1,206 @@
+import struct
+import numpy as np
+from utils import JUGADA_PLANTARSE, JUGADA_TIRAR
+
+PUNTAJE_OBJETIVO: int = 10000
+PASO_PUNTAJE: int = 50  # Todos los puntajes del juego son múltiplos de 50.
+
+# Una política es una tabla (np.ndarray de enteros) con la jugada a hacer en
+# cada estado de decisión. El estado de decisión es el que ve el jugador
+# después de una tirada que sumó puntos:
+#   - cant_dados: dados no usados de la tirada (0 a 6; 0 significa que en la
+#     próxima tirada vuelve a tirar los 6).
+#   - puntaje_turno: puntaje del turno contando la tirada actual.
+#   - puntaje_total: puntaje acumulado en turnos anteriores.
+# Según su dimensión, la tabla se indexa como:
+#   ndim 1: politica[cant_dados]
+#   ndim 2: politica[cant_dados, nivel(puntaje_turno)]
+#   ndim 3: politica[nivel(puntaje_total), cant_dados, nivel(puntaje_turno)]
+# donde nivel(p) = p // PASO_PUNTAJE, saturado en el último nivel de la tabla.
+
+
+def nivel_puntaje(puntaje: int, cant_niveles: int) -> int:
+    ''' Devuelve el índice de puntaje en una tabla con cant_niveles niveles.
+        Ejemplo: nivel_puntaje(120, 10) --> 2, nivel_puntaje(5000, 10) --> 9
+    '''
+    return min(puntaje // PASO_PUNTAJE, cant_niveles - 1)
+
+
+def jugada_politica(
+    politica: np.ndarray, cant_dados: int, puntaje_turno: int, puntaje_total: int
+) -> int:
+    ''' Devuelve la jugada que indica la política en el estado dado. '''
+    # item() hace una sola lectura y devuelve un int, también sobre un memmap.
+    if politica.ndim == 1:
+        return politica.item(cant_dados)
+    niveles_turno: int = politica.shape[-1]
+    if politica.ndim == 2:
+        return politica.item(cant_dados, nivel_puntaje(puntaje_turno, niveles_turno))
+    return politica.item(
+        nivel_puntaje(puntaje_total, politica.shape[0]),
+        cant_dados,
+        nivel_puntaje(puntaje_turno, niveles_turno),
+    )
+
+
+def jugadas_politica(
+    politica: np.ndarray,
+    cant_dados: np.ndarray,
+    puntaje_turno: np.ndarray,
+    puntaje_total: np.ndarray,
+) -> np.ndarray:
+    ''' Versión vectorizada de jugada_politica: recibe arreglos de estados
+        del mismo largo y devuelve el arreglo de jugadas.
+    '''
+    if politica.ndim == 1:
+        return politica[cant_dados]
+    niveles_turno = np.minimum(puntaje_turno // PASO_PUNTAJE, politica.shape[-1] - 1)
+    if politica.ndim == 2:
+        return politica[cant_dados, niveles_turno]
+    niveles_total = np.minimum(puntaje_total // PASO_PUNTAJE, politica.shape[0] - 1)
+    return politica[niveles_total, cant_dados, niveles_turno]
+
+
+def politica_umbral(umbral: int, cant_niveles: int) -> np.ndarray:
+    ''' Política de dos dimensiones que tira mientras el puntaje del turno
+        sea menor a umbral, y se planta a partir de ahí.
+    '''
+    niveles = np.arange(cant_niveles) * PASO_PUNTAJE
+    fila = np.where(niveles < umbral, JUGADA_TIRAR, JUGADA_PLANTARSE)
+    return np.tile(fila, (7, 1)).astype(np.int8)
+
+
+_COLUMNAS_POLITICA: dict[int, list[str]] = {
+    1: ["cant_dados"],
+    2: ["cant_dados", "puntaje_turno"],
+    3: ["puntaje_total", "cant_dados", "puntaje_turno"],
+}
+
+
+def guardar_politica_csv(politica: np.ndarray, filename: str, SEP: str = ','):
+    """Guarda la política en un CSV con una fila por estado. Las columnas son
+    las coordenadas del estado (cant_dados y, según la dimensión de la tabla,
+    puntaje_turno y puntaje_total, en puntos) y la jugada.
+
+    Args:
+        politica (np.ndarray): Tabla de jugadas, de dimensión 1, 2 o 3.
+        filename (str): Nombre/Path del archivo a generar.
+        SEP (str, optional): Separador de columnas. Defaults to ','.
+    """
+    columnas = _COLUMNAS_POLITICA[politica.ndim]
+    with open(filename, "w") as archivo:
+        archivo.write(SEP.join(columnas + ["jugada"]) + "\n")
+        for indice in np.ndindex(politica.shape):
+            valores = [
+                i if columna == "cant_dados" else i * PASO_PUNTAJE
+                for columna, i in zip(columnas, indice)
+            ]
+            archivo.write(SEP.join(map(str, valores + [politica[indice]])) + "\n")
+
+
+def leer_politica_csv(filename: str, SEP: str = ',') -> np.ndarray:
+    """Lee una política guardada con guardar_politica_csv.
+
+    Args:
+        filename (str): Nombre/Path del archivo con la política.
+        SEP (str, optional): Separador de columnas. Defaults to ','.
+
+    Returns:
+        np.ndarray: Tabla de jugadas.
+    """
+    datos = np.loadtxt(filename, delimiter=SEP, skiprows=1, dtype=np.int64, ndmin=2)
+    with open(filename) as archivo:
+        columnas = archivo.readline().strip().split(SEP)[:-1]
+    indices = tuple(
+        datos[:, j] if columna == "cant_dados" else datos[:, j] // PASO_PUNTAJE
+        for j, columna in enumerate(columnas)
+    )
+    politica = np.zeros(tuple(int(i.max()) + 1 for i in indices), dtype=np.int8)
+    politica[indices] = datos[:, -1]
+    return politica
+
+
+# Formato binario: un encabezado fijo de TAMANO_ENCABEZADO bytes seguido de la
+# tabla de jugadas como int8 en orden C, que se puede mapear a memoria sin
+# copiarla. El encabezado tiene el identificador, la versión del formato, la
+# dimensión de la tabla (que define qué coordenadas tiene el estado, ver
+# arriba), el paso de puntaje de los niveles y la forma de la tabla.
+IDENTIFICADOR_BINARIO: bytes = b"DIEZMIL\0"
+VERSION_BINARIO: int = 1
+TAMANO_ENCABEZADO: int = 64
+_FORMATO_ENCABEZADO: str = "<8sHHH3I"
+
+
+def guardar_politica_binaria(politica: np.ndarray, filename: str):
+    """Guarda la política en el formato binario de este módulo.
+
+    Args:
+        politica (np.ndarray): Tabla de jugadas, de dimensión 1, 2 o 3.
+        filename (str): Nombre/Path del archivo a generar.
+    """
+    forma = list(politica.shape) + [0] * (3 - politica.ndim)
+    encabezado = struct.pack(
+        _FORMATO_ENCABEZADO,
+        IDENTIFICADOR_BINARIO,
+        VERSION_BINARIO,
+        politica.ndim,
+        PASO_PUNTAJE,
+        *forma,
+    )
+    with open(filename, "wb") as archivo:
+        archivo.write(encabezado.ljust(TAMANO_ENCABEZADO, b"\0"))
+        archivo.write(np.ascontiguousarray(politica, dtype=np.int8).tobytes())
+
+
+def leer_politica_binaria(filename: str) -> np.memmap:
+    """Mapea a memoria (sólo lectura) una política guardada con
+    guardar_politica_binaria, sin copiar la tabla.
+
+    Args:
+        filename (str): Nombre/Path del archivo con la política.
+
+    Returns:
+        np.memmap: Tabla de jugadas.
+    """
+    with open(filename, "rb") as archivo:
+        encabezado = archivo.read(TAMANO_ENCABEZADO)
+    (identificador, version, ndim, paso, *forma) = struct.unpack_from(
+        _FORMATO_ENCABEZADO, encabezado
+    )
+    if identificador != IDENTIFICADOR_BINARIO:
+        raise ValueError(f"{filename} no es una política binaria")
+    if version != VERSION_BINARIO or paso != PASO_PUNTAJE:
+        raise ValueError(
+            f"{filename}: versión {version} con paso {paso} no soportada "
+            f"(se espera versión {VERSION_BINARIO} con paso {PASO_PUNTAJE})"
+        )
+    return np.memmap(
+        filename, dtype=np.int8, mode="r", offset=TAMANO_ENCABEZADO, shape=tuple(forma[:ndim])
+    )
+
+
+def guardar_politica(politica: np.ndarray, filename: str):
+    """Guarda la política en CSV si filename termina en .csv, y si no en el
+    formato binario.
+    """
+    if filename.endswith(".csv"):
+        guardar_politica_csv(politica, filename)
+    else:
+        guardar_politica_binaria(politica, filename)
+
+
+def leer_politica(filename: str, SEP: str = ',') -> np.ndarray:
+    """Lee una política en formato binario o CSV (según su contenido).
+
+    Args:
+        filename (str): Nombre/Path del archivo con la política.
+        SEP (str, optional): Separador de columnas si es CSV. Defaults to ','.
+
+    Returns:
+        np.ndarray: Tabla de jugadas (un np.memmap si el archivo es binario).
+    """
+    with open(filename, "rb") as archivo:
+        es_binario = archivo.read(len(IDENTIFICADOR_BINARIO)) == IDENTIFICADOR_BINARIO
+    if es_binario:
+        return leer_politica_binaria(filename)
+    return leer_politica_csv(filename, SEP)
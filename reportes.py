@@ -0,0 +1,125 @@
+import argparse
+import os
+import time
+from estadisticas import CurvaEnLinea
+
+
+def graficar_curva(
+    estadisticas: CurvaEnLinea,
+    imagen_filename: str,
+    titulo: str = "Average Play Amounts",
+    puntos: int = 1000,
+) -> None:
+    """Grafica la media de turnos por iteración con su intervalo del 95% y la
+    guarda en imagen_filename. Usa una Figure de matplotlib con el canvas Agg
+    (sin pyplot ni ventanas), así que funciona sin display y no toca el
+    backend de quien llama. matplotlib se importa recién acá.
+
+    Args:
+        estadisticas (CurvaEnLinea): Estadísticas de la curva.
+        imagen_filename (str): Nombre/Path de la imagen (el formato sale de la
+            extensión).
+        titulo (str, optional): Título del gráfico. Defaults to
+            "Average Play Amounts".
+        puntos (int, optional): Máximo de puntos a graficar (ver
+            CurvaEnLinea.submuestrear). Defaults to 1000.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    curva = estadisticas.submuestrear(puntos)
+    figura = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figura)
+    ejes = figura.add_subplot()
+    ejes.plot(curva["iteraciones"], curva["medias"], label="Average Play Amounts")
+    ejes.fill_between(
+        curva["iteraciones"], curva["bajo"], curva["alto"], alpha=0.3, label="95% CI"
+    )
+    ejes.set_xlabel("Iteration")
+    ejes.set_ylabel("Average Play Amount")
+    ejes.set_title(f"{titulo} ({int(estadisticas.cantidades.max())} replicas)")
+    ejes.legend()
+    # Igual que los resultados, la imagen se reemplaza entera de una vez.
+    (base, extension) = os.path.splitext(imagen_filename)
+    temporal = f"{base}.tmp{extension}"
+    figura.savefig(temporal)
+    os.replace(temporal, imagen_filename)
+
+
+def graficar_archivo(resultados_filename: str, imagen_filename: str, **kwargs) -> None:
+    """Grafica los resultados guardados con CurvaEnLinea.guardar."""
+    graficar_curva(CurvaEnLinea.cargar(resultados_filename), imagen_filename, **kwargs)
+
+
+class GraficoIncremental:
+    def __init__(
+        self,
+        imagen_filename: str,
+        resultados_filename: str | None = None,
+        cada: float = 30.0,
+        titulo: str = "Average Play Amounts",
+    ):
+        """Actualiza el gráfico (y opcionalmente el archivo de resultados)
+        durante una corrida, a lo sumo una vez cada `cada` segundos. Se pasa
+        como al_combinar de experimentos.acumular_replicas.
+
+        Args:
+            imagen_filename (str): Nombre/Path de la imagen.
+            resultados_filename (str | None, optional): Si se da, también se
+                guardan ahí las estadísticas. Defaults to None.
+            cada (float, optional): Segundos mínimos entre actualizaciones.
+                Defaults to 30.0.
+            titulo (str, optional): Título del gráfico. Defaults to
+                "Average Play Amounts".
+        """
+        self.imagen_filename: str = imagen_filename
+        self.resultados_filename: str | None = resultados_filename
+        self.cada: float = cada
+        self.titulo: str = titulo
+        self._ultima: float = time.perf_counter()
+
+    def __call__(self, estadisticas: CurvaEnLinea) -> None:
+        ahora = time.perf_counter()
+        if ahora - self._ultima >= self.cada:
+            self._ultima = ahora
+            self.actualizar(estadisticas)
+
+    def actualizar(self, estadisticas: CurvaEnLinea) -> None:
+        if self.resultados_filename is not None:
+            estadisticas.guardar(self.resultados_filename)
+        graficar_curva(estadisticas, self.imagen_filename, self.titulo)
+
+
+def seguir(resultados_filename: str, imagen_filename: str, cada: float) -> None:
+    """Vuelve a graficar cada vez que cambia el archivo de resultados, hasta
+    que se interrumpa con Ctrl+C. Sirve para mirar una corrida desde otro
+    proceso.
+    """
+    ultima_modificacion: float | None = None
+    try:
+        while True:
+            if os.path.exists(resultados_filename):
+                modificacion = os.path.getmtime(resultados_filename)
+                if modificacion != ultima_modificacion:
+                    ultima_modificacion = modificacion
+                    graficar_archivo(resultados_filename, imagen_filename)
+                    print(f"{imagen_filename} actualizado")
+            time.sleep(cada)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Graficar la curva de aprendizaje guardada por una corrida de 'Diez Mil'.")
+
+    parser.add_argument('resultados', type=str, help='Archivo .npz con las estadísticas (CurvaEnLinea.guardar)')
+    parser.add_argument('-o', '--output', type=str, default='Montecarlo.png', help='Imagen a generar (default: Montecarlo.png)')
+    parser.add_argument('-s', '--seguir', action='store_true', help='Seguir el archivo y regenerar la imagen cada vez que cambie')
+    parser.add_argument('--cada', type=float, default=5.0, help='Segundos entre revisiones con --seguir (default: 5.0)')
+
+    args = parser.parse_args()
+
+    if args.seguir:
+        seguir(args.resultados, args.output, args.cada)
+    else:
+        graficar_archivo(args.resultados, args.output)
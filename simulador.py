@@ -0,0 +1,152 @@
+import numpy as np
+from azar import Azar, azar_por_defecto
+from utils import _TABLA_PUNTAJES, JUGADA_PLANTARSE
+from politicas import PUNTAJE_OBJETIVO, jugadas_politica
+from transiciones import modelo
+
+# Un multiconjunto de dados se codifica por la cantidad de cada cara, en
+# base 7: codigo = sum(cant[cara] * 7**(cara-1)).
+_POTENCIAS_7 = 7 ** np.arange(6)
+
+
+def _armar_tablas_vectorizadas() -> tuple[np.ndarray, np.ndarray]:
+    ''' Pasa _TABLA_PUNTAJES a dos arreglos indexados por el código en base 7
+        de la tirada: el puntaje y la cantidad de dados no usados.
+    '''
+    puntajes = np.zeros(7**6, dtype=np.int64)
+    cant_no_usados = np.zeros(7**6, dtype=np.int64)
+    for ds, (puntaje, no_usados) in _TABLA_PUNTAJES.items():
+        codigo: int = sum(7 ** (d - 1) for d in ds)
+        puntajes[codigo] = puntaje
+        cant_no_usados[codigo] = len(no_usados)
+    return (puntajes, cant_no_usados)
+
+
+_PUNTAJES, _CANT_NO_USADOS = _armar_tablas_vectorizadas()
+
+
+def puntuar_tiradas(dados: np.ndarray, cant_dados: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    ''' Dada una matriz dados de (N, 6) con valores del 1 al 6, donde en la
+        fila i sólo cuentan las primeras cant_dados[i] columnas, devuelve el
+        puntaje de cada tirada y la cantidad de dados no usados.
+    '''
+    usados = np.arange(6) < cant_dados[:, None]
+    # Cada dado usado suma 7**(cara-1) al código.
+    codigos = (_POTENCIAS_7[dados - 1] * usados).sum(axis=1)
+    return (_PUNTAJES[codigos], _CANT_NO_USADOS[codigos])
+
+
+class DadosComunes:
+    def __init__(self, clave: int):
+        """Dados para comparar políticas con números aleatorios comunes: el
+        dado d de la tirada r del turno t del juego g es siempre el mismo para
+        una clave dada, sin importar qué jugadas se hicieron antes. Se calcula
+        con un hash (splitmix64) de (clave, g, t, r, d), así que no hace falta
+        guardar nada y dos políticas que se separan en un juego vuelven a ver
+        los mismos dados en cuanto coinciden de nuevo en turno y tirada.
+
+        Args:
+            clave (int): Entero de 64 bits que identifica la secuencia.
+        """
+        self.clave = np.uint64(clave)
+
+    def dados(self, juegos: np.ndarray, turnos: np.ndarray, tiradas: np.ndarray) -> np.ndarray:
+        """Matriz de (N, 6) dados para los juegos, turnos y tiradas dados."""
+        with np.errstate(over="ignore"):
+            x = self.clave
+            for coordenada in (juegos, turnos, tiradas):
+                x = _mezclar(x ^ coordenada.astype(np.uint64))
+            x = _mezclar(x[:, None] ^ np.arange(6, dtype=np.uint64))
+        return (x % np.uint64(6)).astype(np.int64) + 1
+
+
+def _mezclar(x: np.ndarray) -> np.ndarray:
+    ''' Paso de splitmix64 sobre un arreglo de uint64. '''
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class SimuladorDiezMil:
+    def __init__(self, politica: np.ndarray):
+        ''' Simula muchos juegos de 10mil en simultáneo para un jugador que
+            sigue una política fija (ver politicas.py).
+        '''
+        self.politica: np.ndarray = politica
+
+    def jugar(
+        self,
+        cantidad_juegos: int,
+        tope_turnos: int = 1000,
+        azar: Azar | None = None,
+        dados_comunes: DadosComunes | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Juega cantidad_juegos juegos de 10mil a la vez, con las mismas
+        reglas que JuegoDiezMil.jugar. Cada juego termina al llegar a 10000
+        puntos o a tope_turnos turnos. Devuelve dos arreglos con la cantidad
+        de turnos y el puntaje final de cada juego. Los dados salen en bloque
+        del generador de azar (azar_por_defecto() si no se pasa uno), o de
+        dados_comunes si se pasa, para comparar políticas con los mismos dados.
+        """
+        if azar is None:
+            azar = azar_por_defecto()
+        rng = azar.generador
+        transiciones = modelo()
+        turnos = np.ones(cantidad_juegos, dtype=np.int64)
+        puntajes_totales = np.zeros(cantidad_juegos, dtype=np.int64)
+        puntajes_turno = np.zeros(cantidad_juegos, dtype=np.int64)
+        dados_a_tirar = np.full(cantidad_juegos, 6, dtype=np.int64)
+        # Número de tirada dentro del turno, para dados_comunes.
+        tiradas = np.zeros(cantidad_juegos, dtype=np.int64)
+        # Índices de los juegos que todavía no terminaron.
+        activos = np.arange(cantidad_juegos)
+
+        while activos.size > 0:
+            cant_dados = dados_a_tirar[activos]
+            if dados_comunes is None:
+                # Sin dados: el resultado de cada tirada sale del modelo de
+                # transiciones con un solo uniforme.
+                (puntajes_tirada, cant_no_usados) = transiciones.muestrear(
+                    cant_dados, rng.random(activos.size)
+                )
+            else:
+                dados = dados_comunes.dados(activos, turnos[activos], tiradas[activos])
+                tiradas[activos] += 1
+                (puntajes_tirada, cant_no_usados) = puntuar_tiradas(dados, cant_dados)
+            acumulados = puntajes_turno[activos] + puntajes_tirada
+
+            jugadas = jugadas_politica(
+                self.politica, cant_no_usados, acumulados, puntajes_totales[activos]
+            )
+            pierde = puntajes_tirada == 0
+            planta = ~pierde & (jugadas == JUGADA_PLANTARSE)
+            tira = ~pierde & ~planta
+
+            # Se planta: suma el turno al total.
+            puntajes_totales[activos[planta]] += acumulados[planta]
+            # Tira: sigue el turno con los dados no usados, o con los 6 si
+            # usó todos.
+            puntajes_turno[activos[tira]] = acumulados[tira]
+            dados_a_tirar[activos[tira]] = np.where(
+                cant_no_usados[tira] == 0, 6, cant_no_usados[tira]
+            )
+
+            # Los que terminaron el turno empiezan otro, salvo que terminen
+            # el juego.
+            fin_de_turno = pierde | planta
+            terminan_turno = activos[fin_de_turno]
+            fin_de_juego = (puntajes_totales[terminan_turno] >= PUNTAJE_OBJETIVO) | (
+                turnos[terminan_turno] >= tope_turnos
+            )
+            siguen = terminan_turno[~fin_de_juego]
+            turnos[siguen] += 1
+            puntajes_turno[siguen] = 0
+            dados_a_tirar[siguen] = 6
+            tiradas[siguen] = 0
+
+            quedan = np.ones(activos.size, dtype=bool)
+            quedan[np.flatnonzero(fin_de_turno)[fin_de_juego]] = False
+            activos = activos[quedan]
+
+        return (turnos, puntajes_totales)
@@ -1,26 +1,79 @@
 import numpy as np
 from utils import puntaje_y_no_usados, JUGADA_PLANTARSE, JUGADA_TIRAR, JUGADAS_STR
 from collections import defaultdict
-from tqdm import tqdm
 from jugador import Jugador
+from azar import Azar, azar_por_defecto
+from checkpoints import Checkpointer
+from transiciones import modelo
+from dados import cantidad
+from dados import puntaje_y_no_usados as puntaje_empaquetado
+from politicas import (
+    PUNTAJE_OBJETIVO,
+    PASO_PUNTAJE,
+    jugada_politica,
+    leer_politica,
+    guardar_politica,
+)
+
 
 class AmbienteDiezMil:
     
-    def __init__(self):
-        """Definir las variables de instancia de un ambiente.
-        ¿Qué es propio de un ambiente de 10.000?
+    def __init__(
+        self,
+        niveles_turno: int = 21,
+        niveles_total: int = 1,
+        tope_turnos: int = 1000,
+        azar: Azar | None = None,
+    ):
+        """Ambiente de un juego de 10.000 para un jugador, con las mismas reglas
+        que JuegoDiezMil.jugar. El agente sólo decide en los estados de
+        decisión (después de una tirada que sumó puntos); las tiradas sin
+        puntaje terminan el turno solas.
+
+        Args:
+            niveles_turno (int, optional): Niveles de puntaje de turno (de a 50)
+                que distingue el estado. Defaults to 21 (0 a 1000 o más).
+            niveles_total (int, optional): Niveles de puntaje total (de a 50)
+                que distingue el estado. Defaults to 1 (no lo tiene en cuenta).
+            tope_turnos (int, optional): Turnos máximos por juego. Defaults to 1000.
+            azar (Azar | None, optional): Fuente de azar de los dados. Defaults
+                to None (usa azar_por_defecto()).
         """
-        pass
+        self.azar: Azar = azar if azar is not None else azar_por_defecto()
+        self.niveles_turno: int = niveles_turno
+        self.niveles_total: int = niveles_total
+        self.tope_turnos: int = tope_turnos
+        self.estado: EstadoDiezMil = EstadoDiezMil(niveles_turno, niveles_total)
+        self.turno: int = 0
+        self.terminado: bool = True
+        # Cada tirada se muestrea del modelo de transiciones con un uniforme.
+        self._transiciones = modelo()
+
+    @property
+    def cant_estados(self) -> int:
+        return self.niveles_total * 7 * self.niveles_turno
+
+    @property
+    def forma_politica(self) -> tuple[int, ...]:
+        """Forma de la tabla de política (ver politicas.py) para este ambiente."""
+        if self.niveles_total == 1:
+            return (7, self.niveles_turno)
+        return (self.niveles_total, 7, self.niveles_turno)
 
     def reset(self):
         """Reinicia el ambiente para volver a realizar un episodio.
         """
-        pass
+        self.estado.reiniciar()
+        self.turno = 1
+        self.terminado = False
+        self._tirar()
 
     def step(self, accion):
         """Dada una acción devuelve una recompensa.
         El estado es modificado acorde a la acción y su interacción con el ambiente.
-        Podría ser útil devolver si terminó o no el turno.
+        La recompensa es el puntaje del turno al plantarse y 0 en otro caso.
+        Cuando termina el turno el ambiente ya queda en el primer estado de
+        decisión del turno siguiente, o con terminado en True si terminó el juego.
 
         Args:
             accion: Acción elegida por un agente.
@@ -28,28 +81,100 @@ class AmbienteDiezMil:
         Returns:
             tuple[int, bool]: Una recompensa y un flag que indica si terminó el turno. 
         """
-        pass
+        if accion == JUGADA_PLANTARSE:
+            recompensa: int = self.estado.puntaje_turno
+            self.estado.fin_turno(True)
+            self._siguiente_turno()
+            return (recompensa, True)
+        if not self._tirar():
+            return (0, True)
+        return (0, False)
+
+    def _tirar(self) -> bool:
+        """Tira los dados que quedan (o los 6) y actualiza el estado. Si la
+        tirada no suma puntos termina el turno y sigue tirando en los turnos
+        siguientes hasta llegar a un estado de decisión o al fin del juego.
+        Devuelve si el turno en curso siguió.
+        """
+        siguio: bool = True
+        while not self.terminado:
+            (puntaje, cant_no_usados) = self._transiciones.muestrear_uno(
+                self.estado.cant_dados, self.azar.uniforme()
+            )
+            if puntaje > 0:
+                self.estado.actualizar_estado(puntaje, cant_no_usados)
+                return siguio
+            siguio = False
+            self.estado.fin_turno(False)
+            self._siguiente_turno(tirar=False)
+        return siguio
+
+    def _siguiente_turno(self, tirar: bool = True):
+        if (
+            self.estado.puntaje_total >= PUNTAJE_OBJETIVO
+            or self.turno >= self.tope_turnos
+        ):
+            self.terminado = True
+            return
+        self.turno += 1
+        if tirar:
+            self._tirar()
 
 class EstadoDiezMil:
-    def __init__(self):
-        """Definir qué hace a un estado de diez mil.
-        Recordar que la complejidad del estado repercute en la complejidad de la tabla del agente de q-learning.
+    __slots__ = ("puntaje_total", "puntaje_turno", "cant_dados", "niveles_turno", "niveles_total")
+
+    def __init__(self, niveles_turno: int = 21, niveles_total: int = 1):
+        """Estado de decisión de un juego de 10.000: puntaje total, puntaje del
+        turno (contando la última tirada) y dados no usados (0 significa que se
+        vuelven a tirar los 6). Se modifica en el lugar para no crear objetos
+        en cada paso.
+
+        Args:
+            niveles_turno (int, optional): Niveles de puntaje de turno que
+                distingue indice(). Defaults to 21.
+            niveles_total (int, optional): Niveles de puntaje total que
+                distingue indice(). Defaults to 1.
         """
-        pass
+        self.niveles_turno: int = niveles_turno
+        self.niveles_total: int = niveles_total
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        """Vuelve al estado de comienzo de un juego."""
+        self.puntaje_total: int = 0
+        self.puntaje_turno: int = 0
+        self.cant_dados: int = 0
 
-    def actualizar_estado(self, *args, **kwargs) -> None:
+    def actualizar_estado(self, puntaje_tirada: int, cant_no_usados: int) -> None:
         """Modifica las variables internas del estado luego de una tirada.
 
         Args:
-            ... (_type_): _description_
-            ... (_type_): _description_
+            puntaje_tirada (int): Puntaje de la tirada.
+            cant_no_usados (int): Dados que no sumaron puntos.
         """
-        pass
+        self.puntaje_turno += puntaje_tirada
+        self.cant_dados = cant_no_usados
     
-    def fin_turno(self):
+    def fin_turno(self, plantarse: bool):
         """Modifica el estado al terminar el turno.
+
+        Args:
+            plantarse (bool): Si el turno terminó plantándose (suma el puntaje
+                del turno) o por una tirada sin puntos (no suma nada).
         """
-        pass
+        if plantarse:
+            self.puntaje_total += self.puntaje_turno
+        self.puntaje_turno = 0
+        self.cant_dados = 0
+
+    def indice(self) -> int:
+        """Codifica el estado en un entero entre 0 y
+        niveles_total * 7 * niveles_turno - 1, en el mismo orden que la tabla
+        de política (ver politicas.py) aplanada.
+        """
+        nivel_turno: int = min(self.puntaje_turno // PASO_PUNTAJE, self.niveles_turno - 1)
+        nivel_total: int = min(self.puntaje_total // PASO_PUNTAJE, self.niveles_total - 1)
+        return (nivel_total * 7 + self.cant_dados) * self.niveles_turno + nivel_turno
 
     def __str__(self):
         """Representación en texto de EstadoDiezMil.
@@ -58,7 +183,10 @@ class EstadoDiezMil:
         Returns:
             str: Representación en texto de EstadoDiezMil.
         """
-        pass   
+        return (
+            f"total: {self.puntaje_total}, turno: {self.puntaje_turno}, "
+            f"dados no usados: {self.cant_dados}"
+        )
 
 class AgenteQLearning:
     def __init__(
@@ -68,54 +196,163 @@ class AgenteQLearning:
         gamma: float,
         epsilon: float,
         *args,
+        azar: Azar | None = None,
         **kwargs
     ):
-        """Definir las variables internas de un Agente que implementa el algoritmo de Q-Learning.
+        """Agente que implementa el algoritmo de Q-Learning sobre un AmbienteDiezMil.
+        Cada episodio es un juego completo; cada turno termina el episodio de
+        Q-Learning (no se propaga valor entre turnos).
 
         Args:
             ambiente (AmbienteDiezMil): Ambiente con el que interactuará el agente.
             alpha (float): Tasa de aprendizaje.
             gamma (float): Factor de descuento.
             epsilon (float): Probabilidad de explorar.
+            azar (Azar | None, optional): Fuente de azar para explorar.
+                Defaults to None (usa la del ambiente).
         """
-        pass
+        self.ambiente: AmbienteDiezMil = ambiente
+        self.azar: Azar = azar if azar is not None else ambiente.azar
+        self.alpha: float = alpha
+        self.gamma: float = gamma
+        self.epsilon: float = epsilon
+        # q_table[estado, jugada], con estado = EstadoDiezMil.indice().
+        self.q_table: np.ndarray = np.zeros((ambiente.cant_estados, 2))
+        self.episodios_entrenados: int = 0
 
     def elegir_accion(self):
         """Selecciona una acción de acuerdo a una política ε-greedy.
         """
-        pass
+        if self.azar.uniforme() < self.epsilon:
+            return JUGADA_TIRAR if self.azar.uniforme() < 0.5 else JUGADA_PLANTARSE
+        estado: int = self.ambiente.estado.indice()
+        if self.q_table.item(estado, JUGADA_TIRAR) > self.q_table.item(
+            estado, JUGADA_PLANTARSE
+        ):
+            return JUGADA_TIRAR
+        return JUGADA_PLANTARSE
 
-    def entrenar(self, episodios: int, verbose: bool = False) -> None:
+    def entrenar(
+        self,
+        episodios: int,
+        verbose: bool = False,
+        checkpointer: Checkpointer | None = None,
+    ) -> None:
         """Dada una cantidad de episodios, se repite el ciclo del algoritmo de Q-learning.
-        Recomendación: usar tqdm para observar el progreso en los episodios.
 
         Args:
             episodios (int): Cantidad de episodios a iterar.
             verbose (bool, optional): Flag para hacer visible qué ocurre en cada paso. Defaults to False.
+            checkpointer (Checkpointer | None, optional): Si se da, guarda
+                estado_checkpoint() cada checkpointer.cada episodios y al final.
+                Defaults to None.
+        """
+        from tqdm import tqdm  # Importado acá: sólo hace falta para entrenar.
+
+        ambiente = self.ambiente
+        estado = ambiente.estado
+        q_table = self.q_table
+        for _ in tqdm(range(episodios), disable=verbose):
+            ambiente.reset()
+            while not ambiente.terminado:
+                indice: int = estado.indice()
+                accion: int = self.elegir_accion()
+                if verbose:
+                    print(f"{estado} --> {JUGADAS_STR[accion]}")
+                (recompensa, fin_turno) = ambiente.step(accion)
+                objetivo: float = recompensa
+                if not fin_turno:
+                    siguiente: int = estado.indice()
+                    objetivo += self.gamma * max(
+                        q_table.item(siguiente, JUGADA_PLANTARSE),
+                        q_table.item(siguiente, JUGADA_TIRAR),
+                    )
+                q_valor: float = q_table.item(indice, accion)
+                q_table[indice, accion] = q_valor + self.alpha * (objetivo - q_valor)
+            self.episodios_entrenados += 1
+            if (
+                checkpointer is not None
+                and self.episodios_entrenados % checkpointer.cada == 0
+            ):
+                checkpointer.guardar(self.estado_checkpoint())
+        if checkpointer is not None:
+            checkpointer.guardar(self.estado_checkpoint())
+
+    def estado_checkpoint(self) -> dict:
+        """Copia de todo lo necesario para retomar el entrenamiento: la tabla,
+        los hiperparámetros, la configuración del ambiente, los episodios
+        entrenados y el estado del azar. Se toma entre episodios, cuando el
+        ambiente se reinicia, así que no hace falta guardar su estado.
+        """
+        return {
+            "q_table": self.q_table.copy(),
+            "alpha": self.alpha,
+            "gamma": self.gamma,
+            "epsilon": self.epsilon,
+            "episodios_entrenados": self.episodios_entrenados,
+            "niveles_turno": self.ambiente.niveles_turno,
+            "niveles_total": self.ambiente.niveles_total,
+            "tope_turnos": self.ambiente.tope_turnos,
+            "azar_ambiente": self.ambiente.azar.estado(),
+            # None si el agente usa el mismo Azar que el ambiente.
+            "azar": None if self.azar is self.ambiente.azar else self.azar.estado(),
+        }
+
+    @classmethod
+    def desde_checkpoint(cls, datos: dict) -> "AgenteQLearning":
+        """Reconstruye el ambiente y el agente guardados con estado_checkpoint,
+        para seguir entrenando exactamente donde se dejó.
         """
-        pass
+        ambiente = AmbienteDiezMil(
+            datos["niveles_turno"],
+            datos["niveles_total"],
+            datos["tope_turnos"],
+            Azar.desde_estado(datos["azar_ambiente"]),
+        )
+        azar = ambiente.azar
+        if datos["azar"] is not None:
+            azar = Azar.desde_estado(datos["azar"])
+        agente = cls(ambiente, datos["alpha"], datos["gamma"], datos["epsilon"], azar=azar)
+        agente.q_table[:] = datos["q_table"]
+        agente.episodios_entrenados = datos["episodios_entrenados"]
+        return agente
+
+    def politica(self) -> np.ndarray:
+        """Devuelve la política greedy del agente como tabla (ver politicas.py).
+        Ante empate (por ejemplo en estados no visitados) se planta.
+        """
+        jugadas = np.where(
+            self.q_table[:, JUGADA_TIRAR] > self.q_table[:, JUGADA_PLANTARSE],
+            JUGADA_TIRAR,
+            JUGADA_PLANTARSE,
+        )
+        return jugadas.astype(np.int8).reshape(self.ambiente.forma_politica)
 
     def guardar_politica(self, filename: str):
-        """Almacena la política del agente en un formato conveniente.
+        """Almacena la política del agente, en CSV si filename termina en .csv
+        y si no en formato binario (ver politicas.guardar_politica).
 
         Args:
             filename (str): Nombre/Path del archivo a generar.
         """
-        pass
+        guardar_politica(self.politica(), filename)
 
 class JugadorEntrenado(Jugador):
-    def __init__(self, nombre: str, filename_politica: str):
+    def __init__(self, nombre: str, filename_politica: str, azar: Azar | None = None):
         self.nombre = nombre
+        # La política es determinística; azar se acepta por uniformidad con
+        # los demás jugadores.
+        self.azar = azar if azar is not None else azar_por_defecto()
         self.politica = self._leer_politica(filename_politica)
         
     def _leer_politica(self, filename:str, SEP:str=','):
         """Carga una politica entrenada con un agente de RL, que está guardada
-        en el archivo filename en un formato conveniente.
+        en el archivo filename en formato binario (se mapea a memoria) o CSV.
 
         Args:
             filename (str): Nombre/Path del archivo que contiene a una política almacenada. 
         """
-        pass
+        return leer_politica(filename, SEP)
     
     def jugar(
         self,
@@ -133,13 +370,29 @@ class JugadorEntrenado(Jugador):
         Returns:
             tuple[int,list[int]]: Una jugada y la lista de dados a tirar.
         """
-        pass
-        # puntaje, no_usados = puntaje_y_no_usados(dados)
-        # COMPLETAR
-        # estado = ...
-        # jugada = self.politica[estado]
-       
-        # if jugada==JUGADA_PLANTARSE:
-        #     return (JUGADA_PLANTARSE, [])
-        # elif jugada==JUGADA_TIRAR:
-        #     return (JUGADA_TIRAR, no_usados)
\ No newline at end of file
+        puntaje, no_usados = puntaje_y_no_usados(dados)
+        jugada = jugada_politica(
+            self.politica, len(no_usados), puntaje_turno + puntaje, puntaje_total
+        )
+
+        if jugada==JUGADA_PLANTARSE:
+            return (JUGADA_PLANTARSE, [])
+        elif jugada==JUGADA_TIRAR:
+            return (JUGADA_TIRAR, no_usados)
+
+    def jugar_empaquetado(
+        self,
+        puntaje_total:int,
+        puntaje_turno:int,
+        dados:int,
+    ) -> tuple[int,int]:
+        """Como jugar, con los dados empaquetados (ver dados.py)."""
+        puntaje, no_usados = puntaje_empaquetado(dados)
+        jugada = jugada_politica(
+            self.politica, cantidad(no_usados), puntaje_turno + puntaje, puntaje_total
+        )
+
+        if jugada==JUGADA_PLANTARSE:
+            return (JUGADA_PLANTARSE, 0)
+        elif jugada==JUGADA_TIRAR:
+            return (JUGADA_TIRAR, no_usados)
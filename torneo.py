@@ -0,0 +1,549 @@
+import argparse
+import asyncio
+import json
+import shlex
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from statistics import NormalDist
+import numpy as np
+from dados import empaquetar, separar
+from dados import puntaje_y_no_usados as puntaje_empaquetado
+from evaluacion import TiradasComunes, _resumir, imprimir_evaluacion
+from jugador import Jugador, JugadorAleatorio, JugadorSiempreSePlanta
+from utils import puntaje_y_no_usados, JUGADA_PLANTARSE, JUGADA_TIRAR
+
+# Protocolo con los bots: una línea de JSON por mensaje. El torneo manda lotes
+# de pedidos de jugada y el bot contesta con las jugadas, como Jugador.jugar:
+#   torneo --> bot: {"pedidos": [{"id": 7, "puntaje_total": 350, "puntaje_turno": 0, "dados": [1, 5, 3, 3, 2, 6]}, ...]}
+#   bot --> torneo: {"respuestas": [{"id": 7, "jugada": 1, "a_tirar": [3, 3, 2, 6]}, ...]}
+# jugada es JUGADA_PLANTARSE (0) o JUGADA_TIRAR (1). Las respuestas se asocian
+# por id: pueden venir en otro orden o repartidas en varias líneas.
+#
+# Direcciones de los bots:
+#   unix:/ruta/al/socket    socket unix
+#   tcp:host:puerto         socket tcp
+#   cmd:comando y args      proceso hijo, por su entrada y salida estándar
+#   local:jugador           un jugador de este repo, en el mismo proceso y sin JSON
+
+
+class ClienteJugador(ABC):
+    def __init__(self, tamano_lote: int = 512, timeout: float = 1.0):
+        """Pide jugadas a un bot para muchos juegos a la vez: cada juego llama
+        a decidir y espera su respuesta, mientras una tarea junta los pedidos
+        de todos los juegos que esperan y los manda en lotes de hasta
+        tamano_lote. El plazo de cada jugada corre desde que el juego la
+        pide, así que vence aunque el pedido siga en la cola (por ejemplo si
+        el bot dejó de leer); la latencia que se informa se mide desde que
+        sale su lote. Si falla el envío, fallan todos los pedidos.
+
+        Args:
+            tamano_lote (int, optional): Máximo de pedidos por lote.
+                Defaults to 512.
+            timeout (float, optional): Segundos para contestar cada jugada;
+                si no, decidir lanza TimeoutError. Defaults to 1.0.
+        """
+        self.tamano_lote: int = tamano_lote
+        self.timeout: float = timeout
+        self.lotes: int = 0
+        # Pedidos que llegaron a salir (los que vencen en la cola no salen).
+        self.enviados: int = 0
+        # Segundos desde que sale cada pedido hasta su respuesta.
+        self.latencias: list[float] = []
+        self._hora_envio: dict[int, float] = {}
+        self._pendientes: list[dict] = []
+        self._esperando: dict[int, asyncio.Future] = {}
+        self._proximo_id: int = 0
+        self._hay_pendientes = asyncio.Event()
+        self._tareas: list[asyncio.Task] = []
+        self._error: Exception | None = None
+        # Vencimiento de cada pedido, en el orden en que se pidieron (que es
+        # también el orden en que vencen).
+        self._plazos: deque[tuple[float, int]] = deque()
+
+    async def decidir(
+        self, puntaje_total: int, puntaje_turno: int, dados: list[int]
+    ) -> tuple[object, object]:
+        """Jugada y dados a tirar que contesta el bot, sin validar. Lanza
+        TimeoutError si no contesta a tiempo.
+        """
+        if self._error is not None:
+            raise self._error
+        if not self._tareas:
+            self._tareas = self._iniciar()
+        id_pedido = self._proximo_id
+        self._proximo_id += 1
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._plazos.append((loop.time() + self.timeout, id_pedido))
+        self._esperando[id_pedido] = futuro
+        self._pendientes.append(
+            {"id": id_pedido, "puntaje_total": puntaje_total, "puntaje_turno": puntaje_turno, "dados": dados}
+        )
+        self._hay_pendientes.set()
+        try:
+            return await futuro
+        finally:
+            # También si se venció el tiempo: una respuesta tardía se ignora.
+            del self._esperando[id_pedido]
+            self._hora_envio.pop(id_pedido, None)
+
+    def _iniciar(self) -> list[asyncio.Task]:
+        return [asyncio.create_task(self._enviar_lotes()), asyncio.create_task(self._vigilar())]
+
+    async def _vigilar(self) -> None:
+        """Vence los pedidos sin respuesta a su plazo, con un solo
+        temporizador en vez de uno por pedido.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            while self._plazos and self._plazos[0][0] <= loop.time():
+                (_, id_pedido) = self._plazos.popleft()
+                futuro = self._esperando.get(id_pedido)
+                if futuro is not None and not futuro.done():
+                    futuro.set_exception(TimeoutError())
+            await asyncio.sleep(self._plazos[0][0] - loop.time() if self._plazos else self.timeout)
+
+    async def _enviar_lotes(self) -> None:
+        try:
+            while True:
+                await self._hay_pendientes.wait()
+                # Una vuelta del loop para que los demás juegos que ya tienen
+                # su respuesta agreguen su próximo pedido al mismo lote.
+                await asyncio.sleep(0)
+                lote = self._pendientes[: self.tamano_lote]
+                del self._pendientes[: self.tamano_lote]
+                if not self._pendientes:
+                    self._hay_pendientes.clear()
+                # Los que vencieron en la cola ya no se mandan.
+                lote = [pedido for pedido in lote if pedido["id"] in self._esperando]
+                if not lote:
+                    continue
+                self.lotes += 1
+                self.enviados += len(lote)
+                self._hora_envio.update(
+                    dict.fromkeys((pedido["id"] for pedido in lote), time.perf_counter())
+                )
+                await self._enviar(lote)
+        except Exception as error:
+            self._fallar(error)
+
+    @abstractmethod
+    async def _enviar(self, lote: list[dict]) -> None:
+        pass
+
+    def _resolver(self, respuestas: list) -> None:
+        ahora = time.perf_counter()
+        for respuesta in respuestas:
+            if not isinstance(respuesta, dict) or type(respuesta.get("id")) is not int:
+                continue
+            futuro = self._esperando.get(respuesta["id"])
+            if futuro is not None and not futuro.done():
+                self.latencias.append(ahora - self._hora_envio.get(respuesta["id"], ahora))
+                futuro.set_result((respuesta.get("jugada"), respuesta.get("a_tirar", [])))
+
+    def _fallar(self, error: Exception) -> None:
+        """Termina con error los pedidos en espera y los que vengan."""
+        self._error = error
+        for futuro in self._esperando.values():
+            if not futuro.done():
+                futuro.set_exception(error)
+
+    async def cerrar(self) -> None:
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+
+
+class AdaptadorJugador:
+    def __init__(self, jugador: Jugador):
+        """Contesta pedidos del protocolo con un Jugador de este repo. Lo usan
+        los bots de ejemplo (ver servir_stdio y servir_socket) y
+        ClienteEnProceso.
+        """
+        self.jugador: Jugador = jugador
+
+    def responder(self, pedidos: list[dict]) -> list[dict]:
+        respuestas: list[dict] = []
+        for pedido in pedidos:
+            (jugada, a_tirar) = self.jugador.jugar(
+                pedido["puntaje_total"], pedido["puntaje_turno"], pedido["dados"]
+            )
+            respuestas.append(
+                {"id": pedido["id"], "jugada": int(jugada), "a_tirar": [int(d) for d in a_tirar]}
+            )
+        return respuestas
+
+    def responder_linea(self, linea: str | bytes) -> str:
+        return json.dumps({"respuestas": self.responder(json.loads(linea)["pedidos"])})
+
+
+class ClienteEnProceso(ClienteJugador):
+    def __init__(self, adaptador: AdaptadorJugador, tamano_lote: int = 512, timeout: float = 1.0):
+        """Cliente de un jugador en el mismo proceso: los lotes se contestan
+        con el adaptador directamente, sin red ni JSON. Sirve para probar el
+        torneo y para comparar contra los jugadores propios.
+        """
+        super().__init__(tamano_lote, timeout)
+        self.adaptador: AdaptadorJugador = adaptador
+
+    async def _enviar(self, lote: list[dict]) -> None:
+        self._resolver(self.adaptador.responder(lote))
+
+
+class ClienteJSON(ClienteJugador):
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        proceso: asyncio.subprocess.Process | None = None,
+        tamano_lote: int = 512,
+        timeout: float = 1.0,
+    ):
+        """Cliente de un bot que habla el protocolo por un socket o un pipe.
+        Una tarea manda los lotes y otra lee las respuestas a medida que
+        llegan, así que puede haber varios lotes en camino.
+        """
+        super().__init__(tamano_lote, timeout)
+        self.lineas_invalidas: int = 0
+        self._reader = reader
+        self._writer = writer
+        self._proceso = proceso
+
+    def _iniciar(self) -> list[asyncio.Task]:
+        return super()._iniciar() + [asyncio.create_task(self._leer())]
+
+    async def _enviar(self, lote: list[dict]) -> None:
+        self._writer.write(json.dumps({"pedidos": lote}).encode() + b"\n")
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self._writer.drain()
+        except TimeoutError:
+            # El bot no está leyendo: el lote queda en el buffer y sus
+            # pedidos vencen solos; se sigue con el próximo.
+            pass
+
+    async def _leer(self) -> None:
+        try:
+            while linea := await self._reader.readline():
+                try:
+                    respuestas = json.loads(linea)["respuestas"]
+                except (ValueError, KeyError, TypeError):
+                    # Los pedidos de esa línea se pierden y vencen por tiempo.
+                    self.lineas_invalidas += 1
+                    continue
+                self._resolver(respuestas)
+        except Exception as error:
+            self._fallar(error)
+        else:
+            self._fallar(ConnectionError("El bot cerró la conexión"))
+
+    async def cerrar(self) -> None:
+        await super().cerrar()
+        self._writer.close()
+        if self._proceso is not None:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    await self._proceso.wait()
+            except TimeoutError:
+                self._proceso.kill()
+                await self._proceso.wait()
+
+
+def crear_jugador(especificacion: str) -> Jugador:
+    ''' Jugador de este repo por nombre: aleatorio, plantarse o el archivo de
+        una política entrenada (template.JugadorEntrenado).
+    '''
+    if especificacion == "aleatorio":
+        return JugadorAleatorio("random")
+    if especificacion == "plantarse":
+        return JugadorSiempreSePlanta("plantón")
+    from template import JugadorEntrenado
+
+    return JugadorEntrenado(especificacion, especificacion)
+
+
+# Las respuestas de los bots pueden traer líneas de hasta 16 MB.
+_LIMITE_LINEA: int = 1 << 24
+
+
+async def conectar(direccion: str, tamano_lote: int = 512, timeout: float = 1.0) -> ClienteJugador:
+    """Cliente para un bot según su dirección (ver el comienzo del módulo)."""
+    (tipo, _, resto) = direccion.partition(":")
+    if tipo == "local":
+        return ClienteEnProceso(AdaptadorJugador(crear_jugador(resto)), tamano_lote, timeout)
+    if tipo == "unix":
+        (reader, writer) = await asyncio.open_unix_connection(resto, limit=_LIMITE_LINEA)
+        return ClienteJSON(reader, writer, tamano_lote=tamano_lote, timeout=timeout)
+    if tipo == "tcp":
+        (host, _, puerto) = resto.rpartition(":")
+        (reader, writer) = await asyncio.open_connection(host, int(puerto), limit=_LIMITE_LINEA)
+        return ClienteJSON(reader, writer, tamano_lote=tamano_lote, timeout=timeout)
+    if tipo == "cmd":
+        proceso = await asyncio.create_subprocess_exec(
+            *shlex.split(resto),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=_LIMITE_LINEA,
+        )
+        return ClienteJSON(proceso.stdout, proceso.stdin, proceso, tamano_lote, timeout)
+    raise ValueError(f"Dirección de bot inválida: {direccion}")
+
+
+class Metricas:
+    def __init__(self):
+        """Cuentas de las jugadas de un participante."""
+        self.decisiones: int = 0
+        self.vencidas: int = 0
+        self.invalidas: int = 0
+        self.duracion: float = 0.0
+
+    def resumen(self, cliente: ClienteJugador) -> dict:
+        """Cuentas, lotes, decisiones por segundo y latencias en ms."""
+        latencias = np.array(cliente.latencias) * 1000 if cliente.latencias else np.full(1, np.nan)
+        return {
+            "decisiones": self.decisiones,
+            "vencidas": self.vencidas,
+            "invalidas": self.invalidas,
+            "lotes": cliente.lotes,
+            "decisiones_por_lote": cliente.enviados / max(cliente.lotes, 1),
+            "decisiones_por_segundo": self.decisiones / self.duracion if self.duracion else 0.0,
+            "latencia_ms": dict(zip(["p50", "p90", "p99", "max"], np.percentile(latencias, [50, 90, 99, 100]).tolist())),
+        }
+
+
+def _puntaje_guardado(tirados: list[int], a_tirar: object) -> int | None:
+    ''' Puntaje de los dados que se guardan al tirar a_tirar de nuevo, o None
+        si la jugada no vale: a_tirar tiene que salir de los dados tirados y
+        los que se guardan tienen que puntuar todos.
+    '''
+    if not isinstance(a_tirar, list) or not all(type(d) is int and 1 <= d <= 6 for d in a_tirar):
+        return None
+    try:
+        guardados = separar(empaquetar(tirados), empaquetar(a_tirar))
+    except ValueError:
+        return None
+    if guardados == 0:
+        return None
+    (puntaje, no_usados) = puntaje_empaquetado(guardados)
+    return puntaje if puntaje > 0 and no_usados == 0 else None
+
+
+async def _jugar_juego(
+    cliente: ClienteJugador,
+    tiradas: TiradasComunes,
+    tope_turnos: int,
+    metricas: Metricas,
+) -> int:
+    """Juega un juego como JuegoDiezMil, pidiendo cada jugada al bot. Si el
+    bot no contesta a tiempo, se planta. Si contesta una jugada que no vale
+    (que no es el entero JUGADA_PLANTARSE o JUGADA_TIRAR, o que tira dados
+    que no corresponden), pierde el turno como si la tirada no sumara, así
+    que una jugada inválida nunca le gana a una válida. Devuelve la cantidad
+    de turnos.
+    """
+    turno: int = 0
+    puntaje_total: int = 0
+    while puntaje_total < 10000 and turno < tope_turnos:
+        turno += 1
+        tiradas.inicio_turno(turno)
+        puntaje_turno: int = 0
+        cant_a_tirar: int = 6
+        while True:
+            tirados = tiradas.dados(cant_a_tirar)
+            (puntaje_tirada, _) = puntaje_y_no_usados(tirados)
+            if puntaje_tirada == 0:
+                # Pierde el turno.
+                puntaje_turno = 0
+                break
+
+            metricas.decisiones += 1
+            try:
+                (jugada, a_tirar) = await cliente.decidir(puntaje_total, puntaje_turno, tirados)
+            except TimeoutError:
+                metricas.vencidas += 1
+                (jugada, a_tirar) = (JUGADA_PLANTARSE, [])
+
+            # type() y no ==: True == 1 y 0.0 == 0, pero no son jugadas.
+            if type(jugada) is int and jugada == JUGADA_PLANTARSE:
+                puntaje_turno += puntaje_tirada
+                break
+            if type(jugada) is int and jugada == JUGADA_TIRAR:
+                puntaje = _puntaje_guardado(tirados, a_tirar)
+                if puntaje is not None:
+                    puntaje_turno += puntaje
+                    # Cuando usó todos los dados, vuelve a tirar todo.
+                    cant_a_tirar = len(a_tirar) or 6
+                    continue
+            # Jugada inválida: pierde el turno.
+            metricas.invalidas += 1
+            puntaje_turno = 0
+            break
+        puntaje_total += puntaje_turno
+    return turno
+
+
+async def _jugar_participante(
+    cliente: ClienteJugador,
+    cantidad_juegos: int,
+    semilla: int,
+    concurrentes: int,
+    tope_turnos: int,
+) -> tuple[np.ndarray, Metricas]:
+    """Juega los juegos del torneo con un bot, de a concurrentes a la vez."""
+    metricas = Metricas()
+    turnos = np.zeros(cantidad_juegos, dtype=np.int64)
+    juegos = iter(range(cantidad_juegos))
+
+    async def jugar_siguientes() -> None:
+        for juego in juegos:
+            turnos[juego] = await _jugar_juego(
+                cliente, TiradasComunes(semilla, juego), tope_turnos, metricas
+            )
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(jugar_siguientes() for _ in range(min(concurrentes, cantidad_juegos))))
+    metricas.duracion = time.perf_counter() - inicio
+    return (turnos, metricas)
+
+
+async def correr_torneo(
+    bots: dict[str, str],
+    cantidad_juegos: int,
+    semilla: int = 0,
+    concurrentes: int = 1000,
+    timeout: float = 1.0,
+    tope_turnos: int = 1000,
+    tamano_lote: int = 512,
+    nivel: float = 0.95,
+) -> dict:
+    """Hace jugar a cada bot los mismos cantidad_juegos juegos, con los mismos
+    dados (ver evaluacion.TiradasComunes), todos a la vez: cada bot tiene
+    concurrentes juegos en curso y sus pedidos de jugada se mandan en lotes.
+    Gana el que termina en menos turnos.
+
+    Args:
+        bots (dict[str, str]): Dirección de cada bot por nombre.
+        cantidad_juegos (int): Juegos de cada bot.
+        semilla (int, optional): Semilla de los dados. Defaults to 0.
+        concurrentes (int, optional): Juegos en curso por bot. Defaults to 1000.
+        timeout (float, optional): Segundos para contestar cada jugada,
+            desde que se pide; si no, se planta. Una jugada inválida pierde
+            el turno. Defaults to 1.0.
+        tope_turnos (int, optional): Tope de turnos de cada juego. Defaults to 1000.
+        tamano_lote (int, optional): Máximo de pedidos por lote. Defaults to 512.
+        nivel (float, optional): Nivel de confianza. Defaults to 0.95.
+
+    Returns:
+        dict: "evaluacion" como evaluacion.evaluar_jugadores, "metricas" de
+        cada bot (cuentas, lotes, decisiones por segundo y latencias en ms) y
+        "duracion" y "decisiones_por_segundo" del torneo entero.
+    """
+    clientes: dict[str, ClienteJugador] = {}
+    try:
+        for nombre, direccion in bots.items():
+            clientes[nombre] = await conectar(direccion, tamano_lote, timeout)
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(
+            *(
+                _jugar_participante(cliente, cantidad_juegos, semilla, concurrentes, tope_turnos)
+                for cliente in clientes.values()
+            )
+        )
+        duracion = time.perf_counter() - inicio
+    finally:
+        for cliente in clientes.values():
+            await cliente.cerrar()
+
+    turnos = {nombre: t for nombre, (t, _) in zip(clientes, resultados)}
+    metricas = {nombre: m.resumen(clientes[nombre]) for nombre, (_, m) in zip(clientes, resultados)}
+    return {
+        "evaluacion": _resumir(turnos, NormalDist().inv_cdf((1 + nivel) / 2)),
+        "metricas": metricas,
+        "duracion": duracion,
+        "decisiones_por_segundo": sum(m["decisiones"] for m in metricas.values()) / duracion,
+    }
+
+
+def imprimir_metricas(resultado: dict) -> None:
+    print(f"Duración: {resultado['duracion']:.2f} s, {resultado['decisiones_por_segundo']:.0f} decisiones/s")
+    print(
+        f"{'nombre':30} {'decisiones':>10} {'dec/s':>8} {'dec/lote':>8} "
+        f"{'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'vencidas':>8} {'inválidas':>9}"
+    )
+    for nombre, datos in resultado["metricas"].items():
+        latencia = datos["latencia_ms"]
+        print(
+            f"{nombre:30} {datos['decisiones']:10d} {datos['decisiones_por_segundo']:8.0f} "
+            f"{datos['decisiones_por_lote']:8.1f} {latencia['p50']:7.2f} {latencia['p90']:7.2f} "
+            f"{latencia['p99']:7.2f} {datos['vencidas']:8d} {datos['invalidas']:9d}"
+        )
+
+
+def servir_stdio(adaptador: AdaptadorJugador) -> None:
+    ''' Bot por entrada y salida estándar (para direcciones cmd:). '''
+    for linea in sys.stdin:
+        sys.stdout.write(adaptador.responder_linea(linea) + "\n")
+        sys.stdout.flush()
+
+
+async def servir_socket(adaptador: AdaptadorJugador, direccion: str) -> None:
+    """Bot en un socket unix: o tcp:, hasta que se interrumpa."""
+
+    async def atender(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while linea := await reader.readline():
+            writer.write(adaptador.responder_linea(linea).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    (tipo, _, resto) = direccion.partition(":")
+    if tipo == "unix":
+        servidor = await asyncio.start_unix_server(atender, resto, limit=_LIMITE_LINEA)
+    elif tipo == "tcp":
+        (host, _, puerto) = resto.rpartition(":")
+        servidor = await asyncio.start_server(atender, host, int(puerto), limit=_LIMITE_LINEA)
+    else:
+        raise ValueError(f"Dirección para escuchar inválida: {direccion}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Torneo de 'Diez Mil' entre bots que contestan jugadas por JSON (un mensaje por línea), con muchos juegos a la vez.")
+
+    parser.add_argument('-b', '--bot', type=str, action='append', default=[], help='Bot participante: nombre=dirección, con dirección unix:/ruta, tcp:host:puerto, cmd:comando o local:jugador (se puede repetir)')
+    parser.add_argument('-n', '--juegos', type=int, default=2000, help='Juegos de cada bot (default: 2000)')
+    parser.add_argument('-s', '--semilla', type=int, default=0, help='Semilla de los dados (default: 0)')
+    parser.add_argument('-c', '--concurrentes', type=int, default=1000, help='Juegos en curso por bot (default: 1000)')
+    parser.add_argument('-t', '--timeout', type=float, default=1.0, help='Segundos para contestar cada jugada (default: 1.0)')
+    parser.add_argument('-l', '--lote', type=int, default=512, help='Máximo de pedidos por lote (default: 512)')
+    parser.add_argument('--servir', type=str, default=None, help='En vez de correr un torneo, servir un jugador como bot: aleatorio, plantarse o un archivo de política')
+    parser.add_argument('--escuchar', type=str, default=None, help='Con --servir, escuchar en unix:/ruta o tcp:host:puerto en vez de la entrada estándar')
+
+    args = parser.parse_args()
+
+    if args.servir is not None:
+        adaptador = AdaptadorJugador(crear_jugador(args.servir))
+        if args.escuchar is None:
+            servir_stdio(adaptador)
+        else:
+            asyncio.run(servir_socket(adaptador, args.escuchar))
+    else:
+        bots = dict(bot.split("=", 1) for bot in args.bot) or {
+            "aleatorio": "local:aleatorio",
+            "plantarse": "local:plantarse",
+        }
+        resultado = asyncio.run(
+            correr_torneo(
+                bots,
+                args.juegos,
+                semilla=args.semilla,
+                concurrentes=args.concurrentes,
+                timeout=args.timeout,
+                tamano_lote=args.lote,
+            )
+        )
+        imprimir_evaluacion(resultado["evaluacion"])
+        print()
+        imprimir_metricas(resultado)
@@ -0,0 +1,219 @@
+import hashlib
+import os
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from math import factorial
+import numpy as np
+from utils import _TABLA_PUNTAJES, puntaje_y_no_usados
+
+VERSION_TRANSICIONES: int = 1
+
+
+def _archivo_cache_por_defecto() -> str | None:
+    ''' Archivo del modelo en disco si se pidió con $DIEZMIL_CACHE (un
+        directorio), o None para no usar disco.
+    '''
+    directorio = os.environ.get("DIEZMIL_CACHE")
+    if not directorio:
+        return None
+    return os.path.join(directorio, "transiciones.npz")
+
+
+def _huella_reglas() -> str:
+    ''' Hash de la tabla de puntajes, para no usar un modelo guardado con
+        otras reglas.
+    '''
+    texto = repr(sorted(_TABLA_PUNTAJES.items()))
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def multiconjuntos(cant_dados: int) -> list[tuple[tuple[int, ...], int]]:
+    ''' Cada multiconjunto de cant_dados dados (como tupla ordenada) y de
+        cuántas de las 6**cant_dados tiradas sale (coeficiente multinomial).
+        Ejemplo: multiconjuntos(2)[:2] --> [((1, 1), 1), ((1, 2), 2)]
+    '''
+    resultado: list[tuple[tuple[int, ...], int]] = []
+    for ds in combinations_with_replacement(range(1, 7), cant_dados):
+        formas: int = factorial(cant_dados)
+        for cara in set(ds):
+            formas //= factorial(ds.count(cara))
+        resultado.append((ds, formas))
+    return resultado
+
+
+def _calcular_distribucion(cant_dados: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ''' Distribución exacta de tirar cant_dados dados, recorriendo los
+        multiconjuntos. Devuelve el puntaje, la cantidad de dados no usados y
+        de cuántas de las 6**cant_dados tiradas sale cada resultado distinto.
+        Ejemplo: _calcular_distribucion(1) --> ([0, 50, 100], [1, 0, 0], [4, 1, 1])
+    '''
+    formas_por_resultado: dict[tuple[int, int], int] = {}
+    for ds, formas in multiconjuntos(cant_dados):
+        (puntaje, no_usados) = puntaje_y_no_usados(list(ds))
+        resultado = (puntaje, len(no_usados))
+        formas_por_resultado[resultado] = formas_por_resultado.get(resultado, 0) + formas
+    resultados = sorted(formas_por_resultado)
+    return (
+        np.array([puntaje for (puntaje, _) in resultados]),
+        np.array([cant for (_, cant) in resultados]),
+        np.array([formas_por_resultado[r] for r in resultados]),
+    )
+
+
+def tablas_alias(probabilidades: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    ''' Tablas del método de alias (Vose) para una distribución discreta: se
+        elige una columna i uniforme y se devuelve i con probabilidad
+        aceptar[i], o alias[i] si no.
+    '''
+    cantidad = len(probabilidades)
+    escaladas = list(probabilidades * cantidad)
+    aceptar = np.ones(cantidad)
+    alias = np.arange(cantidad)
+    chicos = [i for i, p in enumerate(escaladas) if p < 1]
+    grandes = [i for i, p in enumerate(escaladas) if p >= 1]
+    while chicos and grandes:
+        (chico, grande) = (chicos.pop(), grandes.pop())
+        aceptar[chico] = escaladas[chico]
+        alias[chico] = grande
+        escaladas[grande] -= 1 - escaladas[chico]
+        (chicos if escaladas[grande] < 1 else grandes).append(grande)
+    # Lo que queda tiene probabilidad 1 salvo error de redondeo.
+    return (aceptar, alias)
+
+
+class ModeloTransiciones:
+    def __init__(self, distribuciones: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        """Modelo exacto de una tirada para cada cantidad de dados (1 a 6):
+        qué puntaje y cuántos dados no usados salen y con qué probabilidad.
+        Permite calcular esperanzas exactas y muestrear el resultado de una
+        tirada con un solo número al azar (método de alias), sin tirar ni
+        puntuar dados. Se obtiene con modelo().
+
+        Los arreglos por cantidad de dados se indexan con cant_dados de 0 a 6,
+        donde 0 quiere decir tirar los 6 (como en el juego cuando se usaron
+        todos).
+
+        Args:
+            distribuciones (dict): Para cada cantidad de dados, el puntaje, los
+                dados no usados y las formas de cada resultado (ver
+                _calcular_distribucion).
+        """
+        self.puntajes: list[np.ndarray] = []
+        self.no_usados: list[np.ndarray] = []
+        self.probabilidades: list[np.ndarray] = []
+        for cant_dados in range(7):
+            (puntajes, no_usados, formas) = distribuciones[cant_dados or 6]
+            self.puntajes.append(puntajes)
+            self.no_usados.append(no_usados)
+            self.probabilidades.append(formas / 6 ** (cant_dados or 6))
+        # Probabilidad de perder el turno y puntaje esperado de una tirada.
+        self.prob_perder = np.array([p[s == 0].sum() for s, p in zip(self.puntajes, self.probabilidades)])
+        self.puntaje_esperado = np.array([(s * p).sum() for s, p in zip(self.puntajes, self.probabilidades)])
+
+        # Tablas de alias rellenadas hasta la mayor cantidad de resultados;
+        # las columnas de más nunca se eligen.
+        columnas = max(len(p) for p in self.probabilidades)
+        self._tamanos = np.array([len(p) for p in self.probabilidades])
+        self._aceptar = np.ones((7, columnas))
+        self._alias = np.zeros((7, columnas), dtype=np.int64)
+        self._puntajes = np.zeros((7, columnas), dtype=np.int64)
+        self._no_usados = np.zeros((7, columnas), dtype=np.int64)
+        for cant_dados in range(7):
+            tamano = self._tamanos[cant_dados]
+            (aceptar, alias) = tablas_alias(self.probabilidades[cant_dados])
+            self._aceptar[cant_dados, :tamano] = aceptar
+            self._alias[cant_dados, :tamano] = alias
+            self._puntajes[cant_dados, :tamano] = self.puntajes[cant_dados]
+            self._no_usados[cant_dados, :tamano] = self.no_usados[cant_dados]
+        # Versiones en listas para muestrear_uno, sin escalares de numpy.
+        self._listas = [
+            (
+                int(self._tamanos[n]),
+                self._aceptar[n].tolist(),
+                self._alias[n].tolist(),
+                list(zip(self._puntajes[n].tolist(), self._no_usados[n].tolist())),
+            )
+            for n in range(7)
+        ]
+
+    def distribucion(self, cant_dados: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Puntaje, dados no usados y probabilidad de cada resultado distinto
+        de tirar cant_dados dados (0 es tirar los 6). Incluye el de puntaje 0.
+        Ejemplo: distribucion(1) --> ([0, 50, 100], [1, 0, 0], [4/6, 1/6, 1/6])
+        """
+        return (self.puntajes[cant_dados], self.no_usados[cant_dados], self.probabilidades[cant_dados])
+
+    def muestrear(
+        self, cant_dados: np.ndarray, uniformes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Resultado de una tirada por elemento de cant_dados, a partir de un
+        uniforme en [0, 1) por tirada. Devuelve el puntaje y la cantidad de
+        dados no usados de cada una.
+        """
+        escalados = uniformes * self._tamanos[cant_dados]
+        columnas = escalados.astype(np.int64)
+        acepta = (escalados - columnas) < self._aceptar[cant_dados, columnas]
+        columnas = np.where(acepta, columnas, self._alias[cant_dados, columnas])
+        return (self._puntajes[cant_dados, columnas], self._no_usados[cant_dados, columnas])
+
+    def muestrear_uno(self, cant_dados: int, uniforme: float) -> tuple[int, int]:
+        """Como muestrear, para una sola tirada y con enteros de Python."""
+        (tamano, aceptar, alias, resultados) = self._listas[cant_dados]
+        escalado = uniforme * tamano
+        columna = int(escalado)
+        if escalado - columna >= aceptar[columna]:
+            columna = alias[columna]
+        return resultados[columna]
+
+
+def guardar_modelo(distribuciones: dict, filename: str) -> None:
+    ''' Guarda las distribuciones en un .npz, escribiendo a un temporal y
+        renombrándolo para no dejar nunca un archivo a medio escribir.
+    '''
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    arreglos = {"version": VERSION_TRANSICIONES, "huella": _huella_reglas()}
+    for cant_dados, (puntajes, no_usados, formas) in distribuciones.items():
+        arreglos[f"puntajes_{cant_dados}"] = puntajes
+        arreglos[f"no_usados_{cant_dados}"] = no_usados
+        arreglos[f"formas_{cant_dados}"] = formas
+    temporal = f"{filename}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as archivo:
+        np.savez(archivo, **arreglos)
+    os.replace(temporal, filename)
+
+
+def _leer_modelo(filename: str) -> dict | None:
+    ''' Distribuciones guardadas, o None si no hay archivo o es de otra
+        versión o de otras reglas.
+    '''
+    try:
+        with np.load(filename) as datos:
+            if int(datos["version"]) != VERSION_TRANSICIONES or str(datos["huella"]) != _huella_reglas():
+                return None
+            return {
+                n: (datos[f"puntajes_{n}"], datos[f"no_usados_{n}"], datos[f"formas_{n}"])
+                for n in range(1, 7)
+            }
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def modelo(filename: str | None = None) -> ModeloTransiciones:
+    """El modelo de transiciones, calculado una sola vez por proceso. Por
+    defecto se arma en memoria; si se da filename (o $DIEZMIL_CACHE, el
+    directorio donde guardar transiciones.npz), se lee de ahí o, si no está o
+    no corresponde a estas reglas, se calcula y se guarda ahí. Si no se puede
+    escribir, se usa igual.
+    """
+    if filename is None:
+        filename = _archivo_cache_por_defecto()
+    distribuciones = None if filename is None else _leer_modelo(filename)
+    if distribuciones is None:
+        distribuciones = {n: _calcular_distribucion(n) for n in range(1, 7)}
+        if filename is not None:
+            try:
+                guardar_modelo(distribuciones, filename)
+            except OSError:
+                pass
+    return ModeloTransiciones(distribuciones)
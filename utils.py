@@ -1,3 +1,5 @@
+from itertools import combinations_with_replacement
+
 PUNTAJE_ESCALERA: int = 3000
 PUNTAJE_3_PARES: int = 1500
 PUNTAJE_6_IGUALES: int = 10000
@@ -16,6 +18,16 @@ def puntaje_y_no_usados(ds: list[int]) -> tuple[int, list[int]]:
         Precondición: len(ds)>0
         Ejemplo: para [2,1,3,1,4,5], devuelve (250, [2,3,4]) porque 100+100+50
         y no se usaron los dados 2, 3, 4.
+        Usa la tabla precalculada _TABLA_PUNTAJES, indexada por la tirada
+        ordenada.
+    '''
+    (puntaje, no_usados) = _TABLA_PUNTAJES[tuple(sorted(ds))]
+    return (puntaje, list(no_usados))
+
+
+def _calcular_puntaje_y_no_usados(ds: list[int]) -> tuple[int, list[int]]:
+    ''' Cálculo directo de puntaje_y_no_usados, sin tabla. Se usa para armar
+        _TABLA_PUNTAJES.
     '''
     # Dejo en cants las veces que salió cada número.
     cants: dict[int, int] = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 6: 0}
@@ -50,6 +62,21 @@ def puntaje_y_no_usados(ds: list[int]) -> tuple[int, list[int]]:
     return (puntaje, sorted(no_usados))
 
 
+def _armar_tabla_puntajes() -> dict[tuple[int, ...], tuple[int, tuple[int, ...]]]:
+    ''' Calcula puntaje y dados no usados para cada multiconjunto de 1 a 6
+        dados (923 en total), indexados por la tupla ordenada de dados.
+    '''
+    tabla: dict[tuple[int, ...], tuple[int, tuple[int, ...]]] = {}
+    for cant_dados in range(1, 7):
+        for ds in combinations_with_replacement(range(1, 7), cant_dados):
+            (puntaje, no_usados) = _calcular_puntaje_y_no_usados(list(ds))
+            tabla[ds] = (puntaje, tuple(no_usados))
+    return tabla
+
+
+_TABLA_PUNTAJES = _armar_tabla_puntajes()
+
+
 def separar(xs: list[int], ys: list[int]) -> list[int]:
     ''' Devuelve la lista resultante de eliminar la primera instancia en xs 
         de cada elemento de ys.
@@ -1,11 +1,53 @@
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
 import unittest
+from functools import partial
+from itertools import product
+import numpy as np
 from utils import (
     puntaje_y_no_usados,
+    _calcular_puntaje_y_no_usados,
     separar,
     PUNTAJE_ESCALERA,
     PUNTAJE_3_PARES,
-    PUNTAJE_6_IGUALES
+    PUNTAJE_6_IGUALES,
+    JUGADA_PLANTARSE,
+    JUGADA_TIRAR,
 )
+import dados
+from azar import Azar
+from barrido import _parsear_parametro, barrer, espacio_aleatorio
+from checkpoints import Checkpointer, RegistroCheckpoint, cargar_checkpoint
+from estadisticas import CurvaEnLinea
+from estados import CODIFICADORES, CodificadorEstado
+from evaluacion import evaluar_jugadores, evaluar_politicas
+from eventos import EVENTO_INICIO_TURNO, MAGIA_TRAZA, OyenteTexto, TrazaBinaria
+from experimentos import acumular_replicas, correr_replicas, entrenar_replica
+from jugador import AgenteQLearning as AgenteQLearningJugador
+from jugador import ElBatoQueSoloCalculaPromedios, JugadorSiempreSePlanta
+from optimo import resolver_juego, resolver_turno
+from politicas import (
+    PASO_PUNTAJE,
+    guardar_politica,
+    leer_politica,
+    leer_politica_binaria,
+    politica_umbral,
+)
+from diezmil import JuegoDiezMil
+from diezmil import main as main_diezmil
+from simulador import DadosComunes, SimuladorDiezMil
+from template import AmbienteDiezMil, AgenteQLearning, JugadorEntrenado
+from torneo import AdaptadorJugador, ClienteEnProceso, _jugar_participante, correr_torneo
+from transiciones import _leer_modelo, modelo
+from vectorizado import ReplicasMonteCarlo, ReplicasQLearning, entrenar_vectorizado
+
+# Los tests arman el modelo de transiciones en memoria; el que escribe a
+# disco usa un directorio temporal.
+os.environ.pop("DIEZMIL_CACHE", None)
 
 class TestPuntajeYNoUsados(unittest.TestCase):
     def test_6_iguales(self):
@@ -89,6 +131,12 @@ class TestPuntajeYNoUsados(unittest.TestCase):
         self.assertEqual(puntaje_y_no_usados([5]), (50, []))
         self.assertEqual(puntaje_y_no_usados([6]), (0, [6]))
 
+    def test_tabla_igual_a_calculo_directo(self):
+        for cant_dados in range(1, 7):
+            for ds in product(range(1, 7), repeat=cant_dados):
+                self.assertEqual(puntaje_y_no_usados(list(ds)),
+                                 _calcular_puntaje_y_no_usados(list(ds)))
+
 class TestSepararDados(unittest.TestCase):
     def test_separar_0_dados(self):
         self.assertEqual(separar([1,2,3,4,5,6], []), [1,2,3,4,5,6])
@@ -118,5 +166,598 @@ class TestSepararDados(unittest.TestCase):
         self.assertEqual(separar([3,2,2], [2,2,3]), [])
         self.assertEqual(separar([3,2,1], [2,1,3]), [])
 
+class TestAzar(unittest.TestCase):
+    def test_dados_mas_que_el_buffer(self):
+        azar = Azar(0, tamano_buffer=8)
+        tirada = azar.dados(21)
+        self.assertEqual(len(tirada), 21)
+        self.assertTrue(all(1 <= d <= 6 for d in tirada))
+        self.assertEqual(len(azar.dados(3)), 3)
+
+    def test_estado_restaurar(self):
+        azar = Azar(0, tamano_buffer=16)
+        azar.spawn(2)
+        azar.dados(5)
+        azar.uniforme()
+        estado = azar.estado()
+        def usar(azar: Azar) -> list:
+            return [azar.dados(4), azar.uniforme(), azar.dados_empaquetados(6), azar.dados(20)]
+
+        siguientes = usar(azar)
+        hijo = azar.spawn(1)[0].uniforme()
+        azar.restaurar(estado)
+        self.assertEqual(usar(azar), siguientes)
+        recreado = Azar.desde_estado(estado)
+        self.assertEqual(usar(recreado), siguientes)
+        self.assertEqual(recreado.spawn(1)[0].uniforme(), hijo)
+
+class TestDadosEmpaquetados(unittest.TestCase):
+    def test_puntaje_igual_a_listas(self):
+        for cant_dados in range(1, 7):
+            for ds in product(range(1, 7), repeat=cant_dados):
+                (puntaje, no_usados) = puntaje_y_no_usados(list(ds))
+                self.assertEqual(dados.puntaje_y_no_usados(dados.empaquetar(list(ds))),
+                                 (puntaje, dados.empaquetar(no_usados)))
+
+    def test_separar(self):
+        tirada = dados.empaquetar([5,1,2,1])
+        self.assertEqual(dados.desempaquetar(dados.separar(tirada, dados.empaquetar([1,5]))), [1,2])
+        self.assertEqual(dados.separar(tirada, tirada), 0)
+        with self.assertRaises(ValueError):
+            dados.separar(tirada, dados.empaquetar([3]))
+
+class TestTransiciones(unittest.TestCase):
+    def test_probabilidades_suman_1(self):
+        for cant_dados in range(7):
+            (_, _, probabilidades) = modelo().distribucion(cant_dados)
+            self.assertAlmostEqual(probabilidades.sum(), 1.0, places=12)
+
+    def test_prob_perder_exacta(self):
+        for cant_dados in range(1, 7):
+            perdidas = sum(
+                puntaje_y_no_usados(list(ds))[0] == 0
+                for ds in product(range(1, 7), repeat=cant_dados)
+            )
+            self.assertAlmostEqual(
+                modelo().prob_perder[cant_dados], perdidas / 6 ** cant_dados, places=12
+            )
+        self.assertEqual(modelo().prob_perder[0], modelo().prob_perder[6])
+
+    def test_frecuencias_del_muestreo(self):
+        rng = np.random.default_rng(0)
+        muestras = 200_000
+        for cant_dados in range(7):
+            (puntajes, no_usados, probabilidades) = modelo().distribucion(cant_dados)
+            uniformes = rng.random(muestras)
+            (puntajes_m, no_usados_m) = modelo().muestrear(
+                np.full(muestras, cant_dados), uniformes
+            )
+            for (puntaje, cant, p) in zip(puntajes, no_usados, probabilidades):
+                frecuencia = np.mean((puntajes_m == puntaje) & (no_usados_m == cant))
+                # 5 desvíos estándar de la frecuencia observada.
+                self.assertLess(abs(frecuencia - p), 5 * np.sqrt(p * (1 - p) / muestras) + 1e-9)
+            self.assertEqual(
+                [modelo().muestrear_uno(cant_dados, u) for u in uniformes[:1000].tolist()],
+                list(zip(puntajes_m[:1000].tolist(), no_usados_m[:1000].tolist())),
+            )
+
+    def test_cache_solo_si_se_pide(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            filename = os.path.join(directorio, "transiciones.npz")
+            leido = modelo(filename)
+            self.assertIsNotNone(_leer_modelo(filename))
+            modelo.cache_clear()
+            for cant_dados in range(7):
+                for (a, b) in zip(modelo(filename).distribucion(cant_dados), leido.distribucion(cant_dados)):
+                    np.testing.assert_array_equal(a, b)
+            modelo.cache_clear()
+
+class TestTrazaBinaria(unittest.TestCase):
+    def test_guardar_cargar_reproducir(self):
+        traza = TrazaBinaria()
+        original: list[str] = []
+        jugador = ElBatoQueSoloCalculaPromedios(0.1, azar=Azar(0))
+        JuegoDiezMil(jugador, Azar(1)).jugar(oyente=traza)
+        traza.reproducir(OyenteTexto(original.append))
+        with tempfile.TemporaryDirectory() as directorio:
+            filename = os.path.join(directorio, "juego.traza")
+            traza.guardar(filename)
+            with open(filename, "rb") as archivo:
+                datos = archivo.read()
+            cargada = TrazaBinaria.cargar(filename)
+            with open(filename, "wb") as archivo:
+                archivo.write(datos[:-1])
+            with self.assertRaises(ValueError):
+                TrazaBinaria.cargar(filename)
+        # Encabezado y el primer evento (inicio del turno 1) en little-endian.
+        self.assertEqual(datos[:4], MAGIA_TRAZA)
+        self.assertEqual(datos[8:20], bytes([EVENTO_INICIO_TURNO, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0]))
+        self.assertEqual(len(datos), 8 + 4 * len(traza.eventos))
+        self.assertEqual(cargada.eventos, traza.eventos)
+        reproducido: list[str] = []
+        cargada.reproducir(OyenteTexto(reproducido.append))
+        self.assertEqual(reproducido, original)
+        self.assertGreater(len(original), 0)
+
+class TestPoliticas(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        rng = np.random.default_rng(0)
+        self.politicas = [
+            rng.integers(0, 2, size=7).astype(np.int8),
+            politica_umbral(300, 21),
+            rng.integers(0, 2, size=(5, 7, 21)).astype(np.int8),
+        ]
+
+    def test_ida_y_vuelta(self):
+        for extension in ["pol", "csv"]:
+            for politica in self.politicas:
+                filename = os.path.join(self.directorio.name, f"politica.{extension}")
+                guardar_politica(politica, filename)
+                leida = leer_politica(filename)
+                self.assertEqual(leida.shape, politica.shape)
+                np.testing.assert_array_equal(leida, politica)
+
+    def test_binaria_no_es_csv(self):
+        filename = os.path.join(self.directorio.name, "politica.csv")
+        guardar_politica(self.politicas[1], filename)
+        with self.assertRaises(ValueError):
+            leer_politica_binaria(filename)
+
+class TestSimulador(unittest.TestCase):
+    def test_igual_al_motor_escalar(self):
+        politica = politica_umbral(300, 21)
+        with tempfile.TemporaryDirectory() as directorio:
+            filename = os.path.join(directorio, "umbral.bin")
+            guardar_politica(politica, filename)
+            jugador = JugadorEntrenado("umbral", filename)
+            azar = Azar(0)
+            escalar = np.array([JuegoDiezMil(jugador, azar).jugar()[0] for _ in range(4000)])
+        simulador = SimuladorDiezMil(politica)
+        for vectorizado in (
+            simulador.jugar(40000, azar=Azar(1))[0],
+            simulador.jugar(40000, dados_comunes=DadosComunes(1))[0],
+        ):
+            error = np.sqrt(escalar.var() / escalar.size + vectorizado.var() / vectorizado.size)
+            self.assertLess(abs(escalar.mean() - vectorizado.mean()), 4 * error)
+
+    def test_dados_comunes_deterministicos(self):
+        rng = np.random.default_rng(0)
+        (juegos, turnos, tiradas) = rng.integers(0, 1000, size=(3, 500))
+        dados = DadosComunes(7).dados(juegos, turnos, tiradas)
+        self.assertTrue(((dados >= 1) & (dados <= 6)).all())
+        np.testing.assert_array_equal(DadosComunes(7).dados(juegos, turnos, tiradas), dados)
+        # Cada (juego, turno, tirada) da los mismos dados sin importar con
+        # qué otros se pidan ni en qué orden.
+        orden = rng.permutation(500)
+        np.testing.assert_array_equal(
+            DadosComunes(7).dados(juegos[orden], turnos[orden], tiradas[orden]), dados[orden]
+        )
+        np.testing.assert_array_equal(
+            DadosComunes(7).dados(juegos[3:4], turnos[3:4], tiradas[3:4]), dados[3:4]
+        )
+        self.assertFalse((DadosComunes(8).dados(juegos, turnos, tiradas) == dados).all())
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        self.filename = os.path.join(self.directorio.name, "checkpoint.pkl")
+
+    def test_retomar_agente_es_identico(self):
+        seguido = AgenteQLearning(AmbienteDiezMil(azar=Azar(0)), 0.1, 1.0, 0.1)
+        seguido.entrenar(40)
+
+        interrumpido = AgenteQLearning(AmbienteDiezMil(azar=Azar(0)), 0.1, 1.0, 0.1)
+        checkpointer = Checkpointer(self.filename, cada=20)
+        interrumpido.entrenar(20, checkpointer=checkpointer)
+        checkpointer.cerrar()
+        retomado = AgenteQLearning.desde_checkpoint(cargar_checkpoint(self.filename))
+        self.assertEqual(retomado.episodios_entrenados, 20)
+        retomado.entrenar(20)
+
+        np.testing.assert_array_equal(retomado.q_table, seguido.q_table)
+        self.assertEqual(retomado.azar.estado(), seguido.azar.estado())
+
+    def test_retomar_replicas_es_identico(self):
+        fabrica = partial(AgenteQLearningJugador, 0.1, 1.0, 0.1, 0.999)
+        seguidas = correr_replicas(fabrica, 3, 20, semilla=1, procesos=1)
+
+        # Como si el proceso hubiera muerto con la réplica 0 terminada, la 1
+        # a mitad de entrenamiento y una entrada del registro a medio escribir.
+        parametros = {"semilla": 1, "cantidad_replicas": 3, "cantidad_juegos": 20}
+        registro = RegistroCheckpoint(self.filename, parametros)
+        registro.agregar((0, seguidas[0].tolist()))
+        registro.cerrar()
+        with open(self.filename, "ab") as archivo:
+            archivo.write(b"\x80\x04\x95")
+        semilla_1 = np.random.SeedSequence(1).spawn(3)[1]
+        entrenar_replica(fabrica, 10, semilla_1, f"{self.filename}.1", juegos_por_checkpoint=5)
+
+        retomadas = correr_replicas(
+            fabrica, 3, 20, semilla=1, procesos=1, checkpoint_filename=self.filename
+        )
+        np.testing.assert_array_equal(retomadas, seguidas)
+        self.assertFalse(os.path.exists(f"{self.filename}.1"))
+        self.assertEqual(len(RegistroCheckpoint(self.filename, parametros).entradas), 3)
+        with self.assertRaises(ValueError):
+            RegistroCheckpoint(self.filename, {**parametros, "semilla": 2})
+
+    def test_retomar_bloque_es_identico(self):
+        fabrica = partial(AgenteQLearningJugador, 0.1, 1.0, 0.1, 0.999)
+        seguidas = acumular_replicas(
+            fabrica, 3, 20, semilla=1, procesos=1, replicas_por_bloque=2, ventana=10
+        )
+        # Réplica 1 del bloque 0 a mitad de entrenamiento.
+        semilla_1 = np.random.SeedSequence(1).spawn(3)[1]
+        entrenar_replica(fabrica, 10, semilla_1, f"{self.filename}.bloque0.1")
+        retomadas = acumular_replicas(
+            fabrica, 3, 20, semilla=1, procesos=1, checkpoint_filename=self.filename,
+            replicas_por_bloque=2, ventana=10,
+        )
+        np.testing.assert_array_equal(retomadas.medias, seguidas.medias)
+        np.testing.assert_array_equal(retomadas.varianzas(), seguidas.varianzas())
+        self.assertEqual(os.listdir(self.directorio.name), ["checkpoint.pkl"])
+
+class TestCurvaEnLinea(unittest.TestCase):
+    def test_combinar_igual_a_arreglo_completo(self):
+        turnos = np.random.default_rng(0).integers(10, 60, size=(13, 250))
+        partes = [CurvaEnLinea(250, ventana=50) for _ in range(3)]
+        for (i, curva) in enumerate(turnos):
+            partes[i % 3].agregar_replica(curva)
+        total = CurvaEnLinea(250, ventana=50)
+        for parte in partes:
+            total.combinar(parte)
+        np.testing.assert_array_equal(total.cantidades, np.full(250, 13))
+        np.testing.assert_allclose(total.medias, turnos.mean(axis=0))
+        np.testing.assert_allclose(total.varianzas(), turnos.var(axis=0, ddof=1))
+        np.testing.assert_allclose(
+            total.medias_por_ventana(), turnos.reshape(13, 5, 50).mean(axis=(0, 2))
+        )
+
+    def test_combinar_curva_vacia(self):
+        curva = CurvaEnLinea(4, ventana=2)
+        curva.agregar_replica([20, 21, 22, 23])
+        curva.agregar_replica([30, 31, 32, 33])
+        vacia = CurvaEnLinea(4, ventana=2)
+        vacia.combinar(curva)
+        curva.combinar(CurvaEnLinea(4, ventana=2))
+        for resultado in (vacia, curva):
+            np.testing.assert_allclose(resultado.medias, [25, 26, 27, 28])
+            np.testing.assert_allclose(resultado.varianzas(), np.full(4, 50.0))
+
+class TestReplicas(unittest.TestCase):
+    def test_igual_para_cualquier_cantidad_de_procesos(self):
+        fabrica = partial(ElBatoQueSoloCalculaPromedios, 0.1)
+        curvas = correr_replicas(fabrica, 5, 30, semilla=2, procesos=1)
+        np.testing.assert_array_equal(
+            correr_replicas(fabrica, 5, 30, semilla=2, procesos=2), curvas
+        )
+        for procesos in [1, 2]:
+            estadisticas = acumular_replicas(
+                fabrica, 5, 30, semilla=2, procesos=procesos, replicas_por_bloque=2, ventana=10
+            )
+            np.testing.assert_allclose(estadisticas.medias, curvas.mean(axis=0))
+            np.testing.assert_allclose(estadisticas.varianzas(), curvas.var(axis=0, ddof=1))
+
+class TestVectorizado(unittest.TestCase):
+    def test_rechaza_opciones_que_no_usa(self):
+        for opciones in ({"perfilar": True}, {"pstats_filename": "x"}, {"checkpoint_filename": "x"}):
+            with self.assertRaises(ValueError):
+                main_diezmil(vectorizado=True, **opciones)
+
+    def test_igual_al_aprendiz_escalar(self):
+        # Distintos números al azar: se comparan los turnos medios de los
+        # últimos 100 juegos de 40 réplicas, dentro de 4 errores estándar.
+        aprendices = [
+            (partial(ElBatoQueSoloCalculaPromedios, 0.01), ReplicasMonteCarlo(40, 0.01)),
+            (
+                partial(AgenteQLearningJugador, 0.1, 0.99, 0.1, 0.999),
+                ReplicasQLearning(40, 0.1, 0.99, 0.1, 0.999),
+            ),
+        ]
+        for (fabrica, replicas) in aprendices:
+            escalar = correr_replicas(fabrica, 40, 300, semilla=0, procesos=1)
+            vectorizado = entrenar_vectorizado(replicas, 300, azar=Azar(0))
+            self.assertEqual(vectorizado.shape, escalar.shape)
+            (a, b) = (escalar[:, -100:].mean(axis=1), vectorizado[:, -100:].mean(axis=1))
+            error = np.sqrt(a.var(ddof=1) / a.size + b.var(ddof=1) / b.size)
+            self.assertLess(abs(a.mean() - b.mean()), 4 * error)
+
+class TestEvaluacionPoliticas(unittest.TestCase):
+    def test_reproducible(self):
+        politicas = {"300": politica_umbral(300, 21), "400": politica_umbral(400, 21)}
+        resultado = evaluar_politicas(politicas, semilla=3, max_juegos=3000, precision=0.0)
+        self.assertEqual(resultado["juegos"], 3000)
+        for procesos in [1, 2]:
+            self.assertEqual(
+                evaluar_politicas(
+                    politicas, semilla=3, max_juegos=3000, precision=0.0, procesos=procesos
+                ),
+                resultado,
+            )
+        self.assertNotEqual(
+            evaluar_politicas(politicas, semilla=4, max_juegos=3000, precision=0.0), resultado
+        )
+
+class TestOptimo(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        (cls.politica_turno, cls.valores_turno) = resolver_turno()
+        (cls.politica_juego, cls.turnos_restantes) = resolver_juego()
+
+    def test_puntaje_esperado_por_turno(self):
+        self.assertAlmostEqual(self.valores_turno[0, 0], 535.45, delta=0.005)
+        # Se planta sólo donde plantarse vale al menos lo mismo que tirar,
+        # y a partir de ahí sigue plantándose.
+        plantarse = self.politica_turno == JUGADA_PLANTARSE
+        puntajes = np.broadcast_to(
+            np.arange(plantarse.shape[1]) * PASO_PUNTAJE, plantarse.shape
+        )
+        np.testing.assert_array_equal(self.valores_turno[plantarse], puntajes[plantarse])
+        primeros = plantarse.argmax(axis=1)
+        self.assertTrue(all(plantarse[c, primeros[c]:].all() for c in range(7)))
+        # Con 1 a 5 dados por tirar.
+        self.assertEqual(list(primeros[1:6] * PASO_PUNTAJE), [300, 250, 450, 1000, 2950])
+
+    def test_nunca_se_planta_sin_puntos(self):
+        # Toda decisión viene de una tirada que sumó al menos PASO_PUNTAJE:
+        # plantarse con menos no es una jugada legal.
+        self.assertTrue((self.politica_turno[:, 0] == JUGADA_TIRAR).all())
+        self.assertTrue((self.politica_juego[:, :, 0] == JUGADA_TIRAR).all())
+        self.assertTrue(np.isin(self.politica_juego, [JUGADA_PLANTARSE, JUGADA_TIRAR]).all())
+
+    def test_turnos_esperados_politica_optima(self):
+        self.assertAlmostEqual(self.turnos_restantes[0], 19.71, delta=0.005)
+        resultado = evaluar_politicas(
+            {"optima": self.politica_juego}, max_juegos=20000, precision=0.0
+        )
+        (bajo, alto) = resultado["resultados"]["optima"]["intervalo"]
+        self.assertLess(bajo, self.turnos_restantes[0])
+        self.assertLess(self.turnos_restantes[0], alto)
+
+class TestEvaluacionJugadores(unittest.TestCase):
+    def test_reproducible(self):
+        fabricas = {
+            "planta": partial(JugadorSiempreSePlanta, "planta"),
+            "promedios": partial(ElBatoQueSoloCalculaPromedios, 0.1),
+        }
+        resultado = evaluar_jugadores(fabricas, 200, semilla=5)
+        self.assertEqual(evaluar_jugadores(fabricas, 200, semilla=5, procesos=2), resultado)
+        self.assertNotEqual(evaluar_jugadores(fabricas, 200, semilla=6), resultado)
+
+    def test_mismo_jugador_mismos_dados(self):
+        # Con los mismos dados y el mismo azar propio, dos copias de un
+        # jugador que aprende juegan exactamente igual.
+        fabricas = {
+            "a": partial(ElBatoQueSoloCalculaPromedios, 0.1),
+            "b": partial(ElBatoQueSoloCalculaPromedios, 0.1),
+        }
+        diferencia = evaluar_jugadores(fabricas, 200, semilla=5)["diferencias"][("b", "a")]
+        self.assertEqual(diferencia["igual"], 1.0)
+        self.assertEqual(diferencia["media"], 0.0)
+
+class TestBarrido(unittest.TestCase):
+    def test_parsear_parametro(self):
+        self.assertEqual(_parsear_parametro("n=500,1000"), ("n", [500, 1000]))
+        self.assertEqual(_parsear_parametro("alpha=0.1,1e-2"), ("alpha", [0.1, 0.01]))
+        self.assertEqual(_parsear_parametro("x=True,False"), ("x", [True, False]))
+        self.assertEqual(_parsear_parametro("epsilon=0:1"), ("epsilon", (0.0, 1.0, False, False)))
+        self.assertEqual(_parsear_parametro("alpha=log:0.01:0.5"), ("alpha", (0.01, 0.5, True, False)))
+        self.assertEqual(_parsear_parametro("n=10:20:int"), ("n", (10.0, 20.0, False, True)))
+        self.assertEqual(_parsear_parametro("n=log:100:10000:int"), ("n", (100.0, 10000.0, True, True)))
+        with self.assertRaises(ValueError):
+            _parsear_parametro("n=1:2:3")
+
+    def test_espacio_aleatorio(self):
+        rangos = {
+            "epsilon": (0.0, 1.0, False, False),
+            "alpha": (0.01, 0.5, True, False),
+            "n": (10.0, 12.0, False, True),
+            "m": (100.0, 10000.0, True, True),
+        }
+        configuraciones = espacio_aleatorio(rangos, 300, semilla=0)
+        self.assertEqual(espacio_aleatorio(rangos, 300, semilla=0), configuraciones)
+        epsilons = [c["epsilon"] for c in configuraciones]
+        self.assertTrue(all(0 <= e <= 1 for e in epsilons))
+        self.assertGreater(len(set(epsilons)), 2)
+        self.assertTrue(all(0.01 <= c["alpha"] <= 0.5 for c in configuraciones))
+        self.assertEqual({c["n"] for c in configuraciones}, {10, 11, 12})
+        self.assertTrue(all(type(c["m"]) is int and 100 <= c["m"] <= 10000 for c in configuraciones))
+
+    def test_barrido_de_punta_a_punta(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        filename = os.path.join(directorio.name, "barrido.sqlite")
+        # La repetida se corre una sola vez.
+        configuraciones = [{"epsilon": 0.05}, {"epsilon": 0.3}, {"epsilon": 0.05}, {"epsilon": 0.1}]
+        argumentos = dict(juegos_iniciales=10, eta=2, peldanos=2, replicas=2, semilla=0, procesos=1)
+        ranking = barrer("ElBatoQueSoloCalculaPromedios", configuraciones, filename, **argumentos)
+        self.assertEqual(len(ranking), 1)
+
+        # El segundo peldaño sigue entrenando las réplicas del primero: da lo
+        # mismo que entrenar 20 juegos desde cero.
+        (mejor, metrica) = ranking[0]
+        curvas = [
+            entrenar_replica(partial(ElBatoQueSoloCalculaPromedios, **mejor), 20, s)
+            for s in np.random.SeedSequence(0).spawn(2)
+        ]
+        self.assertAlmostEqual(metrica, np.mean([np.mean(c[-4:]) for c in curvas]))
+
+        def filas():
+            conexion = sqlite3.connect(filename)
+            try:
+                return conexion.execute("SELECT COUNT(*) FROM ensayos").fetchone()[0]
+            finally:
+                conexion.close()
+
+        self.assertEqual(filas(), 4)
+        # Retomado: usa la base y no corre nada.
+        self.assertEqual(
+            barrer("ElBatoQueSoloCalculaPromedios", configuraciones, filename, **argumentos), ranking
+        )
+        self.assertEqual(filas(), 4)
+        # Con otra fracción final son otros ensayos.
+        barrer(
+            "ElBatoQueSoloCalculaPromedios", configuraciones, filename, fraccion_final=0.5, **argumentos
+        )
+        self.assertEqual(filas(), 8)
+
+class TestCodificadorEstado(unittest.TestCase):
+    def test_indices_unicos_y_en_rango(self):
+        for nombre, codificador in CODIFICADORES.items():
+            niveles: dict[int, tuple] = {}
+            for cant_dados in range(7):
+                for turno in range(0, 1550, 50):
+                    for total in range(0, 10050, 50):
+                        indice = codificador.indice(cant_dados, turno, total)
+                        nivel = (
+                            cant_dados,
+                            sum(corte <= turno for corte in codificador.cortes_turno),
+                            sum(corte <= total for corte in codificador.cortes_total),
+                            codificador.alcanza_para_ganar and turno + total >= 10000,
+                        )
+                        # El mismo índice es siempre el mismo nivel, y al revés.
+                        self.assertEqual(niveles.setdefault(indice, nivel), nivel, nombre)
+            self.assertEqual(len(set(niveles.values())), len(niveles), nombre)
+            self.assertTrue(all(0 <= indice < codificador.cant_estados for indice in niveles), nombre)
+            if not codificador.alcanza_para_ganar:
+                # Con alcanza_para_ganar hay combinaciones imposibles, como
+                # llegar a 10000 con poco total y poco turno.
+                self.assertEqual(len(niveles), codificador.cant_estados, nombre)
+
+    def test_alcanza_para_ganar(self):
+        codificador = CodificadorEstado(cortes_total=[5000], alcanza_para_ganar=True)
+        self.assertEqual(codificador.indice(2, 300, 9650) % 2, 0)
+        self.assertEqual(codificador.indice(2, 350, 9650) % 2, 1)
+        self.assertEqual(codificador.indice(2, 400, 9650) % 2, 1)
+        self.assertEqual(codificador.describir(codificador.indice(2, 350, 9650)), "2 dados, total >= 5000, alcanza")
+        self.assertEqual(codificador.describir(codificador.indice(2, 300, 4950)), "2 dados, total < 5000, no alcanza")
+
+    def test_bordes_de_los_niveles(self):
+        codificador = CodificadorEstado(cortes_turno=[500, 300], cortes_total=[5000])
+        self.assertEqual(codificador.cortes_turno, [300, 500])
+        self.assertNotEqual(codificador.indice(3, 250, 0), codificador.indice(3, 300, 0))
+        self.assertEqual(codificador.indice(3, 300, 0), codificador.indice(3, 450, 0))
+        self.assertNotEqual(codificador.indice(3, 450, 0), codificador.indice(3, 500, 0))
+        self.assertNotEqual(codificador.indice(3, 0, 4950), codificador.indice(3, 0, 5000))
+        self.assertEqual(codificador.describir(codificador.indice(3, 250, 0)), "3 dados, turno < 300, total < 5000")
+        self.assertEqual(codificador.describir(codificador.indice(3, 300, 0)), "3 dados, turno 300-499, total < 5000")
+        self.assertEqual(codificador.describir(codificador.indice(3, 500, 5000)), "3 dados, turno >= 500, total >= 5000")
+
+    def test_sin_cortes_es_cantidad_de_dados(self):
+        codificador = CodificadorEstado()
+        self.assertEqual(codificador.cant_estados, 7)
+        for cant_dados in range(7):
+            self.assertEqual(codificador.indice(cant_dados, 1000, 9000), cant_dados)
+            self.assertEqual(codificador.describir(cant_dados), f"{cant_dados} dados")
+
+class TestAgenteQLearning(unittest.TestCase):
+    def agente(self):
+        # Sin explorar, prefiere tirar con 3 dados; alpha 1 copia el objetivo.
+        agente = AgenteQLearningJugador(1.0, 0.5, 0.0, 1.0)
+        agente.q_table[3] = [0, 1000]
+        agente.q_table[2] = [100, 0]
+        agente.q_table[0] = [10, 20]
+        self.assertEqual(agente._decidir(0, 300, 3), JUGADA_TIRAR)
+        agente.observar(3, 300, False)
+        # Hasta ver la tirada siguiente no sabe a qué estado llegó.
+        self.assertEqual(agente.q_table[3, JUGADA_TIRAR], 1000)
+        return agente
+
+    def test_tirada_que_suma(self):
+        agente = self.agente()
+        agente._decidir(0, 400, 2)
+        self.assertEqual(agente.q_table[3, JUGADA_TIRAR], 300 + 0.5 * 100)
+
+    def test_tirada_que_pierde_el_turno(self):
+        agente = self.agente()
+        agente.observar(3, 0, True)
+        # El estado siguiente es el comienzo del turno siguiente (0 dados).
+        self.assertEqual(agente.q_table[3, JUGADA_TIRAR], 300 + 0.5 * 20)
+        self.assertEqual(agente.q_table[3, JUGADA_PLANTARSE], 0)
+
+    def test_plantarse(self):
+        agente = AgenteQLearningJugador(1.0, 0.5, 0.0, 1.0)
+        agente.q_table[0] = [10, 20]
+        self.assertEqual(agente._decidir(0, 300, 3), JUGADA_PLANTARSE)
+        agente.observar(3, 300, True)
+        self.assertEqual(agente.q_table[3, JUGADA_PLANTARSE], 300 + 0.5 * 20)
+
+class TestImportaciones(unittest.TestCase):
+    def test_simular_no_carga_graficos(self):
+        codigo = (
+            "import sys, diezmil, jugador; "
+            "print(sorted(m for m in ('matplotlib', 'tqdm') if m in sys.modules))"
+        )
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(salida.strip(), "[]")
+
+class AdaptadorFijo(AdaptadorJugador):
+    """Contesta siempre la misma respuesta, o nada si es None."""
+
+    def __init__(self, respuesta: dict | None):
+        self.respuesta = respuesta
+
+    def responder(self, pedidos: list[dict]) -> list[dict]:
+        if self.respuesta is None:
+            return []
+        return [{"id": pedido["id"], **self.respuesta} for pedido in pedidos]
+
+
+class TestTorneo(unittest.TestCase):
+    def jugar(self, adaptador, cantidad_juegos=30, timeout=1.0, tope_turnos=1000):
+        async def jugar():
+            cliente = ClienteEnProceso(adaptador, timeout=timeout)
+            try:
+                return await _jugar_participante(cliente, cantidad_juegos, 0, 10, tope_turnos)
+            finally:
+                await cliente.cerrar()
+
+        return asyncio.run(jugar())
+
+    def test_partido_normal(self):
+        (turnos, metricas) = self.jugar(AdaptadorJugador(JugadorSiempreSePlanta("plantón")))
+        self.assertGreater(metricas.decisiones, 0)
+        self.assertEqual((metricas.vencidas, metricas.invalidas), (0, 0))
+        # Mismos dados que evaluar_jugadores con la misma semilla.
+        evaluacion = evaluar_jugadores({"plantarse": partial(JugadorSiempreSePlanta, "plantón")}, 30)
+        self.assertAlmostEqual(evaluacion["resultados"]["plantarse"]["media"], turnos.mean())
+
+    def test_bot_que_no_contesta_se_planta(self):
+        (turnos, metricas) = self.jugar(AdaptadorFijo(None), timeout=0.01)
+        self.assertEqual(metricas.vencidas, metricas.decisiones)
+        (turnos_plantando, _) = self.jugar(AdaptadorJugador(JugadorSiempreSePlanta("plantón")))
+        np.testing.assert_array_equal(turnos, turnos_plantando)
+
+    def test_jugada_invalida_pierde_el_turno(self):
+        (turnos_plantando, _) = self.jugar(AdaptadorJugador(JugadorSiempreSePlanta("plantón")), tope_turnos=20)
+        for respuesta in [
+            {"jugada": True, "a_tirar": []},
+            {"jugada": False, "a_tirar": []},
+            {"jugada": 0.0, "a_tirar": []},
+            {"jugada": 2, "a_tirar": []},
+            {"jugada": JUGADA_TIRAR, "a_tirar": [7]},
+            {"jugada": JUGADA_TIRAR, "a_tirar": "1"},
+        ]:
+            (turnos, metricas) = self.jugar(AdaptadorFijo(respuesta), tope_turnos=20)
+            self.assertEqual(metricas.invalidas, metricas.decisiones, respuesta)
+            # Nunca suma puntos: todos los juegos llegan al tope.
+            np.testing.assert_array_equal(turnos, np.full(30, 20))
+            self.assertTrue(np.all(turnos >= turnos_plantando))
+
+    def test_bot_que_muere(self):
+        # Lee el primer lote y termina sin contestar.
+        bot = f"cmd:{sys.executable} -c 'import sys; sys.stdin.readline()'"
+        with self.assertRaises(ConnectionError):
+            asyncio.run(asyncio.wait_for(correr_torneo({"muerto": bot}, 10, timeout=5.0), 30))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,245 @@
+import numpy as np
+from azar import Azar, azar_por_defecto
+from politicas import PUNTAJE_OBJETIVO
+from transiciones import modelo
+from utils import JUGADA_PLANTARSE, JUGADA_TIRAR
+
+
+class ReplicasMonteCarlo:
+    def __init__(self, cantidad_replicas: int, epsilon: float):
+        """Las tablas de cantidad_replicas jugadores
+        ElBatoQueSoloCalculaPromedios, como arreglos de (réplicas, estados,
+        jugadas), para entrenarlos juntos con entrenar_vectorizado. Las
+        reglas son las mismas (every-visit, promedio): al terminar cada turno,
+        cada (estado, jugada) elegido en el turno suma el puntaje del turno a
+        retornos y una visita a cuentas.
+        """
+        self.cantidad_replicas: int = cantidad_replicas
+        self.epsilon: float = epsilon
+        self.retornos = np.zeros((cantidad_replicas, 7, 2))
+        self.cuentas = np.ones((cantidad_replicas, 7, 2))
+        # Visitas del turno en curso, como los contadores de cada jugador.
+        self._visitas = np.zeros((cantidad_replicas, 7, 2))
+
+    def elegir(
+        self, replicas: np.ndarray, estados: np.ndarray, uniformes: np.ndarray
+    ) -> np.ndarray:
+        promedios = self.retornos[replicas, estados] / self.cuentas[replicas, estados]
+        tirar = promedios[:, JUGADA_TIRAR]
+        plantarse = promedios[:, JUGADA_PLANTARSE]
+        explora = uniformes[:, 0] < self.epsilon
+        empate = ~explora & (tirar == plantarse)
+        jugadas = np.where(tirar > plantarse, JUGADA_TIRAR, JUGADA_PLANTARSE)
+        jugadas = np.where(
+            explora,
+            np.where(uniformes[:, 1] > 0.5, JUGADA_PLANTARSE, JUGADA_TIRAR),
+            jugadas,
+        )
+        jugadas = np.where(
+            empate, np.where(uniformes[:, 1] > 0.5, JUGADA_TIRAR, JUGADA_PLANTARSE), jugadas
+        )
+        self._visitas[replicas, estados, jugadas] += 1
+        return jugadas
+
+    def observar(
+        self,
+        replicas: np.ndarray,
+        estados: np.ndarray,
+        jugadas: np.ndarray,
+        recompensas: np.ndarray,
+        siguientes: np.ndarray,
+        fin_turno: np.ndarray,
+    ) -> None:
+        terminan = replicas[fin_turno]
+        visitas = self._visitas[terminan]
+        self.retornos[terminan] += visitas * recompensas[fin_turno][:, None, None]
+        self.cuentas[terminan] += visitas
+        self._visitas[terminan] = 0
+
+
+class ReplicasQLearning:
+    def __init__(
+        self,
+        cantidad_replicas: int,
+        alpha: float,
+        gamma: float,
+        epsilon: float,
+        epsilon_decay: float,
+    ):
+        """Las Q-tables de cantidad_replicas jugadores jugador.AgenteQLearning
+        como un arreglo de (réplicas, estados, jugadas), con un epsilon por
+        réplica, para entrenarlos juntos con entrenar_vectorizado. Las reglas
+        son las mismas: plantarse actualiza Q(estado, jugada) con el puntaje
+        del turno y el comienzo del turno siguiente; tirar queda pendiente
+        con el puntaje de la tirada hasta la próxima decisión (su estado
+        siguiente) o hasta perder el turno (el comienzo del siguiente). Cada
+        resultado (también perder el turno) multiplica epsilon por
+        epsilon_decay.
+        """
+        self.cantidad_replicas: int = cantidad_replicas
+        self.alpha: float = alpha
+        self.gamma: float = gamma
+        self.epsilon = np.full(cantidad_replicas, epsilon)
+        self.epsilon_decay: float = epsilon_decay
+        self.q_table = np.zeros((cantidad_replicas, 7, 2))
+        # Estado y recompensa de la última tirada de cada réplica, o -1 si
+        # no hay una pendiente.
+        self._estado_pendiente = np.full(cantidad_replicas, -1)
+        self._recompensa_pendiente = np.zeros(cantidad_replicas)
+
+    def elegir(
+        self, replicas: np.ndarray, estados: np.ndarray, uniformes: np.ndarray
+    ) -> np.ndarray:
+        # La tirada anterior sumó: su estado siguiente es este.
+        self._cerrar_pendientes(replicas, estados, 0)
+        q = self.q_table[replicas, estados]
+        jugadas = np.where(
+            q[:, JUGADA_TIRAR] > q[:, JUGADA_PLANTARSE], JUGADA_TIRAR, JUGADA_PLANTARSE
+        )
+        explora = uniformes[:, 0] < self.epsilon[replicas]
+        return np.where(
+            explora,
+            np.where(uniformes[:, 1] < 0.5, JUGADA_PLANTARSE, JUGADA_TIRAR),
+            jugadas,
+        )
+
+    def observar(
+        self,
+        replicas: np.ndarray,
+        estados: np.ndarray,
+        jugadas: np.ndarray,
+        recompensas: np.ndarray,
+        siguientes: np.ndarray,
+        fin_turno: np.ndarray,
+    ) -> None:
+        # Los que pierden el turno (estados es -1) cierran su tirada
+        # pendiente con el comienzo del turno siguiente.
+        pierden = estados < 0
+        self._cerrar_pendientes(replicas[pierden], siguientes[pierden], recompensas[pierden])
+        tiran = ~pierden & (jugadas == JUGADA_TIRAR)
+        self._estado_pendiente[replicas[tiran]] = estados[tiran]
+        self._recompensa_pendiente[replicas[tiran]] = recompensas[tiran]
+        plantan = ~pierden & ~tiran
+        self._registrar(
+            replicas[plantan],
+            estados[plantan],
+            JUGADA_PLANTARSE,
+            recompensas[plantan],
+            siguientes[plantan],
+        )
+        self.epsilon[replicas] *= self.epsilon_decay
+
+    def _cerrar_pendientes(
+        self, replicas: np.ndarray, siguientes: np.ndarray, recompensas: np.ndarray | int
+    ) -> None:
+        """Registra la tirada pendiente de las réplicas que tienen una."""
+        estados = self._estado_pendiente[replicas]
+        tienen = estados >= 0
+        r = replicas[tienen]
+        recompensas = np.broadcast_to(recompensas, replicas.shape)[tienen]
+        self._registrar(
+            r,
+            estados[tienen],
+            JUGADA_TIRAR,
+            self._recompensa_pendiente[r] + recompensas,
+            siguientes[tienen],
+        )
+        self._estado_pendiente[r] = -1
+
+    def _registrar(
+        self,
+        replicas: np.ndarray,
+        estados: np.ndarray,
+        jugada: int,
+        recompensas: np.ndarray,
+        siguientes: np.ndarray,
+    ) -> None:
+        """Actualiza la tabla con una transición por réplica."""
+        q = self.q_table[replicas, estados, jugada]
+        maximos = self.q_table[replicas, siguientes].max(axis=1)
+        self.q_table[replicas, estados, jugada] = q + self.alpha * (
+            recompensas + self.gamma * maximos - q
+        )
+
+
+def entrenar_vectorizado(
+    aprendiz: ReplicasMonteCarlo | ReplicasQLearning,
+    cantidad_juegos: int,
+    tope_turnos: int = 1000,
+    azar: Azar | None = None,
+) -> np.ndarray:
+    """Entrena todas las réplicas de aprendiz a la vez: cada una juega
+    cantidad_juegos juegos seguidos, como experimentos.entrenar_replica, pero
+    en cada paso todas las réplicas que no terminaron tiran (con el modelo de
+    transiciones, sin armar dados), eligen su jugada y actualizan su tabla
+    con operaciones sobre arreglos. Cada
+    réplica avanza a su ritmo (una puede ir por su juego 10 y otra por el
+    12). Los resultados siguen la misma distribución que con JuegoDiezMil,
+    pero no son los mismos números, porque el azar se consume en otro orden.
+
+    Args:
+        aprendiz (ReplicasMonteCarlo | ReplicasQLearning): Tablas de las réplicas.
+        cantidad_juegos (int): Juegos de cada réplica.
+        tope_turnos (int, optional): Tope de turnos de cada juego. Defaults to 1000.
+        azar (Azar | None, optional): Fuente de los dados y de la exploración.
+            Defaults to azar_por_defecto().
+
+    Returns:
+        np.ndarray: Cantidad de turnos por réplica y juego.
+    """
+    if azar is None:
+        azar = azar_por_defecto()
+    rng = azar.generador
+    transiciones = modelo()
+    cantidad_replicas = aprendiz.cantidad_replicas
+    curvas = np.zeros((cantidad_replicas, cantidad_juegos), dtype=np.int64)
+    juegos = np.zeros(cantidad_replicas, dtype=np.int64)
+    turnos = np.ones(cantidad_replicas, dtype=np.int64)
+    puntajes_totales = np.zeros(cantidad_replicas, dtype=np.int64)
+    puntajes_turno = np.zeros(cantidad_replicas, dtype=np.int64)
+    dados_a_tirar = np.full(cantidad_replicas, 6, dtype=np.int64)
+    # Réplicas que todavía no jugaron todos sus juegos.
+    activos = np.arange(cantidad_replicas)
+
+    while activos.size > 0:
+        (puntajes_tirada, cant_no_usados) = transiciones.muestrear(
+            dados_a_tirar[activos], rng.random(activos.size)
+        )
+        pierde = puntajes_tirada == 0
+        acumulados = puntajes_turno[activos] + puntajes_tirada
+
+        juegan = ~pierde
+        jugadas = np.full(activos.size, JUGADA_PLANTARSE)
+        jugadas[juegan] = aprendiz.elegir(
+            activos[juegan], cant_no_usados[juegan], rng.random((int(juegan.sum()), 2))
+        )
+        planta = juegan & (jugadas == JUGADA_PLANTARSE)
+        tira = juegan & ~planta
+        fin_de_turno = pierde | planta
+
+        # Lo mismo que JuegoDiezMil le pasa a Jugador.observar.
+        estados = np.where(pierde, -1, cant_no_usados)
+        recompensas = np.where(planta, acumulados, np.where(tira, puntajes_tirada, 0))
+        siguientes = np.where(tira, cant_no_usados, 0)
+        aprendiz.observar(activos, estados, jugadas, recompensas, siguientes, fin_de_turno)
+
+        puntajes_totales[activos[planta]] += acumulados[planta]
+        puntajes_turno[activos[tira]] = acumulados[tira]
+        dados_a_tirar[activos[tira]] = np.where(cant_no_usados[tira] == 0, 6, cant_no_usados[tira])
+
+        terminan_turno = activos[fin_de_turno]
+        fin_de_juego = (puntajes_totales[terminan_turno] >= PUNTAJE_OBJETIVO) | (
+            turnos[terminan_turno] >= tope_turnos
+        )
+        terminan_juego = terminan_turno[fin_de_juego]
+        curvas[terminan_juego, juegos[terminan_juego]] = turnos[terminan_juego]
+        juegos[terminan_juego] += 1
+        turnos[terminan_turno] += 1
+        turnos[terminan_juego] = 1
+        puntajes_totales[terminan_juego] = 0
+        puntajes_turno[terminan_turno] = 0
+        dados_a_tirar[terminan_turno] = 6
+
+        activos = activos[juegos[activos] < cantidad_juegos]
+
+    return curvas